@@ -0,0 +1,29 @@
+"""
+Hive RC simulation kernel: the ISO 13790 5R1C building model with its emission and supply systems, without any
+Rhino or Grasshopper dependency.
+
+The Grasshopper components in ../src are thin adapters around this package (see Hive_Hive.py). In Rhino, copy the
+hive_rc folder to the Rhino scripts folder; elsewhere, add the HIVE_RC_simulator folder to sys.path.
+"""
+
+from __future__ import absolute_import
+
+from .building_physics import Element, ThermalBridge, ThermalZone, ElementBuilding, Building
+from .emission_systems import EmissionDirector, EmissionSystemBase, OldRadiators, NewRadiators, ChilledBeams, \
+    AirConditioning, FloorHeating, TABS, Flows
+from .supply_systems import SupplyDirector, SupplySystemBase, OilBoilerOld, OilBoilerMed, OilBoilerNew, \
+    HeatPumpAir, HeatPumpWater, ElectricHeating, CHP, DirectHeater, DirectCooler, SupplyOut
+from .rc_step import ClosedFormStep
+from .simulation import simulate, RESULTS
+from .multizone import simulate_zones
+from .sweep import grid, sweep, element_building
+from .solar import SunTable, sun_position, sun_table, relative_sun_positions
+from .shading import ShadingMask
+from .polygons import PythonClipping, project_shadow, union_area, clip_convex
+from .culling import ShadeIndex
+from .pipeline import Cached, Pipeline, fingerprint
+from .gains_cache import GainsCache
+from .sinks import ListSink, ArraySink, CsvSink, AggregateSink, TeeSink
+from .substeps import simulate_substeps, simulate_adaptive
+from .multiyear import simulate_years
+from .warmup import steady_state_mass_temperature
@@ -0,0 +1,126 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Spatial index of the shades in front of a window, to find the shades whose shadow can reach the window frame.
+
+For a given sun position, a point (x, y, z) in window coordinates casts its shadow at (x + shift_x * z,
+y + shift_y * z) (see polygons.shadow_shift). The shadow of everything inside an axis aligned box therefore lies in
+the box's x/y extent, widened by shift * z_min and shift * z_max. ShadeIndex keeps the shades in a bounding volume
+hierarchy of such boxes: a subtree whose box shadow misses the window frame is skipped as a whole, so with
+thousands of context surfaces only the few around the current sun direction are projected and clipped.
+"""
+
+from __future__ import division
+
+from .polygons import shadow_shift
+
+
+def _bounds(points):
+    xs, ys, zs = [p[0] for p in points], [p[1] for p in points], [p[2] for p in points]
+    return min(xs), min(ys), min(zs), max(xs), max(ys), max(zs)
+
+
+def _union(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), min(b[2] for b in boxes),
+            max(b[3] for b in boxes), max(b[4] for b in boxes), max(b[5] for b in boxes))
+
+
+class ShadeIndex(object):
+    """
+    Bounding volume hierarchy over shades given in window coordinates (window in the plane z=0, x to the right,
+    y up, z away from the zone)
+    """
+
+    def __init__(self, shades, frame, leaf_size=4):
+        """
+        :param shades: dict of key: list of (x, y, z) shade vertices, e.g. WindowRadiation.context
+        :param frame: x_min, y_min, x_max, y_max of the window frame
+        :param leaf_size: maximum number of shades in a leaf
+        """
+        self.frame = frame
+        self.leaf_size = leaf_size
+        items = [(_bounds(points), key) for key, points in shades.items() if points]
+        self.root = self._build(items) if items else None
+
+    def _build(self, items):
+        # node: (box, children or None, keys or None)
+        box = _union([b for b, key in items])
+        if len(items) <= self.leaf_size:
+            return box, None, [key for b, key in items]
+        # split at the median of the box centres along the longest axis
+        axis = max(range(3), key=lambda a: box[a + 3] - box[a])
+        items = sorted(items, key=lambda item: item[0][axis] + item[0][axis + 3])
+        half = len(items) // 2
+        return box, (self._build(items[:half]), self._build(items[half:])), None
+
+    def query(self, relative_sun_alt, relative_sun_az):
+        """
+        :param relative_sun_alt: Sun altitude [Degrees] (Facade convention)
+        :param relative_sun_az: Sun azimuth [Degrees] (Facade convention), within (-90, 90)
+        :return: keys of the shades whose shadow might fall onto the frame. A superset of the shades that do
+        """
+        if self.root is None:
+            return []
+        shift_x, shift_y = shadow_shift(relative_sun_alt, relative_sun_az)
+        frame_x_min, frame_y_min, frame_x_max, frame_y_max = self.frame
+        keys = []
+        stack = [self.root]
+        while stack:
+            box, children, leaf_keys = stack.pop()
+            x_min, y_min, z_min, x_max, y_max, z_max = box
+            dx_min, dx_max = sorted((shift_x * z_min, shift_x * z_max))
+            dy_min, dy_max = sorted((shift_y * z_min, shift_y * z_max))
+            if x_min + dx_min > frame_x_max or x_max + dx_max < frame_x_min or \
+                    y_min + dy_min > frame_y_max or y_max + dy_max < frame_y_min:
+                continue
+            if children is None:
+                keys.extend(leaf_keys)
+            else:
+                stack.extend(children)
+        return keys
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.culling
+    def test():
+        import random
+        import time
+        from .polygons import PythonClipping, project_shadow
+
+        # a 2 x 1.5 m window in a street canyon: 3000 small facade and roof surfaces of the buildings around
+        random.seed(2)
+        shades = {}
+        for k in range(3000):
+            x, y, z = random.uniform(-60, 60), random.uniform(-10, 40), random.uniform(0.5, 60)
+            w, h = random.uniform(0.5, 3), random.uniform(0.5, 3)
+            shades[k] = [(x, y, z), (x + w, y, z), (x + w, y + h, z + 0.2), (x, y + h, z + 0.2)]
+        frame = [(0, 0), (2, 0), (2, 1.5), (0, 1.5)]
+        index = ShadeIndex(shades, (0, 0, 2, 1.5))
+        backend = PythonClipping()
+
+        def shaded_area(keys, alt, az):
+            shadows = [backend.make_polygon(project_shadow(shades[key], alt, az)) for key in keys]
+            clipped = backend.clip_to_frame(shadows, frame)
+            return backend.area(clipped) if clipped else 0.0
+
+        sun_positions = [(random.uniform(1, 80), random.uniform(-85, 85)) for _ in range(50)]
+        t0 = time.time()
+        culled = [shaded_area(index.query(alt, az), alt, az) for alt, az in sun_positions]
+        t1 = time.time()
+        full = [shaded_area(list(shades), alt, az) for alt, az in sun_positions]
+        t2 = time.time()
+        for a, b in zip(culled, full):
+            assert abs(a - b) < 1e-9, (a, b)
+        candidates = sum(len(index.query(alt, az)) for alt, az in sun_positions) / len(sun_positions)
+        print('%i shades, %.1f candidates per sun position: %.3fs with index, %.3fs without'
+              % (len(shades), candidates, t1 - t0, t2 - t1))
+
+
+    test()
@@ -0,0 +1,253 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Disk cache for hourly window results (solar gains, illuminance, shading factor, ...), kept across Rhino sessions.
+
+Shading and Perez irradiance of a window only depend on window and context geometry, location, transmittances and
+weather, but the Glazed Element component used to recompute them every time a .gh file was opened. GainsCache stores
+the hourly series under a fingerprint of all these inputs (see pipeline.fingerprint), so reopening a project or
+re-running a batch reads them back instead. The cache is bounded in size: when it grows beyond max_bytes, the least
+recently used files are deleted (every read touches the file's modification time).
+
+Cache file layout (native byte order, recorded in the header), like the .epw cache in Core/epw_reader/epw_cache.py:
+[0] magic b'HIVEGNS1'
+[1] header length, uint32
+[2] header, utf-8 json: {"columns": [...], "rows": 8760, "byteorder": "little"}
+[3] zero padding up to a multiple of 8 bytes
+[4] one float64 column per name in "columns", each `rows` values long
+
+usage:
+    cache = GainsCache()
+    key = cache.key(window_vertices, context_vertices, location, transmittances, irradiation)
+    columns = cache.get(key)
+    if columns is None:
+        columns = {'solar_gains': [...], 'illuminance': [...], 'shading_factor': [...]}
+        cache.put(key, columns)
+"""
+
+from __future__ import division
+
+import array
+import json
+import os
+import struct
+import sys
+import tempfile
+
+from .pipeline import fingerprint
+
+MAGIC = b'HIVEGNS1'
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'hive_gains_cache')
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # ~2000 windows with 12 hourly series
+
+
+class GainsCache(object):
+    """
+    Size bounded, least recently used cache of named float series on disk
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param cache_dir: folder for cache files. Default is 'hive_gains_cache' in the system temp folder
+        :param max_bytes: total size of the cache files, the least recently used ones are deleted beyond it
+        """
+        self.cache_dir = DEFAULT_CACHE_DIR if cache_dir is None else cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *inputs):
+        """
+        :param inputs: everything the cached series depend on, e.g. vertex coordinates, location and weather
+        :return: hex digest
+        """
+        return fingerprint((CACHE_VERSION, inputs))
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + '.gains')
+
+    def get(self, key):
+        """
+        :return: dict of name: array('d'), or None if key isn't cached (or the file is unreadable, which is deleted)
+        """
+        cache_file = self.path(key)
+        try:
+            with open(cache_file, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        try:
+            columns = _decode(data)
+        except (ValueError, KeyError, struct.error):
+            # truncated or corrupt, e.g. by a crash while writing
+            columns = None
+        if columns is None:
+            try:
+                os.remove(cache_file)
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+        try:
+            os.utime(cache_file, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return columns
+
+    def put(self, key, columns):
+        """
+        Stores series of equal length under key and evicts least recently used files. Failing to write (e.g. a
+        read-only temp folder) is not an error, the series just aren't cached.
+        :param columns: dict of name: sequence of floats
+        """
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            cache_file = self.path(key)
+            tmp_file = '%s.%i.tmp' % (cache_file, os.getpid())
+            with open(tmp_file, 'wb') as f:
+                f.write(_encode(columns))
+            try:
+                if os.path.exists(cache_file):
+                    os.remove(cache_file)
+                os.rename(tmp_file, cache_file)
+            except OSError:
+                # another process was faster
+                os.remove(tmp_file)
+            self.evict()
+        except (IOError, OSError):
+            pass
+
+    def evict(self):
+        """
+        Deletes the least recently used cache files until the cache fits into max_bytes
+        """
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.gains'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for mtime, size, path in files)
+        for mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.gains'):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+def _encode(columns):
+    names = sorted(columns)
+    rows = len(columns[names[0]]) if names else 0
+    header = json.dumps({'columns': names, 'rows': rows, 'byteorder': sys.byteorder}).encode('utf-8')
+    offset = len(MAGIC) + 4 + len(header)
+    chunks = [MAGIC, struct.pack('<I', len(header)), header, b'\0' * (-offset % 8)]
+    for name in names:
+        column = array.array('d', columns[name])
+        assert len(column) == rows, 'series of different length: %s' % name
+        chunks.append(column.tobytes() if hasattr(column, 'tobytes') else column.tostring())
+    return b''.join(chunks)
+
+
+def _decode(data):
+    header_start = len(MAGIC) + 4
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    header_length = struct.unpack('<I', data[len(MAGIC):header_start])[0]
+    header = json.loads(data[header_start:header_start + header_length].decode('utf-8'))
+    rows = header['rows']
+    offset = header_start + header_length
+    offset += -offset % 8
+    if header['byteorder'] != sys.byteorder or len(data) != offset + 8 * rows * len(header['columns']):
+        return None
+    columns = {}
+    for name in header['columns']:
+        column = array.array('d')
+        chunk = data[offset:offset + 8 * rows]
+        if hasattr(column, 'frombytes'):
+            column.frombytes(chunk)
+        else:
+            column.fromstring(chunk)
+        columns[name] = column
+        offset += 8 * rows
+    return columns
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.gains_cache
+    def test():
+        import math
+        import shutil
+        import time
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            # room for two sets of series
+            cache = GainsCache(cache_dir, max_bytes=2 * (3 * 8 * 8760 + 200))
+            window = [(0.0, 0.0, 0.0), (2.0, 0.0, 0.0), (2.0, 0.0, 1.5), (0.0, 0.0, 1.5)]
+            location = (47.37, 8.55, 1, 2015)
+            gains = [max(0.0, 500 * math.sin(2 * math.pi * h / 24)) for h in range(8760)]
+            columns = {'solar_gains': gains, 'illuminance': [100 * g for g in gains],
+                       'shading_factor': [1.0] * 8760}
+
+            key = cache.key(window, [], location, 0.7, 0.8)
+            assert cache.get(key) is None
+            cache.put(key, columns)
+            t0 = time.time()
+            cached = GainsCache(cache_dir).get(key)
+            t1 = time.time()
+            assert sorted(cached) == sorted(columns)
+            assert all(list(cached[name]) == list(columns[name]) for name in columns)
+            assert cache.key(window, [], location, 0.6, 0.8) != key
+
+            # least recently used files go first, with explicit access times (file systems with coarse mtimes)
+            def last_used(k, seconds):
+                os.utime(cache.path(k), (seconds, seconds))
+
+            keys = [cache.key(window, [], location, g_value, 0.8) for g_value in (0.5, 0.6)]
+            last_used(key, 1000)
+            cache.put(keys[0], columns)
+            last_used(keys[0], 2000)
+            cache.put(keys[1], columns)
+            assert cache.get(key) is None
+            assert cache.get(keys[0]) is not None
+            last_used(keys[1], 3000)
+            cache.put(key, columns)
+            assert cache.get(keys[1]) is None
+            assert cache.get(key) is not None and cache.get(keys[0]) is not None
+
+            # a truncated file is a miss, and is deleted
+            with open(cache.path(key), 'r+b') as f:
+                f.truncate(20)
+            assert cache.get(key) is None and not os.path.exists(cache.path(key))
+            with open(cache.path(keys[0]), 'wb') as f:
+                f.write(MAGIC + struct.pack('<I', 2) + b'{}')
+            assert cache.get(keys[0]) is None and not os.path.exists(cache.path(keys[0]))
+            print('read 3 x 8760 values in %.2f ms' % (1000 * (t1 - t0)))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+    test()
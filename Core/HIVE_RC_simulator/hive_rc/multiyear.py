@@ -0,0 +1,148 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Long-horizon simulation: a zone over many years of weather, e.g. 30 years of a climate scenario.
+
+simulate_years chains the years one after the other, the mass temperature at the end of a year is the start of the
+next one. Only one year of weather is in memory at a time, and per year only aggregates (sum, mean, minimum and
+maximum of every result, see sinks.AggregateSink) are kept and yielded as soon as the year is done. Hourly values
+can be streamed to a file per year with hourly_sink, e.g. lambda year: CsvSink('year_%i.csv' % year).
+
+Years are hourly outdoor temperature series or .epw files (read through the binary cache of epw_cache.py in
+Core/epw_reader, which has to be importable). A typical meteorological year can simply be repeated:
+simulate_years(zone, ['Zurich.epw'] * 10). The first year starts from a warm-up: its last warmup_hours are simulated
+beforehand and thrown away, so the mass temperature in January doesn't depend on t_m_init.
+
+usage:
+    for year, aggregates in simulate_years(zone, scenario_epw_paths, internal_gains, solar_gains):
+        print(year, aggregates['heating_demand']['sum'] / 1000, 'kWh')
+"""
+
+from __future__ import division
+
+from .simulation import simulate, RESULTS
+from .sinks import AggregateSink, TeeSink
+
+
+def _outdoor_temperature(year, cache_dir):
+    if isinstance(year, str) or type(year).__name__ == 'unicode':
+        import epw_cache
+        return list(epw_cache.load(year, cache_dir)['drybulb'])
+    return year
+
+
+def _schedule(schedule, year, hours):
+    """
+    Schedule of a year: None, a function of the year index, or hourly values used for every year (repeated or cut
+    to the length of the year, e.g. for leap years)
+    """
+    if schedule is None:
+        return None
+    if callable(schedule):
+        return schedule(year)
+    if len(schedule) == hours:
+        return schedule
+    return [schedule[hour % len(schedule)] for hour in range(hours)]
+
+
+def simulate_years(zone, years, internal_gains=None, solar_gains=None, illuminance=None, occupancy=None,
+                   t_m_init=20.0, warmup_hours=720, outputs=RESULTS, hourly_sink=None, cache_dir=None):
+    """
+    Simulates the years one after the other, passing on the mass temperature. A generator, years are read and
+    simulated while iterating
+    :param zone: ElementBuilding or Building
+    :param years: iterable of years, each an .epw file path or a sequence of hourly outdoor temperatures [C]
+    :param internal_gains: internal gains per hour [W] for every year, or a function of the year index returning
+    them, None for no internal gains. Same for solar_gains, illuminance and occupancy
+    :param t_m_init: mass temperature before the warm-up [C]
+    :param warmup_hours: hours at the end of the first year simulated before the first year
+    :param outputs: results to aggregate, see simulation.RESULTS
+    :param hourly_sink: None, or function of the year index returning a sink for the hourly results of that year
+    :param cache_dir: folder of the .epw cache files, see epw_cache.load
+    :return: yields year index, dict of output name: dict with 'sum', 'mean', 'min' and 'max' over the year
+    """
+    t_m_prev = t_m_init
+    for index, year in enumerate(years):
+        t_out = _outdoor_temperature(year, cache_dir)
+        hours = len(t_out)
+        schedules = [_schedule(s, index, hours) for s in (internal_gains, solar_gains, illuminance, occupancy)]
+
+        if index == 0 and warmup_hours:
+            start = max(0, hours - warmup_hours)
+            simulate(zone, t_out[start:], *[s[start:] if s is not None else None for s in schedules],
+                     t_m_init=t_m_prev, sink=AggregateSink(('t_m',)))
+            t_m_prev = zone.t_m_next
+
+        aggregates = AggregateSink(outputs)
+        sink = aggregates if hourly_sink is None else TeeSink(aggregates, hourly_sink(index))
+        simulate(zone, t_out, *schedules, t_m_init=t_m_prev, sink=sink)
+        t_m_prev = zone.t_m_next
+        yield index, aggregates.finish()
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.multiyear
+    def test():
+        import math
+        import os
+        import shutil
+        import tempfile
+        import time
+        from .building_physics import Building
+        from .sinks import CsvSink, read_csv
+
+        def weather(year):
+            # a warming climate, +0.05 K per year, with a leap year every 4 years
+            hours = 8784 if year % 4 == 0 else 8760
+            return [8 + 0.05 * year - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24)
+                    for h in range(hours)]
+
+        solar_gains = [max(0.0, 2000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in range(8760)]
+        internal_gains = [300.0 + 200 * (8 <= h % 24 <= 18) for h in range(8760)]
+
+        t0 = time.time()
+        years = list(simulate_years(Building(), (weather(y) for y in range(30)), internal_gains, solar_gains))
+        t1 = time.time()
+        heating = [aggregates['heating_demand']['sum'] for year, aggregates in years]
+        assert [year for year, aggregates in years] == list(range(30))
+        assert heating[-1] < heating[0]
+
+        # chained years are the same as one long simulation
+        t_out, gains, solar = [], [], []
+        for y in range(3):
+            t_out += weather(y)
+            gains += [internal_gains[h % 8760] for h in range(len(weather(y)))]
+            solar += [solar_gains[h % 8760] for h in range(len(weather(y)))]
+        long_run = simulate(Building(), t_out, gains, solar)
+        start = 0
+        for (year, aggregates), hours in zip(simulate_years(Building(), [weather(y) for y in range(3)],
+                                                            internal_gains, solar_gains, warmup_hours=0),
+                                             [len(weather(y)) for y in range(3)]):
+            expected = sum(long_run['heating_demand'][start:start + hours])
+            assert abs(aggregates['heating_demand']['sum'] - expected) < 1e-6 * expected
+            assert aggregates['t_air']['max'] == max(long_run['t_air'][start:start + hours])
+            start += hours
+
+        # hourly values of every year in a .csv file
+        folder = tempfile.mkdtemp()
+        try:
+            paths = [os.path.join(folder, 'year_%i.csv' % y) for y in range(2)]
+            for year, aggregates in simulate_years(Building(), [weather(1), weather(2)], internal_gains,
+                                                   solar_gains, outputs=('heating_demand',),
+                                                   hourly_sink=lambda year: CsvSink(paths[year], names=['t_air'])):
+                assert list(aggregates) == ['heating_demand']
+                assert len(read_csv(paths[year])['t_air']) == 8760
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        print('30 years in %.2fs, heating demand %.0f kWh in year 0, %.0f kWh in year 29'
+              % (t1 - t0, heating[0] / 1000, heating[-1] / 1000))
+
+
+    test()
@@ -0,0 +1,182 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Simulation of many zones at once, e.g. all zones of a campus, with different envelopes, set points and systems.
+
+The 5R1C state of all zones is kept in flat lists of length n_zones (one entry per zone) and all zones are stepped
+together, hour by hour. Besides being affine in the energy demand (see rc_step.py), the free-floating node
+temperatures are linear in internal gains, solar gains, outdoor and previous mass temperature, so each zone reduces
+to a few coefficients that are computed once. An hour of a zone is then a handful of multiply-adds on plain floats,
+without attribute lookups or objects per zone and hour (supply systems are only called for hours with demand).
+Zone attributes (set points, power limits, systems) are read once at the start.
+
+usage:
+    results = simulate_zones(zones, t_out, internal_gains, solar_gains)
+    heating_zone_3 = results['heating_demand'][3]  # hourly values of the 4th zone
+"""
+
+from __future__ import division
+
+from .rc_step import ClosedFormStep
+from .simulation import RESULTS
+
+
+def zone_coefficients(zone):
+    """
+    Linear coefficients of the node temperatures of a zone
+    :param zone: ElementBuilding or Building
+    :return: for each of t_m_next, t_m, t_s, t_air, t_operative a tuple of its coefficients for
+    (internal gains, solar gains, t_out, t_m_prev, energy demand)
+    """
+    step = ClosedFormStep(zone)
+    unit_inputs = [(1.0, 0.0, 0.0, 0.0, 0.0),  # internal gains
+                   (0.0, 1.0, 0.0, 0.0, 0.0),  # solar gains
+                   (0.0, 0.0, 1.0, 0.0, 0.0),  # t_out
+                   (0.0, 0.0, 0.0, 1.0, 0.0),  # t_m_prev
+                   (0.0, 0.0, 0.0, 0.0, 1.0)]  # energy demand
+    columns = []
+    for internal_gains, solar_gains, t_out, t_m_prev, energy_demand in unit_inputs:
+        t_m_next, t_m, t_s, t_air = step.temperatures(energy_demand, internal_gains, solar_gains, t_out, t_m_prev)
+        columns.append((t_m_next, t_m, t_s, t_air, 0.3 * t_air + 0.7 * t_s))
+    return list(zip(*columns))
+
+
+def _per_zone(values, n_zones, horizon):
+    # None: zero for all zones and hours; one hourly series: the same for all zones; else one series per zone
+    if not values:
+        return [[0.0] * horizon] * n_zones
+    if not hasattr(values[0], '__len__'):
+        return [values] * n_zones
+    if len(values) != n_zones:
+        raise ValueError('Expected hourly values for %i zones, got %i' % (n_zones, len(values)))
+    return values
+
+
+def simulate_zones(zones, t_out, internal_gains=None, solar_gains=None, illuminance=None, occupancy=None,
+                   t_m_init=20.0):
+    """
+    Solves energy and lighting demand of many zones, hour by hour
+    :param zones: list of ElementBuilding or Building. Their attributes are not modified
+    :param t_out: outdoor air temperature per hour [C], the same for all zones
+    :param internal_gains: internal gains [W], one hourly series per zone, one series for all zones, or None
+    :param solar_gains: solar gains [W], one hourly series per zone, one series for all zones, or None
+    :param illuminance: illuminance through the windows [Lumens], per zone, for all zones, or None
+    :param occupancy: occupancy, per zone, for all zones, or None
+    :param t_m_init: mass temperature before the first hour [C], one value for all zones or one per zone
+    :return: dict with one entry per name in RESULTS, each a list with the hourly values of every zone
+    """
+    n_zones = len(zones)
+    horizon = len(t_out)
+    internal_gains = _per_zone(internal_gains, n_zones, horizon)
+    solar_gains = _per_zone(solar_gains, n_zones, horizon)
+    illuminance = _per_zone(illuminance, n_zones, horizon)
+    occupancy = _per_zone(occupancy, n_zones, horizon)
+    t_m_prev = list(t_m_init) if hasattr(t_m_init, '__len__') else [t_m_init] * n_zones
+
+    # per zone constants
+    coefficients = [zone_coefficients(zone) for zone in zones]
+    steps = [ClosedFormStep(zone) for zone in zones]
+    t_set_heating = [z.t_set_heating for z in zones]
+    t_set_cooling = [z.t_set_cooling for z in zones]
+    max_heating = [z.max_heating_energy for z in zones]
+    max_cooling = [z.max_cooling_energy for z in zones]
+    lighting_control = [z.lighting_control for z in zones]
+    lux_factor = [z.lighting_utilisation_factor * z.lighting_maintenance_factor / z.floor_area for z in zones]
+    lighting_power = [z.lighting_load * z.floor_area for z in zones]
+
+    results = dict((name, [[0.0] * horizon for _ in range(n_zones)]) for name in RESULTS)
+    t_air_out, t_operative_out, t_m_out, lighting_out, energy_out, heating_out, cooling_out, heating_el_out, \
+        heating_fossils_out, cooling_el_out, cooling_fossils_out, electricity_out_out = [results[n] for n in RESULTS]
+
+    for hour in range(horizon):
+        t_o = t_out[hour]
+        for i in range(n_zones):
+            c_m_next, c_m, c_s, c_air, c_op = coefficients[i]
+            ig = internal_gains[i][hour]
+            sg = solar_gains[i][hour]
+            t_m0 = t_m_prev[i]
+
+            # free-floating temperatures, and demand as in ClosedFormStep.solve_building_energy
+            t_air = c_air[0] * ig + c_air[1] * sg + c_air[2] * t_o + c_air[3] * t_m0
+            energy_demand = 0.0
+            if t_air < t_set_heating[i] or t_air > t_set_cooling[i]:
+                heating = t_air < t_set_heating[i]
+                t_air_set = t_set_heating[i] if heating else t_set_cooling[i]
+                energy_demand = min(max((t_air_set - t_air) / c_air[4], max_cooling[i]), max_heating[i])
+                zone, step = zones[i], steps[i]
+                if heating:
+                    supply = zone.heating_supply_system(energy_demand, t_o, step.heating_supply_temperature,
+                                                        step.cooling_supply_temperature, True, False).calc_loads()
+                    heating_out[i][hour] = energy_demand
+                    heating_el_out[i][hour] = supply.electricity_in
+                    heating_fossils_out[i][hour] = supply.fossils_in
+                else:
+                    supply = zone.cooling_supply_system(-energy_demand, t_o, step.heating_supply_temperature,
+                                                        step.cooling_supply_temperature, False, True).calc_loads()
+                    cooling_out[i][hour] = energy_demand
+                    cooling_el_out[i][hour] = supply.electricity_in
+                    cooling_fossils_out[i][hour] = supply.fossils_in
+                electricity_out_out[i][hour] = supply.electricity_out
+                t_air += c_air[4] * energy_demand
+            energy_out[i][hour] = energy_demand
+            t_air_out[i][hour] = t_air
+            t_m_out[i][hour] = c_m[0] * ig + c_m[1] * sg + c_m[2] * t_o + c_m[3] * t_m0 + c_m[4] * energy_demand
+            t_operative_out[i][hour] = c_op[0] * ig + c_op[1] * sg + c_op[2] * t_o + c_op[3] * t_m0 + \
+                c_op[4] * energy_demand
+            t_m_prev[i] = c_m_next[0] * ig + c_m_next[1] * sg + c_m_next[2] * t_o + c_m_next[3] * t_m0 + \
+                c_m_next[4] * energy_demand
+
+            # lighting, as solve_building_lighting
+            if illuminance[i][hour] * lux_factor[i] < lighting_control[i] and occupancy[i][hour] > 0:
+                lighting_out[i][hour] = lighting_power[i]
+    return results
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.multizone
+    def test():
+        import math
+        import time
+        from .building_physics import Building
+        from .emission_systems import FloorHeating, AirConditioning
+        from .supply_systems import HeatPumpAir, HeatPumpWater, CHP
+        from .simulation import simulate
+
+        hours = range(8760)
+        t_out = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        solar_gains = [max(0.0, 3000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        internal_gains = [300.0 + 200 * (8 <= h % 24 <= 18) for h in hours]
+        illuminance = [max(0.0, 20000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        occupancy = [0.1 * (8 <= h % 24 <= 18) for h in hours]
+
+        def portfolio():
+            zones = []
+            for n in range(50):
+                zones.append(Building(window_area=5.0 + n % 10, u_walls=0.15 + 0.01 * (n % 7),
+                                      t_set_heating=19 + n % 3, t_set_cooling=25 + n % 2,
+                                      heating_supply_system=[HeatPumpAir, HeatPumpWater, CHP][n % 3],
+                                      cooling_supply_system=HeatPumpAir,
+                                      heating_emission_system=FloorHeating if n % 4 == 0 else AirConditioning))
+            return zones
+
+        gains = [[g * (1 + 0.01 * n) for g in solar_gains] for n in range(50)]
+        t0 = time.time()
+        results = simulate_zones(portfolio(), t_out, internal_gains, gains, illuminance, occupancy)
+        t1 = time.time()
+        for n, zone in enumerate(portfolio()):
+            single = simulate(zone, t_out, internal_gains, gains[n], illuminance, occupancy)
+            for name in RESULTS:
+                for a, b in zip(results[name][n], single[name]):
+                    assert abs(a - b) <= 1e-9 * max(1.0, abs(b)), (n, name, a, b)
+        t2 = time.time()
+        print('50 zones x 8760 hours: %.2fs at once, %.2fs one by one' % (t1 - t0, t2 - t1))
+
+
+    test()
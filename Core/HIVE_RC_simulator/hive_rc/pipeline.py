@@ -0,0 +1,210 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Result cache for the stages of a simulation (weather -> sun table -> window gains -> gains profile -> RC results).
+
+Every stage is keyed by a fingerprint of its inputs. A stage whose inputs didn't change returns its previous
+result instead of running again, so e.g. changing u_walls only re-runs the RC loop, and a set point change never
+touches the solar stages. Results of a stage are returned as Cached objects; passing a Cached object on to the next
+stage makes that stage depend on it by key, without fingerprinting the (large) value again.
+
+In Grasshopper, one Pipeline is kept in sc.sticky['HivePipeline'] (see Hive_Hive.py), so that components share it
+across solutions.
+
+usage:
+    pipeline = Pipeline()
+    weather = pipeline.run('weather', read_fields, (epw_path, ('drybulb', 'dni', 'dhi')))
+    rc = pipeline.run('rc', simulate, (zone, weather.value['drybulb'], gains), inputs=(zone, weather, gains))
+    results = rc.value
+"""
+
+from __future__ import division
+
+import array
+import hashlib
+import types
+from collections import OrderedDict
+
+
+class Cached(object):
+    """
+    Result of a pipeline stage: value, and key (the fingerprint of stage and inputs it was computed from)
+    """
+
+    def __init__(self, stage, key, value):
+        self.stage = stage
+        self.key = key
+        self.value = value
+
+
+def _update(sha, value, seen):
+    if value is None or isinstance(value, (bool, int, float, complex, str)) or type(value).__name__ in (
+            'long', 'unicode'):
+        sha.update(('%s:%r;' % (type(value).__name__, value)).encode('utf-8'))
+    elif isinstance(value, bytes):
+        sha.update(b'bytes:' + value + b';')
+    elif isinstance(value, Cached):
+        sha.update(('cached:%s;' % value.key).encode('utf-8'))
+    elif isinstance(value, array.array):
+        sha.update(('array:%s:' % value.typecode).encode('utf-8'))
+        sha.update(value.tobytes() if hasattr(value, 'tobytes') else value.tostring())
+    elif isinstance(value, (list, tuple, memoryview)):
+        try:
+            # fast path for hourly series
+            floats = array.array('d', value)
+        except (TypeError, ValueError, OverflowError):
+            sha.update(('%s[' % type(value).__name__).encode('utf-8'))
+            for item in value:
+                _update(sha, item, seen)
+            sha.update(b'];')
+        else:
+            sha.update(('%s:d:' % type(value).__name__).encode('utf-8'))
+            sha.update(floats.tobytes() if hasattr(floats, 'tobytes') else floats.tostring())
+    elif isinstance(value, dict):
+        sha.update(b'dict{')
+        for key in sorted(value, key=repr):
+            _update(sha, key, seen)
+            _update(sha, value[key], seen)
+        sha.update(b'};')
+    elif isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType)) or \
+            type(value).__name__ == 'classobj':
+        sha.update(('code:%s.%s;' % (value.__module__, value.__name__)).encode('utf-8'))
+    elif hasattr(value, '__dict__'):
+        if id(value) in seen:
+            sha.update(b'cycle;')
+            return
+        seen.add(id(value))
+        sha.update(('object:%s.%s' % (type(value).__module__, type(value).__name__)).encode('utf-8'))
+        _update(sha, vars(value), seen)
+        seen.discard(id(value))
+    else:
+        raise TypeError('Cannot fingerprint %s, pass a description of it as inputs' % type(value).__name__)
+
+
+def fingerprint(value):
+    """
+    Content hash of numbers, strings, containers, arrays, classes, functions and plain objects (by their
+    attributes), e.g. zones with their elements
+    :return: hex digest
+    """
+    sha = hashlib.sha1()
+    _update(sha, value, set())
+    return sha.hexdigest()
+
+
+class Pipeline(object):
+    """
+    Least recently used cache of stage results
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._results = OrderedDict()
+        self.runs = {}  # stage name -> number of times the stage actually ran
+        self.hits = {}  # stage name -> number of times a cached result was returned
+
+    def run(self, stage, function, args=(), kwargs=None, inputs=None):
+        """
+        Result of function(*args, **kwargs), computed only if stage and inputs differ from all cached results
+        :param stage: name of the stage, e.g. 'window_gains'
+        :param function: the stage itself, part of the fingerprint (by module and name)
+        :param args: positional arguments. Cached objects are replaced by their values
+        :param kwargs: keyword arguments. Cached objects are replaced by their values
+        :param inputs: what the result depends on, default (args, kwargs). Pass it for arguments that can't be
+        fingerprinted, e.g. Rhino geometry, or to leave out arguments that don't change the result
+        :return: Cached
+        """
+        kwargs = kwargs or {}
+        key = fingerprint((stage, function, (args, kwargs) if inputs is None else inputs))
+        if key in self._results:
+            cached = self._results.pop(key)
+            self._results[key] = cached
+            self.hits[stage] = self.hits.get(stage, 0) + 1
+            return cached
+
+        def unwrap(value):
+            return value.value if isinstance(value, Cached) else value
+
+        value = function(*[unwrap(a) for a in args], **dict((k, unwrap(v)) for k, v in kwargs.items()))
+        cached = Cached(stage, key, value)
+        self._results[key] = cached
+        self.runs[stage] = self.runs.get(stage, 0) + 1
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return cached
+
+    def clear(self):
+        self._results.clear()
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.pipeline
+    def test():
+        import copy
+        import math
+        import time
+        from .building_physics import Building
+        from .simulation import simulate
+        from .solar import sun_table, relative_sun_positions
+
+        hours = range(8760)
+        weather = {'drybulb': [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24)
+                               for h in hours],
+                   'dni': [max(0.0, 700 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours],
+                   'dhi': [max(0.0, 150 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]}
+
+        def read_weather(path):
+            return weather
+
+        def window_gains(weather, table, window_azimuth_deg, window_area, g_value):
+            alt, az = relative_sun_positions(table, math.radians(window_azimuth_deg), math.radians(90))
+            gains = []
+            for h in hours:
+                cos_incidence = math.cos(math.radians(alt[h])) * math.cos(math.radians(az[h]))
+                direct = weather['dni'][h] * cos_incidence if table.altitude[h] > 0 and cos_incidence > 0 else 0.0
+                gains.append(g_value * window_area * (direct + 0.5 * weather['dhi'][h]))
+            return gains
+
+        def run(pipeline, u_walls=0.2, t_set_heating=20, window_azimuth_deg=0):
+            w = pipeline.run('weather', read_weather, ('Zurich.epw',))
+            table = pipeline.run('sun', sun_table, (47.37, 8.55, 1, 2015))
+            gains = pipeline.run('window_gains', window_gains, (w, table, window_azimuth_deg, 13.5, 0.6))
+            zone = Building(u_walls=u_walls, t_set_heating=t_set_heating)
+            # simulate changes attributes of the zone, so the fingerprint is taken from a copy
+            rc = pipeline.run('rc', simulate, (copy.deepcopy(zone), w.value['drybulb'], None, gains),
+                              inputs=(zone, w, gains))
+            return sum(rc.value['heating_demand'])
+
+        pipeline = Pipeline()
+        t0 = time.time()
+        reference = run(pipeline)
+        t1 = time.time()
+        assert run(pipeline) == reference
+        t2 = time.time()
+        assert pipeline.runs == {'weather': 1, 'sun': 1, 'window_gains': 1, 'rc': 1}
+
+        # envelope and set point changes only re-run the RC stage
+        assert run(pipeline, u_walls=0.4) > reference
+        run(pipeline, t_set_heating=22)
+        assert pipeline.runs == {'weather': 1, 'sun': 1, 'window_gains': 1, 'rc': 3}
+        # turning the window re-runs window gains and RC
+        run(pipeline, window_azimuth_deg=90)
+        assert pipeline.runs == {'weather': 1, 'sun': 1, 'window_gains': 2, 'rc': 4}
+        # back to the start: all cached
+        assert run(pipeline) == reference
+        assert pipeline.runs['rc'] == 4
+
+        assert fingerprint(Building(u_walls=0.2)) == fingerprint(Building(u_walls=0.2)) != \
+            fingerprint(Building(u_walls=0.3))
+        assert fingerprint([1.0, 2.0]) != fingerprint((1.0, 2.0)) and fingerprint([1, 'a']) != fingerprint([1, 'b'])
+        print('first run %.3fs, unchanged inputs %.3fs' % (t1 - t0, t2 - t1))
+
+
+    test()
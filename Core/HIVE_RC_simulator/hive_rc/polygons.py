@@ -0,0 +1,255 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Shadow projection and polygon clipping for window shading, in plain Python.
+
+WindowRadiation projects the context geometry onto the window plane (project_shadow), clips the shadows with the
+window frame and subtracts the shaded area from the window area. The polygon booleans go through a clipping
+backend, an object with these methods:
+
+    make_polygon(points)            polygon from (x, y) tuples [m] in the window plane
+    points(polygon)                 (x, y) tuples [m] of a polygon, e.g. for drawing
+    clip_to_frame(polygons, frame)  the parts of the union of polygons inside frame, a list of polygons, or None
+    area(polygons)                  area of the union of polygons [m2]
+
+PythonClipping (here) runs anywhere, e.g. for batch shading on a Linux server. Windows frames are convex, so each
+shadow is clipped with Sutherland-Hodgman; the area of the union of the clipped shadows is exact, computed slab by
+slab between the x coordinates of all vertices and edge intersections. ClipperClipping (in Hive_Hive.py) uses
+clipper_library.dll and is the default inside Rhino.
+"""
+
+from __future__ import division
+
+import math
+
+
+def signed_area(points):
+    """
+    Shoelace formula
+    :param points: (x, y) tuples of a polygon
+    :return: area, positive for counterclockwise polygons
+    """
+    area = 0.0
+    x0, y0 = points[-1]
+    for x1, y1 in points:
+        area += x0 * y1 - x1 * y0
+        x0, y0 = x1, y1
+    return area / 2
+
+
+def counterclockwise(points):
+    return list(points) if signed_area(points) >= 0 else list(reversed(points))
+
+
+def clip_convex(subject, clip):
+    """
+    Sutherland-Hodgman: the part of a polygon inside a convex polygon
+    :param subject: (x, y) tuples of any simple polygon
+    :param clip: (x, y) tuples of a convex, counterclockwise polygon
+    :return: (x, y) tuples of the clipped polygon, empty if subject lies outside of clip
+    """
+    output = list(subject)
+    cx0, cy0 = clip[-1]
+    for cx1, cy1 in clip:
+        if not output:
+            break
+        ex, ey = cx1 - cx0, cy1 - cy0
+        polygon, output = output, []
+        px, py = polygon[-1]
+        p_inside = ex * (py - cy0) - ey * (px - cx0) >= 0
+        for qx, qy in polygon:
+            q_inside = ex * (qy - cy0) - ey * (qx - cx0) >= 0
+            if q_inside != p_inside:
+                # intersection of pq with the clip edge
+                dx, dy = qx - px, qy - py
+                t = (ex * (cy0 - py) - ey * (cx0 - px)) / (ex * dy - ey * dx)
+                output.append((px + t * dx, py + t * dy))
+            if q_inside:
+                output.append((qx, qy))
+            px, py, p_inside = qx, qy, q_inside
+        cx0, cy0 = cx1, cy1
+    return output
+
+
+def _edges(polygons):
+    edges = []
+    for polygon in polygons:
+        x0, y0 = polygon[-1]
+        for x1, y1 in polygon:
+            if x0 != x1:
+                edges.append((x0, y0, x1, y1))
+            x0, y0 = x1, y1
+    return edges
+
+
+def union_area(polygons):
+    """
+    Area of the union of simple polygons (nonzero fill), exact up to rounding
+    :param polygons: list of lists of (x, y) tuples, any orientation
+    :return: area
+    """
+    polygons = [counterclockwise(p) for p in polygons if len(p) >= 3]
+    if len(polygons) == 1:
+        return signed_area(polygons[0])
+    edges = _edges(polygons)
+
+    # between two neighbouring slab limits no edges cross, so the covered length is linear in x and its value in
+    # the middle of the slab gives the exact area of the slab
+    xs = set()
+    for x0, y0, x1, y1 in edges:
+        xs.add(x0)
+        xs.add(x1)
+    for i, (ax0, ay0, ax1, ay1) in enumerate(edges):
+        for bx0, by0, bx1, by1 in edges[i + 1:]:
+            if max(ax0, ax1) <= min(bx0, bx1) or max(bx0, bx1) <= min(ax0, ax1):
+                continue
+            dax, day, dbx, dby = ax1 - ax0, ay1 - ay0, bx1 - bx0, by1 - by0
+            denominator = dax * dby - day * dbx
+            if denominator == 0:
+                continue
+            t = ((bx0 - ax0) * dby - (by0 - ay0) * dbx) / denominator
+            u = ((bx0 - ax0) * day - (by0 - ay0) * dax) / denominator
+            if 0 < t < 1 and 0 < u < 1:
+                xs.add(ax0 + t * dax)
+    xs = sorted(xs)
+
+    area = 0.0
+    for x_left, x_right in zip(xs[:-1], xs[1:]):
+        x = (x_left + x_right) / 2
+        if not x_left < x < x_right:
+            # slab narrower than the float resolution
+            continue
+        crossings = []
+        for x0, y0, x1, y1 in edges:
+            if (x0 < x < x1) or (x1 < x < x0):
+                # counterclockwise polygons: lower edges run towards +x and enter the polygon
+                crossings.append((y0 + (x - x0) * (y1 - y0) / (x1 - x0), 1 if x1 > x0 else -1))
+        crossings.sort()
+        winding, covered = 0, 0.0
+        for k, (y, direction) in enumerate(crossings):
+            winding += direction
+            if winding > 0:
+                covered += crossings[k + 1][0] - y
+        area += (x_right - x_left) * covered
+    return area
+
+
+def project_shadow(shade_points, relative_sun_alt, relative_sun_az):
+    """
+    Shadow of a shading surface on the window plane (z=0), see WindowRadiation.calc_shadow.
+    Coordinate system:
+    X = Horizontal direction, parallel to glazing surface
+    Y = Vertical direction, parallel to glazing surface
+    Z = Perpendicular in respect of glazing surface
+    :param shade_points: (x, y, z) of the shade vertices in window coordinates
+    :param relative_sun_alt: Sun altitude [Degrees] (Facade convention)
+    :param relative_sun_az: Sun azimuth [Degrees] (Facade convention), within (-90, 90)
+    :return: (x, y) tuples of the shadow
+    """
+    shift_x, shift_y = shadow_shift(relative_sun_alt, relative_sun_az)
+    return [(point[0] + shift_x * point[2], point[1] + shift_y * point[2]) for point in shade_points]
+
+
+def shadow_shift(relative_sun_alt, relative_sun_az):
+    """
+    A point (x, y, z) in front of the window casts its shadow at (x + shift_x * z, y + shift_y * z)
+    :return: shift_x, shift_y
+    """
+    # Align relative_sun_az with window plane, convert angles to radians
+    relative_sun_az_rad, relative_sun_alt_rad = math.radians(relative_sun_az + 90), math.radians(relative_sun_alt)
+
+    # Create sun vector
+    sunvec_x = -math.cos(relative_sun_az_rad) * math.cos(relative_sun_alt_rad)
+    sunvec_y = math.sin(relative_sun_alt_rad)
+    sunvec_z = math.sin(relative_sun_az_rad) * math.cos(relative_sun_alt_rad)
+
+    # point + t * sun vector lies on the window plane (z=0) for t = -z / sunvec_z
+    return -sunvec_x / sunvec_z, -sunvec_y / sunvec_z
+
+
+class PythonClipping(object):
+    """
+    Clipping backend without any dependencies, polygons are lists of (x, y) tuples
+    """
+    name = 'python'
+
+    def make_polygon(self, points):
+        return [(float(x), float(y)) for x, y in points]
+
+    def points(self, polygon):
+        return polygon
+
+    def clip_to_frame(self, polygons, frame):
+        frame = counterclockwise(frame)
+        clipped = [clip_convex(polygon, frame) for polygon in polygons]
+        clipped = [polygon for polygon in clipped if len(polygon) >= 3]
+        return clipped or None
+
+    def area(self, polygons):
+        return union_area(polygons)
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.polygons
+    def test():
+        import random
+        import time
+
+        square = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        assert signed_area(square) == 1 and signed_area(list(reversed(square))) == -1
+        assert union_area([square, [(0.5, 0.5), (1.5, 0.5), (1.5, 1.5), (0.5, 1.5)]]) == 1.75
+        assert union_area([square, list(reversed(square))]) == 1
+        assert union_area([square, [(2, 2), (3, 2), (3, 3)]]) == 1.5
+        # concave L and a triangle poking through its notch
+        l_shape = [(0, 0), (2, 0), (2, 1), (1, 1), (1, 2), (0, 2)]
+        assert abs(union_area([l_shape, [(0.5, 1.5), (1.5, 1.5), (1.5, 2.5)]]) - 3.375) < 1e-12
+
+        frame = [(0, 0), (2, 0), (2, 1.5), (0, 1.5)]
+        assert clip_convex([(1, 1), (3, 1), (3, 3), (1, 3)], frame) and \
+            abs(signed_area(clip_convex([(1, 1), (3, 1), (3, 3), (1, 3)], frame)) - 0.5) < 1e-12
+        assert clip_convex([(3, 3), (4, 3), (4, 4)], frame) == []
+
+        # random shadows against a Monte Carlo estimate
+        random.seed(4)
+        backend = PythonClipping()
+        shadows = []
+        for _ in range(6):
+            x, y = random.uniform(-0.5, 2), random.uniform(-0.5, 1.5)
+            shadows.append(backend.make_polygon([(x, y), (x + random.uniform(0.2, 1), y + 0.1),
+                                                 (x + 0.8, y + random.uniform(0.2, 1)), (x - 0.1, y + 0.5)]))
+        t0 = time.time()
+        shaded = backend.area(backend.clip_to_frame(shadows, frame))
+        t1 = time.time()
+
+        def inside(px, py, polygon):
+            result = False
+            x0, y0 = polygon[-1]
+            for x1, y1 in polygon:
+                if (y0 > py) != (y1 > py) and px < x0 + (py - y0) * (x1 - x0) / (y1 - y0):
+                    result = not result
+                x0, y0 = x1, y1
+            return result
+
+        samples = 200000
+        hits = 0
+        for _ in range(samples):
+            px, py = random.uniform(0, 2), random.uniform(0, 1.5)
+            hits += any(inside(px, py, s) for s in shadows)
+        estimate = 3.0 * hits / samples
+        assert abs(shaded - estimate) < 0.02, (shaded, estimate)
+
+        # overhang above a 2 x 1.5 m window, 0.8 m deep, sun straight ahead at 45 degrees: top 0.8 m shaded
+        overhang = [(-1, 1.5, 0), (3, 1.5, 0), (3, 1.5, 0.8), (-1, 1.5, 0.8)]
+        shadow = backend.make_polygon(project_shadow(overhang, 45, 0))
+        assert abs(backend.area(backend.clip_to_frame([shadow], frame)) - 2 * 0.8) < 1e-9
+        print('6 shadows: shaded area %.4f m2 (Monte Carlo %.4f) in %.2f ms' % (shaded, estimate, 1000 * (t1 - t0)))
+
+
+    test()
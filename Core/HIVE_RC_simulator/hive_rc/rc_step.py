@@ -0,0 +1,222 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Closed-form step of the 5R1C model, hourly unless another timestep is given.
+
+solve_building_energy of ElementBuilding and Building searches the heating/cooling demand by solving the node
+temperatures up to four times per hour (no demand, the 0 and 10 W/m2 probes of C.4.2, and the final demand). All node
+temperatures (C.4 - C.11) are affine in the energy demand, so with the conductances and the emission system of a
+zone fixed, the slope of each temperature with respect to the demand is a constant of the zone. ClosedFormStep
+computes these constants once; every hour then needs a single evaluation of the free-floating temperatures, the
+demand follows directly from the air temperature slope, and the final temperatures are a multiply-add away.
+
+The results are written to the zone with the same attribute names as solve_building_energy, so the step can be used
+wherever the zone is, e.g. in simulate().
+"""
+
+from __future__ import division
+
+
+class ClosedFormStep(object):
+    """
+    Single-pass hourly energy demand of an ElementBuilding or Building.
+    Conductances and the emission system of the zone are read once, when the step is created. Set points, power
+    limits and supply systems are read every hour.
+    """
+
+    def __init__(self, zone, timestep=None):
+        """
+        :param zone: ElementBuilding or Building
+        :param timestep: length of a step [s], default zone.timestep (an hour). Gains and demands stay in W
+        """
+        self.zone = zone
+        self.timestep = zone.timestep if timestep is None else timestep
+
+        # (C.6) - (C.8) in [C.3 ISO 13790]
+        self.h_tr_1 = 1.0 / (1.0 / zone.h_ve_adj + 1.0 / zone.h_tr_is)
+        self.h_tr_2 = self.h_tr_1 + zone.h_tr_w
+        self.h_tr_3 = 1.0 / (1.0 / self.h_tr_2 + 1.0 / zone.h_tr_ms)
+        zone.h_tr_1, zone.h_tr_2, zone.h_tr_3 = self.h_tr_1, self.h_tr_2, self.h_tr_3
+
+        # split of the gains to the surface and mass node, (C.2) and (C.3)
+        self.share_st = 1 - (zone.mass_area / zone.A_t) - (zone.h_tr_w / (9.1 * zone.A_t))
+        self.share_m = zone.mass_area / zone.A_t
+
+        # the emission system adds the energy demand to one or more nodes, linearly. Like in calc_heat_flow, the
+        # heating emission system is used for both heating and cooling
+        flows = zone.heating_emission_system(energy_demand=1.0).heat_flows()
+        self.demand_ia = flows.phi_ia_plus
+        self.demand_st = flows.phi_st_plus
+        self.demand_m = flows.phi_m_plus
+        self.heating_supply_temperature = flows.heating_supply_temperature
+        self.cooling_supply_temperature = flows.cooling_supply_temperature
+
+        # increase of t_m_next, t_m, t_s, t_air per W of energy demand
+        self.slopes = self.temperatures(1.0, 0.0, 0.0, 0.0, 0.0)
+
+    def temperatures(self, energy_demand, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Node temperatures for a given energy demand, same as calc_temperatures_crank_nicolson
+        # section C.3 in [C.3 ISO 13790]
+        :return: t_m_next, t_m, t_s, t_air
+        """
+        zone = self.zone
+        h_tr_1, h_tr_2, h_tr_3 = self.h_tr_1, self.h_tr_2, self.h_tr_3
+        h_tr_em, h_tr_w, h_tr_ms = zone.h_tr_em, zone.h_tr_w, zone.h_tr_ms
+        h_tr_is, h_ve_adj = zone.h_tr_is, zone.h_ve_adj
+        t_supply = t_out  # ASSUMPTION: Supply air comes straight from the outside air
+
+        # (C.1) - (C.3)
+        phi_ia = 0.5 * internal_gains + self.demand_ia * energy_demand
+        phi_st = self.share_st * (0.5 * internal_gains + solar_gains) + self.demand_st * energy_demand
+        phi_m = self.share_m * (0.5 * internal_gains + solar_gains) + self.demand_m * energy_demand
+
+        # (C.5), (C.4), (C.9)
+        phi_m_tot = phi_m + h_tr_em * t_out + \
+            h_tr_3 * (phi_st + h_tr_w * t_out + h_tr_1 * ((phi_ia / h_ve_adj) + t_supply)) / h_tr_2
+        c = zone.c_m / self.timestep
+        t_m_next = ((t_m_prev * (c - 0.5 * (h_tr_3 + h_tr_em))) + phi_m_tot) / (c + 0.5 * (h_tr_3 + h_tr_em))
+        t_m = (t_m_next + t_m_prev) / 2.0
+
+        # (C.10), (C.11)
+        t_s = (h_tr_ms * t_m + phi_st + h_tr_w * t_out + h_tr_1 * (t_supply + phi_ia / h_ve_adj)) / \
+            (h_tr_ms + h_tr_w + h_tr_1)
+        t_air = (h_tr_is * t_s + h_ve_adj * t_supply + phi_ia) / (h_tr_is + h_ve_adj)
+        return t_m_next, t_m, t_s, t_air
+
+    def solve_building_energy(self, internal_gains, solar_gains, t_out, t_m_prev):
+        """
+        Same inputs and zone attributes as ElementBuilding.solve_building_energy
+        """
+        zone = self.zone
+        t_m_next, t_m, t_s, t_air = self.temperatures(0.0, internal_gains, solar_gains, t_out, t_m_prev)
+
+        # step 1 in section C.4.2: is heating or cooling needed?
+        zone.has_heating_demand = t_air < zone.t_set_heating
+        zone.has_cooling_demand = not zone.has_heating_demand and t_air > zone.t_set_cooling
+        zone.heating_supply_temperature = self.heating_supply_temperature
+        zone.cooling_supply_temperature = self.cooling_supply_temperature
+
+        if not zone.has_heating_demand and not zone.has_cooling_demand:
+            energy_demand = 0
+            zone.heating_demand = 0
+            zone.cooling_demand = 0
+            zone.heating_sys_electricity = 0
+            zone.heating_sys_fossils = 0
+            zone.cooling_sys_electricity = 0
+            zone.cooling_sys_fossils = 0
+            zone.electricity_out = 0
+        else:
+            # step 2: unrestricted demand to reach the set point (C.13), t_air is affine in the demand
+            t_air_set = zone.t_set_heating if zone.has_heating_demand else zone.t_set_cooling
+            d_t_m_next, d_t_m, d_t_s, d_t_air = self.slopes
+            zone.energy_demand_unrestricted = (t_air_set - t_air) / d_t_air
+
+            # step 3 and 4: limit to the available heating or cooling power
+            if zone.max_cooling_energy <= zone.energy_demand_unrestricted <= zone.max_heating_energy:
+                energy_demand = zone.energy_demand_unrestricted
+                zone.t_air_ac = t_air_set
+            elif zone.energy_demand_unrestricted > zone.max_heating_energy:
+                energy_demand = zone.max_heating_energy
+            else:
+                energy_demand = zone.max_cooling_energy
+
+            t_m_next += d_t_m_next * energy_demand
+            t_m += d_t_m * energy_demand
+            t_s += d_t_s * energy_demand
+            t_air += d_t_air * energy_demand
+
+            if zone.has_heating_demand:
+                supplyOut = zone.heating_supply_system(load=energy_demand,
+                                                       t_out=t_out,
+                                                       heating_supply_temperature=self.heating_supply_temperature,
+                                                       cooling_supply_temperature=self.cooling_supply_temperature,
+                                                       has_heating_demand=True,
+                                                       has_cooling_demand=False).calc_loads()
+                zone.heating_demand = energy_demand
+                zone.heating_sys_electricity = supplyOut.electricity_in
+                zone.heating_sys_fossils = supplyOut.fossils_in
+                zone.cooling_demand = 0
+                zone.cooling_sys_electricity = 0
+                zone.cooling_sys_fossils = 0
+            else:
+                supplyOut = zone.cooling_supply_system(load=energy_demand * (-1),
+                                                       t_out=t_out,
+                                                       heating_supply_temperature=self.heating_supply_temperature,
+                                                       cooling_supply_temperature=self.cooling_supply_temperature,
+                                                       has_heating_demand=False,
+                                                       has_cooling_demand=True).calc_loads()
+                zone.heating_demand = 0
+                zone.heating_sys_electricity = 0
+                zone.heating_sys_fossils = 0
+                zone.cooling_demand = energy_demand
+                zone.cooling_sys_electricity = supplyOut.electricity_in
+                zone.cooling_sys_fossils = supplyOut.fossils_in
+            zone.electricity_out = supplyOut.electricity_out
+            zone.cop = supplyOut.cop
+
+        zone.energy_demand = energy_demand
+        zone.t_m_next, zone.t_m, zone.t_s, zone.t_air = t_m_next, t_m, t_s, t_air
+        zone.t_operative = 0.3 * t_air + 0.7 * t_s
+
+        zone.sys_total_energy = zone.heating_sys_electricity + zone.heating_sys_fossils + \
+            zone.cooling_sys_electricity + zone.cooling_sys_fossils
+        zone.heating_energy = zone.heating_sys_electricity + zone.heating_sys_fossils
+        zone.cooling_energy = zone.cooling_sys_electricity + zone.cooling_sys_fossils
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.rc_step
+    def test():
+        import copy
+        import math
+        import time
+        from .building_physics import Building, ElementBuilding, ThermalZone, Element
+        from .emission_systems import FloorHeating, TABS
+        from .supply_systems import HeatPumpAir, CHP
+
+        hours = range(8760)
+        t_out = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        solar_gains = [max(0.0, 3000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        internal_gains = [300.0 + 200 * (8 <= h % 24 <= 18) for h in hours]
+
+        zones = [Building(), Building(ventilation_efficiency=0.6, heating_supply_system=HeatPumpAir),
+                 Building(heating_emission_system=FloorHeating, cooling_supply_system=HeatPumpAir),
+                 ElementBuilding(ThermalZone(elements=[Element('window', 20.0, 1.1, opaque=False),
+                                                       Element('wall', 30.0, 0.2)],
+                                             heating_supply_system=CHP, heating_emission_system=TABS))]
+        keys = ('t_air', 't_m', 't_operative', 'energy_demand', 'heating_sys_electricity', 'heating_sys_fossils',
+                'cooling_sys_electricity', 'electricity_out')
+        for zone in zones:
+            reference = copy.deepcopy(zone)
+            step = ClosedFormStep(zone)
+            expected, t_m_prev = [], 20.0
+            t0 = time.time()
+            for h in hours:
+                reference.solve_building_energy(internal_gains[h], solar_gains[h], t_out[h], t_m_prev)
+                t_m_prev = reference.t_m_next
+                expected.append([getattr(reference, key) for key in keys])
+            t1 = time.time()
+            t_m_prev = 20.0
+            for h in hours:
+                step.solve_building_energy(internal_gains[h], solar_gains[h], t_out[h], t_m_prev)
+                t_m_prev = zone.t_m_next
+            t2 = time.time()
+            t_m_prev = 20.0
+            for h in hours:
+                step.solve_building_energy(internal_gains[h], solar_gains[h], t_out[h], t_m_prev)
+                t_m_prev = zone.t_m_next
+                for key, b in zip(keys, expected[h]):
+                    a = getattr(zone, key)
+                    assert abs(a - b) <= 1e-9 * max(1.0, abs(b)), (h, key, a, b)
+            print('iterative: %.3fs, closed form: %.3fs' % (t1 - t0, t2 - t1))
+
+
+    test()
@@ -0,0 +1,114 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Shading mask of a window: unshaded area as a function of the relative sun position, sampled on a grid.
+
+The shadow that static context geometry casts on a window only depends on the sun position relative to the window
+(relative altitude and azimuth, facade convention, see solar.relative_sun_positions). Over a year the sun passes
+the same part of the sky many times, so instead of clipping the shadow polygons every sunny hour, ShadingMask
+evaluates the (expensive) unshaded area function on the nodes of a grid over the relative sky hemisphere, once per
+node and only for nodes next to a sun position that actually occurs, and interpolates bilinearly in between.
+With hourly sun positions of a year, a 5 degree grid needs about a tenth of the evaluations (and changes the annual
+unshaded area by a few per mille); sub-hourly timesteps or several years reuse the same nodes.
+
+usage:
+    mask = ShadingMask(window.calc_exact_unshaded_area, resolution=5.0)
+    unshaded_area = mask(relative_sun_alt, relative_sun_az)
+"""
+
+from __future__ import division
+
+import math
+
+# grid nodes are kept this far [deg] from relative azimuths of +-90 and altitudes of +-90, where the sun is parallel
+# to the window plane and shadows cannot be projected onto it
+EDGE_MARGIN = 0.1
+
+
+class ShadingMask(object):
+    """
+    Cache of an unshaded area function f(relative_sun_alt, relative_sun_az) over the relative sky hemisphere
+    """
+
+    def __init__(self, unshaded_area, resolution=5.0):
+        """
+        :param unshaded_area: function of relative sun altitude and azimuth [deg], returning the unshaded area
+        :param resolution: angular distance between grid nodes [deg]. 0 or None evaluates the function at every
+        sun position, i.e. turns the cache off
+        """
+        self.unshaded_area = unshaded_area
+        self.resolution = resolution
+        self.nodes = {}  # (altitude index, azimuth index) -> unshaded area
+        self.evaluations = 0
+
+    def node(self, i, j):
+        if (i, j) not in self.nodes:
+            limit = 90 - EDGE_MARGIN
+            altitude = min(max(i * self.resolution, -limit), limit)
+            azimuth = min(max(j * self.resolution, -limit), limit)
+            self.nodes[(i, j)] = self.unshaded_area(altitude, azimuth)
+            self.evaluations += 1
+        return self.nodes[(i, j)]
+
+    def __call__(self, relative_sun_alt, relative_sun_az):
+        """
+        :return: unshaded area, interpolated between the four grid nodes around the sun position
+        """
+        if not self.resolution:
+            self.evaluations += 1
+            return self.unshaded_area(relative_sun_alt, relative_sun_az)
+
+        x = relative_sun_alt / self.resolution
+        y = relative_sun_az / self.resolution
+        i, j = int(math.floor(x)), int(math.floor(y))
+        u, v = x - i, y - j
+        area = (1 - u) * (1 - v) * self.node(i, j)
+        if u:
+            area += u * (1 - v) * self.node(i + 1, j)
+        if v:
+            area += (1 - u) * v * self.node(i, j + 1)
+        if u and v:
+            area += u * v * self.node(i + 1, j + 1)
+        return area
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.shading
+    def test():
+        from .solar import sun_table, relative_sun_positions
+
+        # overhang of depth d over a window of height h: shaded height d * tan(profile angle)
+        window_width, window_height, overhang_depth = 2.0, 1.5, 0.8
+
+        def unshaded_area(relative_sun_alt, relative_sun_az):
+            profile = math.atan(math.tan(math.radians(relative_sun_alt)) / math.cos(math.radians(relative_sun_az)))
+            shaded_height = min(window_height, overhang_depth * math.tan(profile))
+            return window_width * (window_height - max(0.0, shaded_height))
+
+        table = sun_table(47.37, 8.55, 1, 2015)
+        relative_alt, relative_az = relative_sun_positions(table, math.radians(0), math.radians(90))
+        sunny = [(alt, az) for sun_alt, alt, az in zip(table.altitude, relative_alt, relative_az)
+                 if sun_alt > 0 and abs(az) < 90]
+
+        mask = ShadingMask(unshaded_area)
+        errors = [abs(mask(alt, az) - unshaded_area(alt, az)) for alt, az in sunny]
+        mean_area = sum(unshaded_area(alt, az) for alt, az in sunny) / len(sunny)
+        assert sum(errors) / len(errors) < 0.01 * mean_area, sum(errors) / len(errors)
+        assert mask.evaluations == len(mask.nodes) < len(sunny) / 8
+
+        exact = ShadingMask(unshaded_area, resolution=0)
+        assert all(exact(alt, az) == unshaded_area(alt, az) for alt, az in sunny[:100])
+        # on a node, the cached value is exact
+        assert mask(10.0, 20.0) == unshaded_area(10.0, 20.0)
+        print('%i sunny hours, %i grid nodes evaluated, mean abs. error %.4f m2'
+              % (len(sunny), mask.evaluations, sum(errors) / len(errors)))
+
+
+    test()
@@ -0,0 +1,81 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Runs an RC model over a series of hours, e.g. a whole year. This is the loop of the simulateMultipleTimeSteps
+component, usable without Rhino/Grasshopper:
+
+    from hive_rc import Building, simulate
+    results = simulate(Building(), t_out, internal_gains, solar_gains)
+    heating = sum(results['heating_demand'])
+
+Results go to a sink (see sinks.py): lists by default, or arrays, or a .csv file.
+"""
+
+from __future__ import division
+
+import operator
+
+from .rc_step import ClosedFormStep
+from .sinks import ListSink
+
+# hourly results, names of the RC model attributes they are read from
+RESULTS = ('t_air', 't_operative', 't_m', 'lighting_demand', 'energy_demand', 'heating_demand', 'cooling_demand',
+           'heating_sys_electricity', 'heating_sys_fossils', 'cooling_sys_electricity', 'cooling_sys_fossils',
+           'electricity_out')
+
+
+def recorder(sink, names, horizon):
+    """
+    Starts a sink (default ListSink) for results read from zone attributes
+    :return: sink, function writing the results of a zone to the sink
+    """
+    sink = ListSink() if sink is None else sink
+    sink.start(names, horizon)
+    write = sink.write
+    if len(sink.names) > 1:
+        row = operator.attrgetter(*sink.names)
+    else:
+        name = sink.names[0]
+        row = lambda zone: (getattr(zone, name),)
+    return sink, lambda zone: write(row(zone))
+
+
+def simulate(zone, t_out, internal_gains=None, solar_gains=None, illuminance=None, occupancy=None, t_m_init=20.0,
+             closed_form=True, sink=None):
+    """
+    Solves energy and lighting demand of an RC model hour by hour, passing on the mass temperature
+    :param zone: ElementBuilding or Building
+    :param t_out: outdoor air temperature per hour [C]
+    :param internal_gains: internal gains per hour [W], None for no internal gains
+    :param solar_gains: solar gains per hour [W], None for no solar gains
+    :param illuminance: illuminance through the windows per hour [Lumens], None for none
+    :param occupancy: occupancy per hour, None for an unoccupied zone
+    :param t_m_init: mass temperature before the first hour [C]
+    :param closed_form: use ClosedFormStep (same results, several times faster) instead of zone.solve_building_energy
+    :param sink: where the hourly results go, default ListSink(). See sinks.py
+    :return: what sink.finish() returns, by default a dict with one list per name in RESULTS, one value per hour
+    """
+    horizon = len(t_out)
+    no_values = [0] * horizon
+    internal_gains = internal_gains or no_values
+    solar_gains = solar_gains or no_values
+    illuminance = illuminance or no_values
+    occupancy = occupancy or no_values
+
+    sink, record = recorder(sink, RESULTS, horizon)
+    solve_building_energy = ClosedFormStep(zone).solve_building_energy if closed_form else zone.solve_building_energy
+    t_m_prev = t_m_init
+    for hour in range(horizon):
+        solve_building_energy(internal_gains[hour], solar_gains[hour], t_out[hour], t_m_prev)
+        zone.solve_building_lighting(illuminance[hour], occupancy[hour])
+        # mass temperature at the end of this hour is the start of the next one
+        t_m_prev = zone.t_m_next
+        record(zone)
+    return sink.finish()
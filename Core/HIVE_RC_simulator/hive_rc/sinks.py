@@ -0,0 +1,244 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Result sinks for simulate(): where the hourly results go while the RC model runs.
+
+A sink has three methods:
+
+    start(names, horizon)   called once before the first hour, with the result names (see simulation.RESULTS)
+    write(row)              called once per hour with a tuple of values, in the order of sink.names
+    finish()                called after the last hour, its return value is returned by simulate()
+
+ListSink keeps a list per result (the default of simulate). ArraySink writes into preallocated array('d') columns,
+8 bytes per value instead of a float object and a list slot, which matters for multi-zone and multi-year runs.
+CsvSink streams the rows to a .csv file in chunks, so results of long runs never have to be in memory at once and
+can be read by any other tool. AggregateSink only keeps sums and extremes, e.g. for long multi-year runs, and TeeSink
+passes the rows on to several sinks. All sinks can be restricted to some of the results with names=[...].
+
+usage:
+    results = simulate(zone, t_out, internal_gains, solar_gains, sink=ArraySink())
+    simulate(zone, t_out, internal_gains, solar_gains, sink=CsvSink('results.csv', names=['t_air', 'heating_demand']))
+"""
+
+from __future__ import division
+
+import array
+import csv
+
+
+class ListSink(object):
+    """
+    Results as dict of name: list
+    """
+
+    def __init__(self, names=None):
+        self.names = names
+
+    def start(self, names, horizon):
+        self.names = tuple(self.names or names)
+        self.columns = [[] for _ in self.names]
+
+    def write(self, row):
+        for column, value in zip(self.columns, row):
+            column.append(value)
+
+    def finish(self):
+        return dict(zip(self.names, self.columns))
+
+
+class ArraySink(object):
+    """
+    Results as dict of name: array('d'), allocated once for the whole horizon (and grown if more rows come, e.g.
+    from substeps.simulate_adaptive)
+    """
+
+    def __init__(self, names=None):
+        self.names = names
+
+    def start(self, names, horizon):
+        self.names = tuple(self.names or names)
+        self.columns = [array.array('d', [0.0]) * horizon for _ in self.names]
+        self.size = horizon
+        self.row = 0
+
+    def write(self, row):
+        i = self.row
+        if i == self.size:
+            grow = max(i, 1)
+            for column in self.columns:
+                column.extend(array.array('d', [0.0]) * grow)
+            self.size += grow
+        for column, value in zip(self.columns, row):
+            column[i] = value
+        self.row = i + 1
+
+    def finish(self):
+        for column in self.columns:
+            del column[self.row:]
+        return dict(zip(self.names, self.columns))
+
+
+class CsvSink(object):
+    """
+    Results written to a .csv file with a header row and one row per hour
+    """
+
+    def __init__(self, path, names=None, chunk_rows=744):
+        """
+        :param path: .csv file, overwritten
+        :param names: results to write, default all
+        :param chunk_rows: rows kept in memory before they are written, 744 = one month of hours
+        """
+        self.path = path
+        self.names = names
+        self.chunk_rows = chunk_rows
+
+    def start(self, names, horizon):
+        self.names = tuple(self.names or names)
+        # csv wants binary files on Python 2 and text files without newline translation on Python 3
+        try:
+            self.file = open(self.path, 'w', newline='')
+        except TypeError:
+            self.file = open(self.path, 'wb')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.names)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk_rows:
+            self.writer.writerows(self.rows)
+            self.rows = []
+
+    def finish(self):
+        """
+        :return: path of the .csv file
+        """
+        self.writer.writerows(self.rows)
+        self.rows = []
+        self.file.close()
+        return self.path
+
+
+class AggregateSink(object):
+    """
+    Sum, mean, minimum and maximum of every result, without keeping the hourly values. Sums of powers [W] over
+    hourly rows are energies [Wh]
+    """
+
+    def __init__(self, names=None):
+        self.names = names
+
+    def start(self, names, horizon):
+        self.names = tuple(self.names or names)
+        self.sums = [0.0] * len(self.names)
+        self.minima = [float('inf')] * len(self.names)
+        self.maxima = [float('-inf')] * len(self.names)
+        self.rows = 0
+
+    def write(self, row):
+        sums, minima, maxima = self.sums, self.minima, self.maxima
+        for i, value in enumerate(row):
+            sums[i] += value
+            if value < minima[i]:
+                minima[i] = value
+            if value > maxima[i]:
+                maxima[i] = value
+        self.rows += 1
+
+    def finish(self):
+        """
+        :return: dict of name: dict with 'sum', 'mean', 'min' and 'max'
+        """
+        rows = max(self.rows, 1)
+        return dict((name, {'sum': total, 'mean': total / rows, 'min': minimum, 'max': maximum})
+                    for name, total, minimum, maximum in zip(self.names, self.sums, self.minima, self.maxima))
+
+
+class TeeSink(object):
+    """
+    Writes the same rows to several sinks, e.g. aggregates and a .csv file
+    """
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+        self.names = None
+
+    def start(self, names, horizon):
+        # all sinks get all rows, each picks its own results
+        self.names = tuple(names)
+        self.picks = []
+        for sink in self.sinks:
+            sink.start(names, horizon)
+            self.picks.append([self.names.index(name) for name in sink.names])
+
+    def write(self, row):
+        for sink, pick in zip(self.sinks, self.picks):
+            sink.write([row[i] for i in pick])
+
+    def finish(self):
+        """
+        :return: list with the results of each sink
+        """
+        return [sink.finish() for sink in self.sinks]
+
+
+def read_csv(path):
+    """
+    Reads the results of a CsvSink
+    :return: dict of name: list of floats
+    """
+    with open(path) as f:
+        reader = csv.reader(f)
+        names = next(reader)
+        columns = [[] for _ in names]
+        for row in reader:
+            for column, value in zip(columns, row):
+                column.append(float(value))
+    return dict(zip(names, columns))
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.sinks
+    def test():
+        import math
+        import os
+        import shutil
+        import tempfile
+        import time
+        from .building_physics import Building
+        from .simulation import simulate, RESULTS
+
+        hours = range(8760)
+        t_out = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        solar_gains = [max(0.0, 2000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+
+        t0 = time.time()
+        lists = simulate(Building(), t_out, None, solar_gains)
+        t1 = time.time()
+        arrays = simulate(Building(), t_out, None, solar_gains, sink=ArraySink())
+        t2 = time.time()
+        assert sorted(lists) == sorted(arrays) == sorted(RESULTS)
+        for name in RESULTS:
+            assert list(arrays[name]) == [float(v) for v in lists[name]], name
+
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'results.csv')
+            assert simulate(Building(), t_out, None, solar_gains, sink=CsvSink(path, names=['t_air'])) == path
+            written = read_csv(path)
+            assert list(written) == ['t_air'] and len(written['t_air']) == 8760
+            assert all(abs(a - b) < 1e-9 for a, b in zip(written['t_air'], lists['t_air']))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        print('lists: %.3fs, arrays: %.3fs' % (t1 - t0, t2 - t1))
+
+
+    test()
@@ -0,0 +1,222 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Sun positions for every timestep of a year, computed once per location and year.
+
+sun_position() is the scalar formula of RelativeSun.calc_sun_position (credits: Prageeth Jayathissa, Joan Domenech
+Masferrer, source http://www.pveducation.org/pvcdrom/properties-of-sunlight/declination-angle). sun_table() evaluates
+it for all timesteps of a year in one pass: equation of time and declination only change once a day, the hour angle
+only depends on the time of day, so their trigonometry is done 365 and 24 (x steps per hour) times instead of once
+per timestep. Tables are cached by (latitude, longitude, utc_offset, year, steps_per_hour), so all windows of all
+zones at a location share one table and only rotate it into their own facade convention (relative_sun_positions).
+
+Timestep i of a table ends at HOY (i + 1) / steps_per_hour, i.e. for hourly tables the entry of HOY h is [h - 1].
+"""
+
+from __future__ import division
+
+import array
+import math
+
+# tables already computed by this process, keyed by (latitude, longitude, utc_offset, year, steps_per_hour)
+_tables = {}
+
+
+def _is_leap_year(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _day_terms(day_of_year, longitude_deg, utc_offset):
+    # time correction [minutes] and declination [rad] of a day
+    b_factor = (day_of_year - 1) * ((2 * math.pi) / 365)
+    equation_of_time = 229.2 * 0.000075 + 229.2 * (0.001868 * math.cos(b_factor) - 0.032077 * math.sin(b_factor)) - \
+        229.2 * (0.014615 * math.cos(2 * b_factor) + 0.04089 * math.sin(2 * b_factor))
+    standard_time = 15 * utc_offset  # Local Standard Time Meridian (Earth rotation 15 degrees/h)
+    time_correction = 4 * (longitude_deg - standard_time) + equation_of_time
+    declination_rad = math.radians(23.45 * math.sin((2 * math.pi / 365.0) * (day_of_year - 81)))
+    return time_correction, declination_rad
+
+
+def _altitude_azimuth(sin_lat, cos_lat, sin_dec, cos_dec, hour_angle_rad):
+    sun_alt_rad = math.asin(cos_lat * cos_dec * math.cos(hour_angle_rad) + sin_lat * sin_dec)
+    cos_az = (sin_dec * cos_lat - cos_dec * sin_lat * math.cos(hour_angle_rad)) / math.cos(sun_alt_rad)
+    sun_az_rad = math.acos(min(1.0, max(-1.0, cos_az)))
+    # Range azimuth [0, 360) degrees
+    if hour_angle_rad > 0 or hour_angle_rad < - math.pi:
+        sun_az_rad = math.pi * 2 - sun_az_rad
+    return math.degrees(sun_alt_rad), math.degrees(sun_az_rad)
+
+
+def _split_hoy(hoy, year):
+    # day of the year (1-based) and hour of the day of the time hoy hours after the start of the year, as datetime
+    # would give it (HOY 8760 of a normal year is Jan 1 of the next year, 00:00)
+    whole_minutes = int(round(hoy * 60.0, 6))
+    day, minute_of_day = divmod(whole_minutes, 24 * 60)
+    day_of_year = day % (366 if _is_leap_year(year) else 365) + 1
+    return day_of_year, minute_of_day / 60.0
+
+
+def sun_position(latitude_deg, longitude_deg, utc_offset, year, hoy):
+    """
+    Sun position for a specific hour of the year and location, according to traditional convention
+    :param latitude_deg: Local Latitude [Degrees]. North+, South-.
+    :param longitude_deg: Local Longitude [Degrees]. East+, West-.
+    :param utc_offset: Time zone offset i.r. to Prime Meridian [hours]
+    :param year: year
+    :param hoy: Hour of the year from the start. The first hour of January is 1
+    :return: altitude, azimuth: Sun altitude and azimuth [Degrees] (Traditional convention)
+    """
+    day_of_year, hour_of_day = _split_hoy(hoy, year)
+    time_correction, declination_rad = _day_terms(day_of_year, longitude_deg, utc_offset)
+    # Local Solar Time (in hours) = Local Time + TC (in hours), as an angle
+    solar_time = hour_of_day + time_correction / 60.0
+    hour_angle_rad = (math.pi * 2 / 24) * (solar_time - 12)
+    latitude_rad = math.radians(latitude_deg)
+    return _altitude_azimuth(math.sin(latitude_rad), math.cos(latitude_rad), math.sin(declination_rad),
+                             math.cos(declination_rad), hour_angle_rad)
+
+
+class SunTable(object):
+    """
+    Sun altitude and azimuth [Degrees] (traditional convention) for every timestep of a year, as array('d')
+    """
+
+    def __init__(self, latitude_deg, longitude_deg, utc_offset, year, steps_per_hour=1):
+        self.latitude_deg = latitude_deg
+        self.longitude_deg = longitude_deg
+        self.utc_offset = utc_offset
+        self.year = year
+        self.steps_per_hour = steps_per_hour
+
+        days = 366 if _is_leap_year(year) else 365
+        steps_per_day = 24 * steps_per_hour
+        latitude_rad = math.radians(latitude_deg)
+        sin_lat, cos_lat = math.sin(latitude_rad), math.cos(latitude_rad)
+        hours_of_day = [_split_hoy((i + 1) / steps_per_hour, year)[1] for i in range(steps_per_day)]
+
+        self.altitude = array.array('d', [0.0] * (days * steps_per_day))
+        self.azimuth = array.array('d', [0.0] * (days * steps_per_day))
+        for day in range(days):
+            # the last step of a day belongs to 00:00 of the next day
+            i = day * steps_per_day
+            for day_of_year, steps in (((day % days) + 1, range(steps_per_day - 1)),
+                                       (((day + 1) % days) + 1, [steps_per_day - 1])):
+                time_correction, declination_rad = _day_terms(day_of_year, longitude_deg, utc_offset)
+                sin_dec, cos_dec = math.sin(declination_rad), math.cos(declination_rad)
+                for step in steps:
+                    hour_angle_rad = (math.pi * 2 / 24) * (hours_of_day[step] + time_correction / 60.0 - 12)
+                    self.altitude[i + step], self.azimuth[i + step] = \
+                        _altitude_azimuth(sin_lat, cos_lat, sin_dec, cos_dec, hour_angle_rad)
+
+    def __len__(self):
+        return len(self.altitude)
+
+    def index(self, hoy):
+        """
+        :param hoy: Hour of the year, 1 for the first hour of January, a multiple of 1 / steps_per_hour
+        :return: index of hoy in altitude and azimuth
+        """
+        return int(round(hoy * self.steps_per_hour)) - 1
+
+    def position(self, hoy):
+        """
+        :return: altitude, azimuth at hoy, same as sun_position
+        """
+        i = self.index(hoy)
+        return self.altitude[i], self.azimuth[i]
+
+
+def sun_table(latitude_deg, longitude_deg, utc_offset, year, steps_per_hour=1):
+    """
+    Sun positions of a year at a location, computed on first use and cached for the lifetime of the process
+    :return: SunTable
+    """
+    key = (float(latitude_deg), float(longitude_deg), float(utc_offset), int(year), int(steps_per_hour))
+    if key not in _tables:
+        _tables[key] = SunTable(*key)
+    return _tables[key]
+
+
+def relative_sun_positions(table, window_azimuth_rad, window_altitude_rad):
+    """
+    Sun position relative to a glazed surface, for every timestep of a table. Same as
+    RelativeSun.calc_relative_altitude and calc_relative_azimuth.
+    - Facade convention:
+        Sun azimuth: Zero is coincident with the normal to glazed surface. From there, it ranges clockwise and counter
+        clockwise till 180, i.e. [-180, 180) relative degrees.
+    :param table: SunTable
+    :param window_azimuth_rad: azimuth of the window [rad]
+    :param window_altitude_rad: altitude of the window [rad]
+    :return: relative_sun_alt, relative_sun_az: array('d') each [Degrees] (Facade convention)
+    """
+    alt_offset = math.degrees(window_altitude_rad) - 90
+    az_offset = 180 + math.degrees(window_azimuth_rad)
+    relative_sun_alt = array.array('d', [alt + alt_offset for alt in table.altitude])
+    relative_sun_az = array.array('d', [az_offset - az if az_offset - az >= -180 else az_offset - az + 360
+                                        for az in table.azimuth])
+    return relative_sun_alt, relative_sun_az
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.solar
+    def test():
+        import datetime
+        import time
+
+        def reference(latitude_deg, longitude_deg, utc_offset, year, hoy):
+            # RelativeSun.calc_sun_position
+            utc_datetime = datetime.datetime(year, 1, 1) + datetime.timedelta(hours=float(hoy))
+            day_of_year = utc_datetime.timetuple().tm_yday
+            b_factor = (day_of_year - 1) * ((2 * math.pi) / 365)
+            equation_of_time = 229.2 * 0.000075 + 229.2 * (0.001868 * math.cos(b_factor) - 0.032077 *
+                                                           math.sin(b_factor)) - \
+                229.2 * (0.014615 * math.cos(2 * b_factor) + 0.04089 * math.sin(2 * b_factor))
+            time_correction = 4 * (longitude_deg - 15 * utc_offset) + equation_of_time
+            solar_time = utc_datetime.hour + (utc_datetime.minute + time_correction) / 60.0
+            hour_angle_rad = (math.pi * 2 / 24) * (solar_time - 12)
+            declination_rad = math.radians(23.45 * math.sin((2 * math.pi / 365.0) * (day_of_year - 81)))
+            latitude_rad = math.radians(latitude_deg)
+            sun_alt_rad = math.asin(math.cos(latitude_rad) * math.cos(declination_rad) * math.cos(hour_angle_rad) +
+                                    math.sin(latitude_rad) * math.sin(declination_rad))
+            sun_az_rad = math.acos((math.sin(declination_rad) * math.cos(latitude_rad) - math.cos(declination_rad) *
+                                    math.sin(latitude_rad) * math.cos(hour_angle_rad)) / math.cos(sun_alt_rad))
+            if hour_angle_rad > 0 or hour_angle_rad < - math.pi:
+                sun_az_rad = math.pi * 2 - sun_az_rad
+            return math.degrees(sun_alt_rad), math.degrees(sun_az_rad)
+
+        for location in [(47.37, 8.55, 1, 2015), (1.37, 103.98, 8, 2016), (-33.9, 18.6, 2, 2017)]:
+            t0 = time.time()
+            table = sun_table(*location)
+            t1 = time.time()
+            expected = [reference(*(location + (hoy,))) for hoy in range(1, 8761)]
+            t2 = time.time()
+            assert sun_table(*location) is table
+            for hoy in range(1, 8761):
+                for a, b in zip(table.position(hoy), expected[hoy - 1]):
+                    assert abs(a - b) < 1e-9, (location, hoy, a, b)
+                assert table.position(hoy) == sun_position(*(location + (hoy,)))
+            print('%s: table %.3fs, per hour %.3fs' % (location, t1 - t0, t2 - t1))
+
+        quarter_hourly = sun_table(47.37, 8.55, 1, 2015, steps_per_hour=4)
+        for hoy in (0.25, 100.5, 4000.75, 8760):
+            for a, b in zip(quarter_hourly.position(hoy), reference(47.37, 8.55, 1, 2015, hoy)):
+                assert abs(a - b) < 1e-9, (hoy, a, b)
+
+        window_azimuth_rad, window_altitude_rad = math.radians(200), math.radians(90)
+        relative_alt, relative_az = relative_sun_positions(table, window_azimuth_rad, window_altitude_rad)
+        for hoy in range(1, 8761, 7):
+            sun_alt, sun_az = table.position(hoy)
+            az = 180 - sun_az + math.degrees(window_azimuth_rad)
+            az = az + 360 if az < -180 else az
+            assert abs(relative_az[hoy - 1] - az) < 1e-9
+            assert abs(relative_alt[hoy - 1] - (sun_alt - 90 + math.degrees(window_altitude_rad))) < 1e-9
+
+
+    test()
@@ -0,0 +1,190 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Sub-hourly simulation with hourly inputs, e.g. 15 or 5 minute steps for heat pump cycling studies.
+
+simulate_substeps splits every hour into steps_per_hour steps. The outdoor temperature is interpolated linearly
+between the hourly values (taken as the values in the middle of each hour), gains, illuminance and occupancy are
+hourly averages and stay constant within the hour.
+
+simulate_adaptive only splits the hours where the resolution matters: hours in which heating or cooling switches
+on or off (the set point is crossed) and hours with a large change of the gains. All other hours are solved with
+a single step, so a year costs a little more than the hourly simulation instead of steps_per_hour times as much.
+
+Both write one row per step to the sink, with the zone results of RESULTS preceded by
+    time        start of the step [h] from the beginning of the simulation
+    duration    length of the step [s]
+Heating, cooling and lighting demands are powers [W], averaged over the step; the energy of a step is
+demand * duration / 3600 [Wh].
+
+usage:
+    results = simulate_adaptive(zone, t_out, internal_gains, solar_gains, max_steps_per_hour=12)
+    heating_wh = sum(q * dt for q, dt in zip(results['heating_demand'], results['duration'])) / 3600
+"""
+
+from __future__ import division
+
+import math
+
+from .rc_step import ClosedFormStep
+from .simulation import RESULTS, recorder
+
+STEP_RESULTS = ('time', 'duration') + RESULTS
+
+
+def interpolate(hourly, hour, fraction):
+    """
+    Linear interpolation of hourly values, each valid in the middle of its hour
+    :param hourly: hourly values
+    :param hour: index of the hour
+    :param fraction: position within the hour, 0 to 1
+    :return: value at hour + fraction
+    """
+    position = hour + fraction - 0.5
+    i = int(math.floor(position))
+    if i < 0:
+        return hourly[0]
+    if i >= len(hourly) - 1:
+        return hourly[-1]
+    weight = position - i
+    return hourly[i] * (1 - weight) + hourly[i + 1] * weight
+
+
+def _hours(t_out, internal_gains, solar_gains, illuminance, occupancy):
+    no_values = [0] * len(t_out)
+    return internal_gains or no_values, solar_gains or no_values, illuminance or no_values, occupancy or no_values
+
+
+def _substeps(zone, step, steps_per_hour, hour, t_out, internal_gains, solar_gains, illuminance, occupancy,
+              t_m_prev, record):
+    duration = 3600.0 / steps_per_hour
+    for k in range(steps_per_hour):
+        step.solve_building_energy(internal_gains, solar_gains, interpolate(t_out, hour, (k + 0.5) / steps_per_hour),
+                                   t_m_prev)
+        zone.solve_building_lighting(illuminance, occupancy)
+        t_m_prev = zone.t_m_next
+        zone.time, zone.duration = hour + k / steps_per_hour, duration
+        record(zone)
+    return t_m_prev
+
+
+def simulate_substeps(zone, t_out, internal_gains=None, solar_gains=None, illuminance=None, occupancy=None,
+                      t_m_init=20.0, steps_per_hour=4, sink=None):
+    """
+    Like simulation.simulate, with every hour split into steps_per_hour steps
+    :param t_out: outdoor air temperature per hour [C]
+    :param steps_per_hour: e.g. 4 for 15 minute steps, 12 for 5 minute steps
+    :return: what sink.finish() returns, by default a dict with one list per name in STEP_RESULTS, one value per step
+    """
+    horizon = len(t_out)
+    internal_gains, solar_gains, illuminance, occupancy = _hours(t_out, internal_gains, solar_gains, illuminance,
+                                                                 occupancy)
+    sink, record = recorder(sink, STEP_RESULTS, horizon * steps_per_hour)
+    step = ClosedFormStep(zone, 3600.0 / steps_per_hour)
+    t_m_prev = t_m_init
+    for hour in range(horizon):
+        t_m_prev = _substeps(zone, step, steps_per_hour, hour, t_out, internal_gains[hour], solar_gains[hour],
+                             illuminance[hour], occupancy[hour], t_m_prev, record)
+    return sink.finish()
+
+
+def _mode(zone):
+    return 1 if zone.has_heating_demand else -1 if zone.has_cooling_demand else 0
+
+
+def simulate_adaptive(zone, t_out, internal_gains=None, solar_gains=None, illuminance=None, occupancy=None,
+                      t_m_init=20.0, max_steps_per_hour=12, gain_change=10.0, sink=None):
+    """
+    Like simulate_substeps, but only hours around set point crossings and large gain changes are split
+    :param max_steps_per_hour: steps of a split hour
+    :param gain_change: change of internal plus solar gains from one hour to the next [W/m2 floor area] above
+    which the hour is split
+    :return: what sink.finish() returns, by default a dict with one list per name in STEP_RESULTS, one value per step
+    """
+    horizon = len(t_out)
+    internal_gains, solar_gains, illuminance, occupancy = _hours(t_out, internal_gains, solar_gains, illuminance,
+                                                                 occupancy)
+    sink, record = recorder(sink, STEP_RESULTS, horizon)
+    hourly = ClosedFormStep(zone, 3600.0)
+    fine = ClosedFormStep(zone, 3600.0 / max_steps_per_hour)
+    max_gain_change = gain_change * zone.floor_area
+
+    t_m_prev = t_m_init
+    mode = None
+    gains_prev = internal_gains[0] + solar_gains[0]
+    for hour in range(horizon):
+        gains = internal_gains[hour] + solar_gains[hour]
+        split = abs(gains - gains_prev) > max_gain_change
+        gains_prev = gains
+        if not split:
+            hourly.solve_building_energy(internal_gains[hour], solar_gains[hour], t_out[hour], t_m_prev)
+            # heating or cooling switched on or off during the hour
+            split = mode is not None and _mode(zone) != mode
+        if split:
+            t_m_prev = _substeps(zone, fine, max_steps_per_hour, hour, t_out, internal_gains[hour],
+                                 solar_gains[hour], illuminance[hour], occupancy[hour], t_m_prev, record)
+        else:
+            zone.solve_building_lighting(illuminance[hour], occupancy[hour])
+            t_m_prev = zone.t_m_next
+            zone.time, zone.duration = hour, 3600.0
+            record(zone)
+        mode = _mode(zone)
+    return sink.finish()
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.substeps
+    def test():
+        import time
+        from .building_physics import Building
+        from .simulation import simulate
+        from .sinks import ArraySink
+
+        hours = range(8760)
+        t_out = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        solar_gains = [max(0.0, 3000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        internal_gains = [300.0 + 200 * (8 <= h % 24 <= 18) for h in hours]
+
+        def energy(results, name):
+            return sum(q * dt for q, dt in zip(results[name], results['duration'])) / 3600
+
+        # one step per hour is the hourly simulation
+        hourly = simulate(Building(), t_out, internal_gains, solar_gains)
+        single = simulate_substeps(Building(), t_out, internal_gains, solar_gains, steps_per_hour=1,
+                                   sink=ArraySink())
+        for name in RESULTS:
+            assert all(abs(a - b) < 1e-9 for a, b in zip(single[name], hourly[name])), name
+
+        t0 = time.time()
+        reference = simulate_substeps(Building(), t_out, internal_gains, solar_gains, steps_per_hour=12)
+        t1 = time.time()
+        adaptive = simulate_adaptive(Building(), t_out, internal_gains, solar_gains, max_steps_per_hour=12)
+        t2 = time.time()
+        assert abs(sum(adaptive['duration']) - 8760 * 3600) < 1e-3
+        assert len(adaptive['time']) < len(reference['time']) / 2
+
+        # in the split hours, the adaptive steps follow the 5 minute simulation much closer than the hourly one
+        steps = dict((int(round(t * 12)), i) for i, t in enumerate(reference['time']))
+        errors_adaptive, errors_hourly = [], []
+        for i, (t, duration) in enumerate(zip(adaptive['time'], adaptive['duration'])):
+            if duration < 3600:
+                j = steps[int(round(t * 12))]
+                errors_adaptive.append(abs(adaptive['energy_demand'][i] - reference['energy_demand'][j]))
+                errors_hourly.append(abs(hourly['energy_demand'][int(t)] - reference['energy_demand'][j]))
+        assert errors_adaptive and sum(errors_adaptive) < 0.1 * sum(errors_hourly)
+        assert abs(energy(adaptive, 'heating_demand') - energy(reference, 'heating_demand')) < \
+            0.001 * energy(reference, 'heating_demand')
+        print('5 minute steps: %i steps in %.2fs, adaptive: %i steps in %.2fs, mean error of the demand in split '
+              'hours %.2f W (hourly: %.2f W)'
+              % (len(reference['time']), t1 - t0, len(adaptive['time']), t2 - t1,
+                 sum(errors_adaptive) / len(errors_adaptive), sum(errors_hourly) / len(errors_hourly)))
+
+
+    test()
@@ -0,0 +1,196 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Parametric sweeps: annual simulations of many variants of a zone, spread over all cores of a machine.
+
+A variant is a dict of keyword arguments of the zone factory. The default, element_building, passes them to
+ThermalZone (and the lighting parameters to ElementBuilding), e.g. {'ach_vent': 1.0, 'heating_supply_system':
+HeatPumpAir, 'heating_emission_system': FloorHeating}; zone_factory=Building sweeps the legacy Building arguments
+such as u_walls. grid() builds the full factorial of some parameter values, any other list of dicts (e.g. a random
+or Latin hypercube sample) works as well.
+
+The weather file is parsed once, into the binary cache of epw_cache.py (Core/epw_reader, has to be importable).
+Every worker process memory-maps that cache file, so the weather is shared read-only through the OS page cache
+instead of being parsed or pickled per worker or per variant. Schedules (gains, illuminance, occupancy) are sent
+to each worker once, when it starts. Results come back as variants finish, not in order.
+
+usage:
+    variants = grid(ach_vent=[0.5, 1.0, 1.5], heating_supply_system=[HeatPumpAir, CHP],
+                    heating_emission_system=[NewRadiators, FloorHeating])
+    for index, variant, results in sweep(variants, 'Zurich.epw', internal_gains, solar_gains):
+        print(variant, results['heating_demand'])
+"""
+
+from __future__ import division
+
+import itertools
+
+from .building_physics import Building, ElementBuilding, ThermalZone
+from .simulation import simulate
+
+# per worker process: zone factory, weather and schedules, set by _init_worker
+_worker = {}
+
+LIGHTING_PARAMETERS = ('lighting_load', 'lighting_control', 'lighting_utilisation_factor',
+                       'lighting_maintenance_factor')
+
+
+def element_building(**variant):
+    """
+    Default zone factory of sweep: ElementBuilding(zone=ThermalZone(...))
+    :param variant: keyword arguments of ThermalZone, e.g. elements, ach_vent, t_set_heating, heating_supply_system
+    or heating_emission_system, and of ElementBuilding (LIGHTING_PARAMETERS)
+    :return: ElementBuilding
+    """
+    lighting = dict((name, variant.pop(name)) for name in LIGHTING_PARAMETERS if name in variant)
+    return ElementBuilding(zone=ThermalZone(**variant), **lighting)
+
+
+def grid(**axes):
+    """
+    Full factorial of parameter values
+    :param axes: parameter name = list of values, e.g. u_walls=[0.1, 0.2], t_set_heating=[19, 20, 21]
+    :return: list of dicts, one per combination. The last parameter (in alphabetical order) changes fastest
+    """
+    names = sorted(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*[axes[name] for name in names])]
+
+
+def _init_worker(epw_path, cache_dir, zone_factory, schedules, outputs, annual):
+    import epw_cache
+    t_out = list(epw_cache.load(epw_path, cache_dir)['drybulb'])
+    _worker.update(t_out=t_out, zone_factory=zone_factory, schedules=schedules, outputs=outputs, annual=annual)
+
+
+def _run_variant(task):
+    index, variant = task
+    zone = _worker['zone_factory'](**variant)
+    results = simulate(zone, _worker['t_out'], **_worker['schedules'])
+    if _worker['annual']:
+        return index, dict((name, sum(results[name])) for name in _worker['outputs'])
+    return index, dict((name, results[name]) for name in _worker['outputs'])
+
+
+def sweep(variants, epw_path, internal_gains=None, solar_gains=None, illuminance=None, occupancy=None,
+          zone_factory=element_building, outputs=('heating_demand', 'cooling_demand', 'lighting_demand'),
+          annual=True, processes=None, chunksize=None, cache_dir=None):
+    """
+    Simulates every variant over the hours of a weather file, in parallel
+    :param variants: list of dicts with keyword arguments for zone_factory, see grid()
+    :param epw_path: path to the .epw file, its dry bulb temperature is the outdoor temperature
+    :param internal_gains: internal gains per hour [W], the same for all variants, None for no internal gains
+    :param solar_gains: solar gains per hour [W], the same for all variants, None for no solar gains
+    :param illuminance: illuminance through the windows per hour [Lumens], None for none
+    :param occupancy: occupancy per hour, None for an unoccupied zone
+    :param zone_factory: class or module level function creating the zone of a variant, element_building or e.g. Building. Factory and
+    parameter values are pickled, so lambdas or local functions don't work
+    :param outputs: names of the hourly results to return, see simulation.RESULTS
+    :param annual: return the sum over all hours of each output (True), or the hourly values (False)
+    :param processes: number of worker processes, default is the number of cores. 1 runs in this process, which is
+    also what happens without multiprocessing, e.g. in IronPython
+    :param chunksize: variants sent to a worker at a time. Default splits the variants into about 4 chunks per worker
+    :param cache_dir: folder for the weather cache file, see epw_cache.load
+    :return: generator of (index in variants, variant, dict of outputs), in order of completion
+    """
+    import epw_cache
+    variants = list(variants)
+    schedules = dict(internal_gains=internal_gains, solar_gains=solar_gains, illuminance=illuminance,
+                     occupancy=occupancy)
+    initargs = (epw_path, cache_dir, zone_factory, schedules, tuple(outputs), annual)
+    tasks = list(enumerate(variants))
+    multiprocessing = None
+    if processes is None or processes > 1:
+        try:
+            import multiprocessing  # not in IronPython, hence not at module level
+        except ImportError:
+            processes = 1
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = max(1, min(processes, len(tasks)))
+
+    if processes == 1:
+        _init_worker(*initargs)
+        for index, results in map(_run_variant, tasks):
+            yield index, variants[index], results
+        return
+
+    # write the cache file before the workers start, so they only memory-map it
+    epw_cache.load(epw_path, cache_dir)
+    if chunksize is None:
+        chunksize = max(1, len(tasks) // (4 * processes))
+    pool = multiprocessing.Pool(processes, _init_worker, initargs)
+    try:
+        for index, results in pool.imap_unordered(_run_variant, tasks, chunksize):
+            yield index, variants[index], results
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.sweep
+    def test():
+        import math
+        import multiprocessing
+        import os
+        import sys
+        import time
+        core = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+        sys.path.append(os.path.join(core, 'epw_reader'))
+        from .building_physics import Element
+        from .emission_systems import NewRadiators, FloorHeating
+        from .supply_systems import HeatPumpAir, CHP
+
+        epw_path = os.path.join(core, 'epw_reader', 'Zurich.epw')
+        hours = range(8760)
+        solar_gains = [max(0.0, 3000 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        internal_gains = [300.0 + 200 * (8 <= h % 24 <= 18) for h in hours]
+        walls = [[Element('window', 13.5, 1.1, opaque=False), Element('wall', 15.0, u)] for u in (0.1, 0.4)]
+        variants = grid(elements=walls, ach_vent=[0.5, 1.0, 1.5, 2.0], heating_supply_system=[HeatPumpAir, CHP],
+                        heating_emission_system=[NewRadiators, FloorHeating])
+
+        t0 = time.time()
+        serial = dict((i, r) for i, v, r in sweep(variants, epw_path, internal_gains, solar_gains, processes=1))
+        t1 = time.time()
+        processes = max(2, multiprocessing.cpu_count())
+        parallel = dict((i, r) for i, v, r in sweep(variants, epw_path, internal_gains, solar_gains,
+                                                    processes=processes))
+        t2 = time.time()
+        assert sorted(parallel) == list(range(len(variants)))
+        for i in serial:
+            for name in serial[i]:
+                assert abs(serial[i][name] - parallel[i][name]) <= 1e-9 * max(1.0, abs(serial[i][name]))
+        # more insulation, less heating
+        insulated, uninsulated = [serial[variants.index(dict(elements=elements, ach_vent=1.0,
+                                                            heating_supply_system=HeatPumpAir,
+                                                            heating_emission_system=FloorHeating))]
+                                  for elements in walls]
+        assert insulated['heating_demand'] < uninsulated['heating_demand']
+
+        # the factory is ElementBuilding(zone=ThermalZone(...))
+        zone = element_building(ach_vent=0.5, heating_emission_system=FloorHeating, lighting_load=8.0)
+        assert zone.zone.heating_emission_system is FloorHeating and zone.lighting_load == 8.0
+        legacy = dict((i, r) for i, v, r in sweep(grid(u_walls=[0.1, 0.4]), epw_path, internal_gains, solar_gains,
+                                                  zone_factory=Building, processes=1))
+        assert legacy[0]['heating_demand'] < legacy[1]['heating_demand']
+
+        # without multiprocessing (IronPython), sweeps run in this process
+        sys.modules['multiprocessing'] = None
+        try:
+            without = dict((i, r) for i, v, r in sweep(variants[:3], epw_path, internal_gains, solar_gains))
+        finally:
+            sys.modules['multiprocessing'] = multiprocessing
+        assert all(without[i] == serial[i] for i in range(3))
+        print('%i variants: %.2fs in 1 process, %.2fs in %i processes'
+              % (len(variants), t1 - t0, t2 - t1, processes))
+
+
+    test()
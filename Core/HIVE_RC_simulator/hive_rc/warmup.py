@@ -0,0 +1,111 @@
+#
+# Hive: An educational plugin developed by the A/S chair at ETH Zurich
+#
+# This file is part of Hive
+#
+# Licensing/Copywrite and liability comments go here.
+# Copyright 2018, Architecture and Building Systems - ETH Zurich
+# Licence: MIT
+
+"""
+Initial temperature of the thermal mass for short simulations.
+
+A simulation that starts at t_m = 20 C needs days to weeks before the mass node forgets its start value, which is
+why short periods were simulated as part of a whole year. steady_state_mass_temperature assumes instead that the
+days before the period looked like its first days (warmup_hours): it searches the mass temperature that the warm-up
+window, simulated from that temperature, ends with again, i.e. the periodic steady state of the mass node. The end
+temperature is a monotonic, piecewise affine function of the start temperature with a slope below 1, so the secant
+method finds it in a few simulations of the window.
+
+usage:
+    t_m_init = steady_state_mass_temperature(zone, t_out, internal_gains, solar_gains)
+    results = simulate(zone, t_out, internal_gains, solar_gains, t_m_init=t_m_init)
+"""
+
+from __future__ import division
+
+from .rc_step import ClosedFormStep
+
+
+def steady_state_mass_temperature(zone, t_out, internal_gains=None, solar_gains=None, warmup_hours=168,
+                                  tolerance=0.01, max_iterations=20, t_m_guess=20.0):
+    """
+    Periodic steady state of the mass node over the first hours of a period. Changes the result attributes of zone
+    :param zone: ElementBuilding or Building
+    :param t_out: outdoor air temperature per hour [C] of the period
+    :param internal_gains: internal gains per hour [W], None for no internal gains
+    :param solar_gains: solar gains per hour [W], None for no solar gains
+    :param warmup_hours: length of the warm-up window at the start of the period, e.g. a week
+    :param tolerance: difference of start and end temperature [K] to stop at
+    :param max_iterations: maximum number of simulations of the warm-up window
+    :param t_m_guess: first guess [C]
+    :return: mass temperature before the first hour [C]
+    """
+    hours = min(warmup_hours, len(t_out))
+    if not hours:
+        return t_m_guess
+    t_out = t_out[:hours]
+    internal_gains = internal_gains[:hours] if internal_gains else [0] * hours
+    solar_gains = solar_gains[:hours] if solar_gains else [0] * hours
+    solve_building_energy = ClosedFormStep(zone).solve_building_energy
+
+    def end_temperature(t_m):
+        for hour in range(hours):
+            solve_building_energy(internal_gains[hour], solar_gains[hour], t_out[hour], t_m)
+            t_m = zone.t_m_next
+        return t_m
+
+    # secant method on end_temperature(t) - t = 0
+    t_0 = t_m_guess
+    g_0 = end_temperature(t_0) - t_0
+    if abs(g_0) < tolerance:
+        return t_0
+    t_1 = t_0 + g_0
+    for _ in range(max_iterations):
+        g_1 = end_temperature(t_1) - t_1
+        if abs(g_1) < tolerance:
+            break
+        if g_1 == g_0:
+            t_0, g_0, t_1 = t_1, g_1, t_1 + g_1
+        else:
+            t_0, g_0, t_1 = t_1, g_1, t_1 - g_1 * (t_1 - t_0) / (g_1 - g_0)
+    return t_1
+
+
+if __name__ == '__main__':
+    # run as python -m hive_rc.warmup
+    def test():
+        import math
+        import time
+        from .building_physics import Building
+        from .simulation import simulate
+
+        hours = range(8760)
+        t_out = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) +
+                 3 * math.sin(2 * math.pi * h / 170) for h in hours]
+        solar_gains = [max(0.0, 2500 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        internal_gains = [300.0 + 200 * (8 <= h % 24 <= 18) for h in hours]
+
+        t0 = time.time()
+        year = simulate(Building(), t_out, internal_gains, solar_gains)
+        t1 = time.time()
+        for start in (24 * 20, 24 * 100, 24 * 200, 24 * 300):
+            week = slice(start, start + 168)
+            t_m_init = steady_state_mass_temperature(Building(), t_out[week], internal_gains[week], solar_gains[week])
+            t2 = time.time()
+            cold = simulate(Building(), t_out[week], internal_gains[week], solar_gains[week])
+            warm = simulate(Building(), t_out[week], internal_gains[week], solar_gains[week], t_m_init=t_m_init)
+            error_cold, error_warm, total = 0, 0, 0
+            for name in ('heating_demand', 'cooling_demand'):
+                expected = sum(year[name][week])
+                error_cold += abs(sum(cold[name]) - expected)
+                error_warm += abs(sum(warm[name]) - expected)
+                total += abs(expected)
+            assert error_warm <= 0.3 * error_cold + 0.001 * total, (start, error_warm, error_cold)
+            print('week from hour %i: t_m %.2f C (whole year: %.2f C), error of heating + cooling %.1f kWh (from 20 C: '
+                  '%.1f kWh), warm start in %.3fs (whole year: %.3fs)'
+                  % (start, t_m_init, year['t_m'][start - 1], error_warm / 1000, error_cold / 1000, t2 - t1, t1 - t0))
+            t1 = time.time()
+
+
+    test()
@@ -39,63 +39,20 @@ ghenv.Component.SubCategory = "4. Results"
 
 import scriptcontext as sc
 import Grasshopper.Kernel as ghKernel
+import timeseries
 
 def main(_start_hoy, hourly_data, resample_type):
     if not sc.sticky.has_key('HivePreparation'): 
         return "Add the modular RC component to the canvas!"
     hive_preparation = sc.sticky['HivePreparation']()
     
-    def resample(dict,resample_type):
-        if resample_type == 0:
-            for key in dict:
-                dict[key] = sum(dict[key])
-        if resample_type == 1:
-            for key in dict:
-                dict[key] = sum(dict[key])/len(dict[key])
-        return dict.values()
+    how = 'sum' if resample_type == 0 else 'mean'
+    streams = [hourly_data[stream] for stream in sorted(hourly_data)]
     
-    hoys = range(int(_start_hoy),int(_start_hoy+len(hourly_data[0])))
-    doys = [(h-1)//24 for h in hoys]
-    moys = [hive_preparation.hour2Date(hoy,True)[1] for hoy in hoys]
-    
-    daily_streams = []
-    monthly_streams = []
-    annual = []
-    
-    for stream in hourly_data:
-        daily = dict(zip(range(0,365),[list()]*365))
-        monthly = dict(zip(range(0,11),[list()]*11))
-        day_last_hour = 0
-        values_this_day = []
-        month_last_hour = 0
-        values_this_month = []
-        
-        for value,doy,moy in zip(hourly_data[stream],doys,moys):
-            # Split values into days
-            if doy == day_last_hour:
-                values_this_day.append(value)
-            else:
-                daily[day_last_hour] = values_this_day
-                values_this_day = []
-                day_last_hour = doy
-            daily[day_last_hour] = values_this_day
-            
-            # Split values into months
-            if moy == month_last_hour:
-                values_this_month.append(value)
-            else:
-                monthly[month_last_hour] = values_this_month
-                values_this_month = []
-                month_last_hour = moy
-            monthly[month_last_hour] = values_this_month
-        
-        daily_streams.append(resample(daily,resample_type))
-        monthly_streams.append(resample(monthly,resample_type))
-        
-        if resample_type == 0:
-            annual.append([sum(hourly_data[stream])])
-        if resample_type == 1:
-            annual.append([sum(hourly_data[stream])/len(hourly_data[stream])])
+    # all streams are bucketed with the same day/month boundaries, see Core/timeseries
+    daily_streams = timeseries.aggregate(streams, 'day', how, int(_start_hoy))
+    monthly_streams = timeseries.aggregate(streams, 'month', how, int(_start_hoy))
+    annual = [[sum(s)] if how == 'sum' else [sum(s)/len(s)] for s in streams]
     
     dailyTree = hive_preparation.list_to_tree(daily_streams)
     monthlyTree = hive_preparation.list_to_tree(monthly_streams)
@@ -65,8 +65,9 @@ def build_glazed_element(window_name,_window_geometry,u_value,frame_factor):
     return centers, normals, glazed_elements
 
 
-def solar_gains_through_element(window_geometry, point_in_zone, context_geometry, location, irradiation,solar_transmittance,light_transmittance, draw_shadows):
+def solar_gains_through_element(window_geometry, point_in_zone, context_geometry, location, irradiation,solar_transmittance,light_transmittance, draw_shadows, cache_inputs):
     """
+    cache_inputs: everything the hourly results depend on (not draw_shadows), key of the GainsCache, see geometry_key
     #TODO: Deal with polysurface input for shading
     #TODO: collect points and merge shadows in pyclipper for a faster shading visualisation.
     """
@@ -76,17 +77,29 @@ def solar_gains_through_element(window_geometry, point_in_zone, context_geometry
     glass_solar_transmittance = 0.7 if solar_transmittance is None else solar_transmittance
     glass_light_transmittance = 0.8 if light_transmittance is None else light_transmittance
     
-    Window = sc.sticky["WindowRadiation"](window_geometry=_window_geometry,
-                                          point_in_zone=_point_in_zone,
-                                          context_geometry=context_geometry,
-                                          glass_solar_transmittance=glass_solar_transmittance,
-                                          glass_light_transmittance=glass_light_transmittance
-                                          )
+    # hourly results of an earlier run with the same inputs, unless shadows have to be drawn
+    cache = sc.sticky['HiveGainsCache']
+    key = cache.key(cache_inputs)
+    cached = None if draw_shadows else cache.get(key)
+    
+    if cached is not None:
+        # only the orientation of the window is needed, no shades, shading mask or BVH
+        window_centroid, window_normal, window_azimuth_rad, window_altitude_rad = \
+            sc.sticky["WindowRadiation"].orientation(_window_geometry, _point_in_zone)
+    else:
+        Window = sc.sticky["WindowRadiation"](window_geometry=_window_geometry,
+                                              point_in_zone=_point_in_zone,
+                                              context_geometry=context_geometry,
+                                              glass_solar_transmittance=glass_solar_transmittance,
+                                              glass_light_transmittance=glass_light_transmittance
+                                              )
+        window_centroid, window_normal = Window.window_centroid, Window.window_normal
+        window_azimuth_rad, window_altitude_rad = Window.window_azimuth_rad, Window.window_altitude_rad
     try:
         Sun = sc.sticky["RelativeSun"](location=location,
-                          window_azimuth_rad=Window.window_azimuth_rad,
-                          window_altitude_rad=Window.window_altitude_rad,
-                          normal = Window.window_normal)
+                          window_azimuth_rad=window_azimuth_rad,
+                          window_altitude_rad=window_altitude_rad,
+                          normal = window_normal)
     except:
         print 'For solar calculations, connect Location data from the Hive_getSimulationData'
     
@@ -104,64 +117,90 @@ def solar_gains_through_element(window_geometry, point_in_zone, context_geometry
     shadows = []
     shading_factor = []
     
-    for b in range(irradiation.BranchCount):
-        # Initialize results
-        incidence = 0
-        solar_gains_this_hour = 0
-        lighting = 0
-        dnirr = 0
-        dhirr = 0
-        dhirr_simple = 0
-        grirr = 0
-        sun_vector = None
-        shadows_hour = [None]
-        
-        # read radiation data
-        hoy, normal_irradiation, horizontal_irradiation, normal_illuminance, horizontal_illuminance = list(irradiation.Branch(b))
-        day,month,hour = HivePreparation.hour2Date(hoy,alternate=True)
-        
-        # Calculate sun
-        relative_sun_alt,relative_sun_az = Sun.calc_relative_sun_position(hoy)
-        sun_alt,sun_az = Sun.calc_sun_position(hoy)
+    # sun positions of all hours at once
+    hours = [list(irradiation.Branch(b)) for b in range(irradiation.BranchCount)]
+    sun_positions = [Sun.calc_sun_position(hour[0]) for hour in hours]
+    relative_sun_positions = [Sun.calc_relative_sun_position(hour[0]) for hour in hours]
+    
+    if cached is not None:
+        print 'Solar gains read from', cache.path(key)
+        window_solar_gains = [[g] for g in cached['solar_gains']]
+        window_illuminance = [[l] for l in cached['illuminance']]
+        shading_factor = list(cached['shading_factor'])
+        incidence_angles = list(cached['incidence'])
+        dir_irradiation = list(cached['dir_irradiation'])
+        diff_irradiation = list(cached['diff_irradiation'])
+        diff_irradiation_simple = list(cached['diff_irradiation_simple'])
+        ground_ref_irradiation = list(cached['ground_ref_irradiation'])
+        for (sun_alt,sun_az),(relative_sun_alt,relative_sun_az) in zip(sun_positions,relative_sun_positions):
+            sun_vectors.append(Sun.calc_sun_vector(sun_alt,sun_az) if sun_alt > 0 and abs(relative_sun_az) < 90 else None)
+    else:
+        incidences = [math.acos(math.cos(math.radians(alt)) * math.cos(math.radians(az))) for alt, az in relative_sun_positions]
+        perez_components = Window.calc_perez_series(incidences, [alt for alt, az in sun_positions],
+                                                    [hour[1] for hour in hours], [hour[2] for hour in hours])
         
-        # print sun_az, relative_sun_az
-        incidence = math.acos(math.cos(math.radians(relative_sun_alt)) * math.cos(math.radians(relative_sun_az)))
-
-        # Calculate shading
-        if context_geometry == [] or not (sun_alt > 0 and abs(relative_sun_az) < 90):
-            # Window is unshaded
-            unshaded_area = Window.window_area
-        else:
-            shadow_dict = Window.calc_gross_shadows(relative_sun_alt,relative_sun_az)
-            if shadow_dict is not None:
-                shadows_polygons = Window.calc_shadow_polygons(shadow_dict)
-                unshaded_area = Window.calc_unshaded_area(shadows_polygons)
-                if draw_shadows and day%7 ==0:
-                    shadows_hour = Window.draw_shadow_points(shadows_polygons)
-            else:
+        for b in range(irradiation.BranchCount):
+            # Initialize results
+            incidence = 0
+            solar_gains_this_hour = 0
+            lighting = 0
+            dnirr = 0
+            dhirr = 0
+            dhirr_simple = 0
+            grirr = 0
+            sun_vector = None
+            shadows_hour = [None]
+            
+            # read radiation data
+            hoy, normal_irradiation, horizontal_irradiation, normal_illuminance, horizontal_illuminance = hours[b]
+            day,month,hour = HivePreparation.hour2Date(hoy,alternate=True)
+            
+            # Sun
+            relative_sun_alt,relative_sun_az = relative_sun_positions[b]
+            sun_alt,sun_az = sun_positions[b]
+            incidence = incidences[b]
+    
+            # Calculate shading
+            if context_geometry == [] or not (sun_alt > 0 and abs(relative_sun_az) < 90):
+                # Window is unshaded
                 unshaded_area = Window.window_area
+            else:
+                unshaded_area = Window.shading_mask(relative_sun_alt,relative_sun_az)
+                if draw_shadows and day%7 ==0:
+                    shadow_dict = Window.calc_gross_shadows(relative_sun_alt,relative_sun_az)
+                    if shadow_dict is not None:
+                        shadows_hour = Window.draw_shadow_points(Window.calc_shadow_polygons(shadow_dict))
+            
+            dnirr, dhirr, dhirr_simple, grirr, lighting = Window.radiation(sun_alt, incidence, normal_irradiation, horizontal_irradiation, normal_illuminance, horizontal_illuminance, unshaded_area, perez_components[b])
+            
+            solar_gains_this_hour = Window.glass_solar_transmittance * (dnirr + dhirr + grirr)
+            lighting *= Window.glass_light_transmittance
+            
+            shading_factor.append(unshaded_area/Window.window_area)
+            
+            if sun_alt > 0 and abs(relative_sun_az) < 90:
+                sun_vector = Sun.calc_sun_vector(sun_alt,sun_az)
+                incidence = math.degrees(incidence)
+            
+            # Append results
+            window_illuminance.append([lighting])
+            window_solar_gains.append([solar_gains_this_hour])
+            dir_irradiation.append(dnirr)
+            diff_irradiation.append(dhirr)
+            diff_irradiation_simple.append(dhirr_simple)
+            sun_vectors.append(sun_vector)
+            incidence_angles.append(incidence)
+            ground_ref_irradiation.append(grirr)
+            shadows.append(shadows_hour)
         
-        dnirr, dhirr, dhirr_simple, grirr, lighting = Window.radiation(sun_alt, incidence, normal_irradiation, horizontal_irradiation, normal_illuminance, horizontal_illuminance, unshaded_area)
-        
-        solar_gains_this_hour = Window.glass_solar_transmittance * (dnirr + dhirr + grirr)
-        lighting *= Window.glass_light_transmittance
-        
-        shading_factor.append(unshaded_area/Window.window_area)
-        
-        if sun_alt > 0 and abs(relative_sun_az) < 90:
-            sun_vector = Sun.calc_sun_vector(sun_alt,sun_az)
-            incidence = math.degrees(incidence)
-        
-        # Append results
-        window_illuminance.append([lighting])
-        window_solar_gains.append([solar_gains_this_hour])
-        dir_irradiation.append(dnirr)
-        diff_irradiation.append(dhirr)
-        diff_irradiation_simple.append(dhirr_simple)
-        sun_vectors.append(sun_vector)
-        incidence_angles.append(incidence)
-        ground_ref_irradiation.append(grirr)
-        shadows.append(shadows_hour)
+        cache.put(key, {'solar_gains': [g[0] for g in window_solar_gains],
+                        'illuminance': [l[0] for l in window_illuminance],
+                        'shading_factor': shading_factor,
+                        'incidence': incidence_angles,
+                        'dir_irradiation': dir_irradiation,
+                        'diff_irradiation': diff_irradiation,
+                        'diff_irradiation_simple': diff_irradiation_simple,
+                        'ground_ref_irradiation': ground_ref_irradiation})
     
     solar_gains = HivePreparation.list_to_tree(window_solar_gains)
     illuminance = HivePreparation.list_to_tree(window_illuminance)
@@ -179,7 +218,18 @@ def solar_gains_through_element(window_geometry, point_in_zone, context_geometry
     if sf:
         print 'Mean shading factor: ', sum(sf)/len(sf)
     
-    return incidence_angles, Window.window_centroid, Window.window_normal, sun_vectors, solar_gains, illuminance, dir_irradiation, diff_irradiation, diff_irradiation_simple, ground_ref_irradiation, shadows
+    return incidence_angles, window_centroid, window_normal, sun_vectors, solar_gains, illuminance, dir_irradiation, diff_irradiation, diff_irradiation_simple, ground_ref_irradiation, shadows
+
+def geometry_key(geometry):
+    """Vertex coordinates of (lists of) surfaces, breps and points, to fingerprint Rhino geometry"""
+    if geometry is None:
+        return None
+    if isinstance(geometry, (list, tuple)):
+        return [geometry_key(g) for g in geometry]
+    point = rs.coerce3dpoint(geometry)
+    if point is not None:
+        return (point.X, point.Y, point.Z)
+    return [(v.Location.X, v.Location.Y, v.Location.Z) for v in rs.coercebrep(geometry).Vertices]
 
 """"""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""""
 
@@ -187,7 +237,16 @@ centers, normals, glazed_elements = build_glazed_element(window_name, _window_ge
 window_area = [g.area for g in glazed_elements]
 
 if len(location) == 4 and _point_in_zone and  _window_geometry:
-    incidence_angle, window_centroid, window_normal, sun_vectors, solar_gains, illuminance, dir_irradiation, diff_irradiation, diff_irradiation_simple, ground_ref_irradiation, shadow_points = solar_gains_through_element(_window_geometry, _point_in_zone, context_geometry, location, irradiation, solar_transmittance, light_transmittance, draw_shadows)
+    # reuse the window gains of an earlier solution (or, from disk, an earlier session) if neither geometry nor
+    # weather changed. Drawing shadows doesn't change the hourly values, only the pipeline result
+    cache_inputs = (geometry_key(_window_geometry), geometry_key(_point_in_zone), geometry_key(context_geometry),
+                    list(location), [list(irradiation.Branch(b)) for b in range(irradiation.BranchCount)],
+                    solar_transmittance, light_transmittance)
+    inputs = cache_inputs + (bool(draw_shadows),)
+    window_gains = sc.sticky['HivePipeline'].run('window_gains', solar_gains_through_element,
+        (_window_geometry, _point_in_zone, context_geometry, location, irradiation, solar_transmittance,
+         light_transmittance, draw_shadows, cache_inputs), inputs=inputs)
+    incidence_angle, window_centroid, window_normal, sun_vectors, solar_gains, illuminance, dir_irradiation, diff_irradiation, diff_irradiation_simple, ground_ref_irradiation, shadow_points = window_gains.value
     
 else:
     warning = """Warning: Insufficient inputs for solar calculations"""
@@ -121,21 +121,19 @@ def main(epw_file,start_HOY,end_HOY):
     
     if (epw_file is not None):
         locationData = HivePreparation.epwLocation(epw_file)
-        weatherData = HivePreparation.epwDataReader(epw_file, locationData[0])
-
         location = [locationData[1], locationData[2], locationData[3]]
-        dryBulbTemperature, dewPointTemperature, relativeHumidity, windSpeed, windDirection, directNormalRadiation, diffuseHorizontalRadiation, globalHorizontalRadiation, directNormalIlluminance, diffuseHorizontalIlluminance, globalHorizontalIlluminance, totalSkyCover, horizontalInfraredRadiation, barometricPressure, modelYear = weatherData
-        location.append(modelYear[7])
-
-        dryBulbTemperature = separate_data(dryBulbTemperature)
-        directRadiation = separate_data(directNormalRadiation)
-        diffuseRadiation = separate_data(diffuseHorizontalRadiation)
-        directIlluminance = separate_data(directNormalIlluminance)
-        diffuseIlluminance = separate_data(diffuseHorizontalIlluminance)
+        # the year is taken from the first row of the file, whatever the simulation period
+        modelYear = HivePreparation.epwFieldReader(epw_file, [0], 1, 1)[0]
+        location.append(modelYear[0])
+        
+        # only read the columns and hours needed for the simulation
+        dryBulbTemperature, directRadiation, diffuseRadiation, directIlluminance, diffuseIlluminance = \
+            HivePreparation.epwFieldReader(epw_file, [6, 14, 15, 17, 18], start, end)
         
         for i in range(start-1,end):
-            temperature.append([i,dryBulbTemperature[i]])
-            irradiation.append([i, directRadiation[i], diffuseRadiation[i], directIlluminance[i], diffuseIlluminance[i]])
+            j = i - (start-1)
+            temperature.append([i,dryBulbTemperature[j]])
+            irradiation.append([i, directRadiation[j], diffuseRadiation[j], directIlluminance[j], diffuseIlluminance[j]])
     
     return location, list_to_tree(temperature), list_to_tree(irradiation)
 
@@ -21,7 +21,7 @@ Provided by Hive 0.0.1
     Args:
         Zone: Input a customized Zone from the Zone component.
         outdoor_air_temperature: Tree where each branch contains a HOY and the corresponding outdoor air temperatures
-        previous_mass_temperature: The temperature of the mass node during the hour prior to the first time step. This temperature represents the average temperature of the building envelope itself.
+        previous_mass_temperature: The temperature of the mass node during the hour prior to the first time step. This temperature represents the average temperature of the building envelope itself. Leave it empty to start from the periodic steady state of the first week (see hive_rc/warmup.py).
         internal_gains: List of hourly internal heat gains [Watts].
         solar_irradiation: List of solar irradiation gains [Watts].
         illuminance: Illuminance after transmitting through the window [Lumens]
@@ -50,81 +50,68 @@ ghenv.Component.SubCategory = "3. Simulate"
 
 import Grasshopper.Kernel as ghKernel
 import scriptcontext as sc
+import copy
+import hive_rc
+
+# hourly results shown on the outputs
+OUTPUTS = ('t_air', 't_operative', 't_m', 'lighting_demand', 'energy_demand', 'heating_demand', 'cooling_demand')
 
 def main(Zone, outdoor_air_temperature, previous_mass_temperature, internal_gains, solar_gains, occupancy, illuminance):
     if not sc.sticky.has_key('RCModel'): return "Add the modular RC component to the canvas!"
     HivePreparation = sc.sticky['HivePreparation']()
     
-    # Initialise previous mass temperature if it hasn't been specified
-    t_m_prev = initial_mass_temperature if initial_mass_temperature is not None else 20.0
-    
-    #Initialise result lists
-    indoor_air_temperature = []
-    operative_temperature = []
-    mass_temperature = []
-    energy_demand = []
-    heating_demand = []
-    cooling_demand = []
-    lighting_demand = []
-
-    #Start simulation
-    for b in range(outdoor_air_temperature.BranchCount):
-        hour, ta = outdoor_air_temperature.Branch(b)
-        oc = occupancy[b] if occupancy else 0
-        ig = internal_gains[b] if internal_gains else 0
-        sg = solar_gains[b] if solar_gains else 0
-        il = illuminance[b] if illuminance else 0
-        
-        try:
-            Zone.solve_building_energy(ig, sg, ta, t_m_prev)
-            Zone.solve_building_lighting(il, oc)
-        except:
-            print 'building energy could not be solved for the following inputs'
-            print 'outdoor air temperature: ', ta
-            print 'previous mass temperature: ', previous_mass_temperature
-            print 'internal gains: ', ig
-            print 'solar gains: ', sg
-            print 'illuminance: ',il
-            print 'occupancy: ',oc
-            Zone.solve_building_energy(ig, sg, ta, previous_mass_temperature) 
-            break
-        
-        #Set T_m as t_m_prev for next timestep
-        t_m_prev = Zone.t_m_next
-        
-        #Record Results
-        indoor_air_temperature.append([Zone.t_air])
-        operative_temperature.append([Zone.t_operative])
-        mass_temperature.append([Zone.t_m]) 
-        lighting_demand.append([Zone.lighting_demand])  
-        energy_demand.append([abs(Zone.energy_demand)]) 
-        heating_demand.append([Zone.heating_demand])
-        cooling_demand.append([Zone.cooling_demand])
-    
-    
-    print 'Heating demand: %f kWh/m2'%(sum([l[0] for l in heating_demand])/(1000*Zone.floor_area))
-    print 'Cooling demand: %f kWh/m2'%(sum([l[0] for l in cooling_demand])/(1000*Zone.floor_area))
-    print 'Lighting demand: %f kWh/m2'%(sum([l[0] for l in lighting_demand])/(1000*Zone.floor_area))
-    print 'Total energy demand: %f kWh/m2'%(sum([l[0] for l in energy_demand])/(1000*Zone.floor_area))
+    t_out = [outdoor_air_temperature.Branch(b)[1] for b in range(outdoor_air_temperature.BranchCount)]
+    
+    # Initialise previous mass temperature if it hasn't been specified: periodic steady state of the first week, so
+    # that short periods don't have to be simulated as part of a whole year
+    if initial_mass_temperature is not None:
+        t_m_prev = initial_mass_temperature
+    else:
+        t_m_prev = hive_rc.steady_state_mass_temperature(copy.deepcopy(Zone), t_out, internal_gains, solar_gains)
+        print 'Initial mass temperature: %f C'%t_m_prev
+    
+    #Start simulation, or reuse the results of an earlier solution with the same zone and inputs
+    pipeline = sc.sticky['HivePipeline']
+    try:
+        # simulate changes attributes of the zone, so it runs on a copy and the fingerprint is taken from Zone
+        rc = pipeline.run('rc', hive_rc.simulate,
+                          (copy.deepcopy(Zone), t_out, internal_gains, solar_gains, illuminance, occupancy, t_m_prev),
+                          kwargs={'sink': hive_rc.ArraySink(OUTPUTS)},
+                          inputs=(Zone, t_out, internal_gains, solar_gains, illuminance, occupancy, t_m_prev))
+        results = rc.value
+    except:
+        raise_error('building energy could not be solved for the given inputs, see hive_rc.simulate')
+        raise
+    
+    # hourly results are kept in arrays, the trees are only built for the outputs
+    heating_demand = results['heating_demand']
+    cooling_demand = results['cooling_demand']
+    lighting_demand = results['lighting_demand']
+    energy_demand = [abs(e) for e in results['energy_demand']]
+    
+    print 'Heating demand: %f kWh/m2'%(sum(heating_demand)/(1000*Zone.floor_area))
+    print 'Cooling demand: %f kWh/m2'%(sum(cooling_demand)/(1000*Zone.floor_area))
+    print 'Lighting demand: %f kWh/m2'%(sum(lighting_demand)/(1000*Zone.floor_area))
+    print 'Total energy demand: %f kWh/m2'%(sum(energy_demand)/(1000*Zone.floor_area))
     if solar_gains: 
         print 'Solar gains: %f kWh/m2'%(sum(solar_gains)/(1000*Zone.floor_area))
     if internal_gains:
         print 'Internal gains: %f kWh/m2'%(sum(internal_gains)/(1000*Zone.floor_area))
     
-    if len(indoor_air_temperature)>0:
+    if len(results['t_air'])>0:
         energy_pie = energy_pie_chart(heating_demand,cooling_demand,lighting_demand)
-        comfort_pie = comfort_pie_chart(Zone, indoor_air_temperature)
+        comfort_pie = comfort_pie_chart(Zone, results['t_air'])
     else:
         energy_pie = None
         comfort_pie = None
     
-    return HivePreparation.list_to_tree(indoor_air_temperature), \
-    HivePreparation.list_to_tree(operative_temperature), \
-    HivePreparation.list_to_tree(mass_temperature), \
-    HivePreparation.list_to_tree(lighting_demand), \
-    HivePreparation.list_to_tree(energy_demand), \
-    HivePreparation.list_to_tree(heating_demand), \
-    HivePreparation.list_to_tree(cooling_demand),energy_pie, comfort_pie
+    return HivePreparation.series_to_tree(results['t_air']), \
+    HivePreparation.series_to_tree(results['t_operative']), \
+    HivePreparation.series_to_tree(results['t_m']), \
+    HivePreparation.series_to_tree(lighting_demand), \
+    HivePreparation.series_to_tree(energy_demand), \
+    HivePreparation.series_to_tree(heating_demand), \
+    HivePreparation.series_to_tree(cooling_demand),energy_pie, comfort_pie
 
 def raise_error(error_str):
     error = error_str
@@ -147,9 +134,9 @@ def check_input_tree(input_tree,input_tree_name):
         return False
 
 def energy_pie_chart(heating_demand,cooling_demand,lighting_demand):
-    heating = round(sum([h[0] for h in heating_demand]),2)
-    cooling = round(-sum([c[0] for c in cooling_demand]),2)
-    lighting = round(sum([l[0] for l in lighting_demand]),2)
+    heating = round(sum(heating_demand),2)
+    cooling = round(-sum(cooling_demand),2)
+    lighting = round(sum(lighting_demand),2)
     
     value = [heating,cooling,lighting]
     lengths = [len(str(int(v))) for v in value if v>0]
@@ -164,9 +151,9 @@ def energy_pie_chart(heating_demand,cooling_demand,lighting_demand):
 
 def comfort_pie_chart(Zone, temperature):
     """A very crude comfort assessment... just looking at the temperature setpoints"""
-    hot = sum([round(t[0])>Zone.t_set_cooling for t in temperature])
-    cold = sum([round(t[0])<Zone.t_set_heating for t in temperature])
-    comfy = sum([Zone.t_set_heating <= round(t[0]) <= Zone.t_set_cooling for t in temperature])
+    hot = sum([round(t)>Zone.t_set_cooling for t in temperature])
+    cold = sum([round(t)<Zone.t_set_heating for t in temperature])
+    comfy = sum([Zone.t_set_heating <= round(t) <= Zone.t_set_cooling for t in temperature])
     
     value = [hot,cold,comfy]
     
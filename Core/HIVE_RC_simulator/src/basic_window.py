@@ -18,6 +18,8 @@ from System.Collections.Generic import List
 import System.Reflection
 import os 
 
+import perez
+
 clipper_path = os.getcwd() + '\clipper_library.dll'
 clipper_library = System.Reflection.Assembly.LoadFrom(clipper_path)
 
@@ -201,12 +203,6 @@ class ShadedWindow(object):
         self.glass_solar_transmittance = glass_solar_transmittance
         self.glass_light_transmittance = glass_light_transmittance
         
-        self.perez_coef = {'f_11': [-0.0083117, 0.1299457, 0.3296958, 0.5682053, 0.873028, 1.1326077, 1.0601591, 0.677747],
-              'f_12': [0.5877285, 0.6825954, 0.4868735, 0.1874525, -0.3920403, -1.2367284, -1.5999137, -0.3272588],
-              'f_13': [-0.0620636, -0.1513752, -0.2210958, -0.295129, -0.3616149, -0.4118494, -0.3589221, -0.2504286],
-              'f_21': [-0.0596012, -0.0189325, 0.055414, 0.1088631, 0.2255647, 0.2877813, 0.2642124, 0.1561313],
-              'f_22': [0.0721249, 0.065965, -0.0639588, -0.1519229, -0.4620442, -0.8230357, -1.127234, -1.3765031],
-              'f_23': [-0.0220216, -0.0288748, -0.0260542, -0.0139754, 0.0012448, 0.0558651, 0.1310694, 0.2506212]}
     
     def extract_window_geometry(self,point_in_zone):
         """
@@ -490,55 +486,7 @@ class ShadedWindow(object):
         :rtype: tuple(float, float)
         """
         
-        a = max(0, math.cos(angle_incidence))
-        b = max(math.cos(math.radians(85)), math.cos(angle_incidence))
-        k = 5.534 / 1000000
-        zenith = 90 - sun_alt
-    
-        if 0 <= zenith <= 87.5:
-            epsilon = ((norm_radiation + hor_radiation) / float(hor_radiation) + k * ( zenith ** 3)) / (1 + k * (zenith ** 3))
-            
-            air_mass = (math.cos(b) + 0.15 * (93.9 - zenith) ** (-1.253) ) ** (-1)
-            
-            delta = hor_radiation * (air_mass / 1367.0)
-            
-            if epsilon <= 1.065:
-                coeff_selector = 0
-            elif epsilon <= 1.23:
-                coeff_selector = 1
-            elif epsilon <= 1.5:
-                coeff_selector = 2
-            elif epsilon <= 1.95:
-                coeff_selector = 3
-            elif epsilon <= 2.8:
-                coeff_selector = 4
-            elif epsilon <= 4.5:
-                coeff_selector = 5
-            elif epsilon <= 6.2:
-                coeff_selector = 6
-            elif epsilon > 6.2:
-                coeff_selector = 7
-            
-            f_11 = self.perez_coef['f_11'][coeff_selector]
-            f_12 = self.perez_coef['f_12'][coeff_selector]
-            f_13 = self.perez_coef['f_13'][coeff_selector]
-            f_21 = self.perez_coef['f_21'][coeff_selector]
-            f_22 = self.perez_coef['f_22'][coeff_selector]
-            f_23 = self.perez_coef['f_23'][coeff_selector]
-            
-            zenith_rad = math.radians(zenith)
-            f_1 = max(0, f_11 + delta * f_12 + zenith_rad * f_13)
-            f_2 = max(0, f_21 + delta * f_22 + zenith_rad * f_23)
-            
-            diff_circum = hor_radiation * f_1 * a / b
-            diff_horizon = hor_radiation * f_2 * math.sin(self.window_altitude_rad)
-    
-        else: #87.5 < zenith <  90:
-            f_1 = 0
-            diff_circum = 0
-            diff_horizon = 0
-    
-        return  diff_circum, diff_horizon, f_1
+        return perez.perez_hour(angle_incidence, sun_alt, norm_radiation, hor_radiation, self.window_altitude_rad)
     
     def calc_diffuse_irradiation(self, norm_radiation, hor_radiation, view_factor, sun_alt, angle_incidence):
         """
@@ -18,36 +18,9 @@ outputs (time resolved):
     - elec_gen: generated electricity
 """
 
+import conversion
 
-def main(htg_or_elec, loads, eta, htp, fuel_cost, fuel_emissions):
-
-    # horizon. get the shortest array, in case inputs are not consistent
-    horizon = len(loads)
-    if horizon > len(fuel_cost):
-        horizon = len(fuel_cost)
-    if horizon > len(fuel_emissions):
-        horizon = len(fuel_emissions)
-
-    # initialize empty arrays. Daren wants me to use .append
-    htg_gen = []
-    elec_gen = []
-    total_carbon = []
-    total_cost = []
-    fuel = []
 
-    # if we get heating loads in, we wanna know how much electricity is produced with the CHP
-    if htg_or_elec == "heating_in":
-        htg_gen = loads
-        for i in range(horizon):
-            elec_gen.append(htg_gen[i] * htp)
-    else:
-        elec_gen = loads
-        for i in range(horizon):
-            htg_gen.append(elec_gen[i] / htp)
-
-    for i in range(horizon):
-        fuel.append(elec_gen[i] / eta)
-        total_cost.append(fuel[i] * fuel_cost[i])
-        total_carbon.append(fuel[i] * fuel_emissions[i])
-
-    return total_cost, total_carbon, htg_gen, elec_gen
+def main(htg_or_elec, loads, eta, htp, fuel_cost, fuel_emissions):
+    # horizon: the shortest array, in case inputs are not consistent. see Core/conversion
+    return conversion.chp(htg_or_elec, loads, eta, htp, fuel_cost, fuel_emissions)
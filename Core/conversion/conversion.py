@@ -0,0 +1,311 @@
+# coding=utf-8
+"""
+Time resolved conversion technologies on aligned time series: boiler, CHP, chiller, air source heat pump, PV and
+solar thermal collector.
+
+Every input of a technology can be a time series (list, array('d'), ...) or a single number, which is used for every
+timestep, e.g. a constant efficiency or supply temperature. Series are aligned at their first value and cut to the
+shortest one (as the *_timeresolved components always did). Each technology returns lists, one value per timestep.
+
+screen() evaluates one technology for many variants at once, e.g. hundreds of heat pump parameter sets against the
+same 8760 hourly loads: the time series are broadcast once and every variant only overrides some parameters. The
+result is a V x T table, one row of outputs per variant. pv_surfaces is the same for the other axis: the PV yield of
+S surfaces (e.g. all faces of a facade mesh, with their irradiance from solar/obstructed_panel.read_results) under
+one ambient temperature, as S x T tables and aggregates in one pass.
+
+usage:
+    x_el, cop = ashp(q_th, 55.0, t_amb, 13.39, -0.047, 1.109, 0.012)
+    results = screen(ashp, [{'T_supply': t} for t in (35.0, 45.0, 55.0)], Q_th=q_th, T_amb=t_amb,
+                     pi_1=13.39, pi_2=-0.047, pi_3=1.109, pi_4=0.012)
+    x_el_35 = results[0][0]
+"""
+
+from __future__ import division
+
+import math
+
+
+def _is_series(value):
+    return hasattr(value, '__len__') and not isinstance(value, str)
+
+
+def horizon(*inputs):
+    """
+    :param inputs: time series or numbers
+    :return: length of the shortest time series, None if all inputs are numbers
+    """
+    lengths = [len(value) for value in inputs if _is_series(value)]
+    return min(lengths) if lengths else None
+
+
+def broadcast(value, length):
+    """
+    :param value: time series or number
+    :param length: number of timesteps
+    :return: list of length values
+    """
+    if _is_series(value):
+        return list(value[:length]) if len(value) != length else list(value)
+    return [value] * length
+
+
+def _align(*inputs):
+    length = horizon(*inputs)
+    if length is None:
+        length = 1
+    return [broadcast(value, length) for value in inputs]
+
+
+def boiler(heating_loads, carrier_cost, carrier_emissions, eta):
+    """
+    Boiler, time resolved (see combustion/boiler_timeresolved.py)
+    :param heating_loads: heating loads [kWh/h]
+    :param carrier_cost: cost of the energy carrier [CHF/kWh]
+    :param carrier_emissions: emissions of the energy carrier [kgCO2/kWh eq.]
+    :param eta: efficiency [-]
+    :return: cost [CHF/h], emissions [kgCO2eq./h]
+    """
+    heating_loads, carrier_cost, carrier_emissions, eta = _align(heating_loads, carrier_cost, carrier_emissions, eta)
+    fuel = [q * e for q, e in zip(heating_loads, eta)]
+    return [f * c for f, c in zip(fuel, carrier_cost)], [f * c for f, c in zip(fuel, carrier_emissions)]
+
+
+def chp(htg_or_elec, loads, eta, htp, fuel_cost, fuel_emissions):
+    """
+    Combined heat and power, time resolved (see combustion/chp_timeresolved.py)
+    :param htg_or_elec: 'heating_in' if loads are heating loads, else electricity loads
+    :param loads: heating or electricity loads [kWh/h]
+    :param eta: efficiency from gas to electricity [-]
+    :param htp: heat-to-power ratio [-]
+    :param fuel_cost: [CHF/kWh eq.]
+    :param fuel_emissions: [kgCO2/kWh eq.]
+    :return: cost, carbon, heating generation, electricity generation
+    """
+    loads, eta, htp, fuel_cost, fuel_emissions = _align(loads, eta, htp, fuel_cost, fuel_emissions)
+    if htg_or_elec == 'heating_in':
+        htg_gen = loads
+        elec_gen = [q * r for q, r in zip(htg_gen, htp)]
+    else:
+        elec_gen = loads
+        htg_gen = [e / r for e, r in zip(elec_gen, htp)]
+    fuel = [e / n for e, n in zip(elec_gen, eta)]
+    return [f * c for f, c in zip(fuel, fuel_cost)], [f * c for f, c in zip(fuel, fuel_emissions)], htg_gen, elec_gen
+
+
+# Eq. (A.8) in 10.1016/j.apenergy.2019.03.177
+CHILLER_AC = (638.95, 4.238, 100.0, 3.534)
+
+
+def chiller(clg_load, elec_cost, elec_emissions, temperature, ac=CHILLER_AC):
+    """
+    Chiller (air con), time resolved (see cooling/chiller_timeresolved.py)
+    :param clg_load: cooling loads [kWh]
+    :param elec_cost: electricity cost [CHF/kWh]
+    :param elec_emissions: electricity emissions [kgCO2/kWh eq.]
+    :param temperature: ambient temperature [°C]
+    :param ac: parameters ac_1 to ac_4 of Eq. (A.8)
+    :return: electricity loads [kWh], cost [CHF], emissions [kgCO2], COP [-]
+    """
+    clg_load, elec_cost, elec_emissions, temperature = _align(clg_load, elec_cost, elec_emissions, temperature)
+    ac_1, ac_2, ac_3, ac_4 = ac
+    cop = [(ac_1 - ac_2 * t) / (ac_3 + ac_4 * t) for t in temperature]
+    elec_load = [q / c for q, c in zip(clg_load, cop)]
+    return elec_load, [e * c for e, c in zip(elec_load, elec_cost)], \
+        [e * c for e, c in zip(elec_load, elec_emissions)], cop
+
+
+def ashp(Q_th, T_supply, T_amb, pi_1, pi_2, pi_3, pi_4):
+    """
+    Air source heat pump, Eq. (A.7) in 10.1016/j.apenergy.2019.03.177 (see heatpumps/ashp_timeresolved.py)
+    COP = pi_1 * exp(pi_2 * (T_supply - T_amb)) + pi_3 * exp(pi_4 * (T_supply - T_amb))
+    :param Q_th: heating loads [kW]
+    :param T_supply: supply temperature [°C]
+    :param T_amb: ambient air temperature [°C]
+    :param pi_1: parameters of the heat pump type [-]
+    :return: electricity demand [kW], COP [-]
+    """
+    Q_th, T_supply, T_amb, pi_1, pi_2, pi_3, pi_4 = _align(Q_th, T_supply, T_amb, pi_1, pi_2, pi_3, pi_4)
+    exp = math.exp
+    cop = [a * exp(b * (ts - ta)) + c * exp(d * (ts - ta))
+           for ts, ta, a, b, c, d in zip(T_supply, T_amb, pi_1, pi_2, pi_3, pi_4)]
+    return [q / c for q, c in zip(Q_th, cop)], cop
+
+
+def pv(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I):
+    """
+    PV yield with NOCT cell temperature (see solar_tech/noct_pv.py)
+    :param A: PV area [m2]
+    :param eta_PVref: reference PV efficiency under NOCT [-]
+    :param beta: temperature coefficient [-]
+    :param NOCT: nominal operating cell temperature [deg C]
+    :param NOCT_ref: reference temperature [deg C]
+    :param NOCT_sol: reference irradiance [W/m2]
+    :param T_amb: ambient temperature [deg C]
+    :param I: irradiance on the panel [W/m2]
+    :return: yield [Wh], efficiency [-]
+    """
+    A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I = _align(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol,
+                                                                    T_amb, I)
+    eta = [e * (1 - b * (t + ((n - n_ref) / n_sol) * i - 25))
+           for e, b, n, n_ref, n_sol, t, i in zip(eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I)]
+    return [a * e * i for a, e, i in zip(A, eta, I)], eta
+
+
+def _per_surface(name, value, surfaces):
+    # a number or a one-element list (e.g. a single value on a Grasshopper list input) is shared by all surfaces
+    if not _is_series(value):
+        return [value] * surfaces
+    if len(value) == 1:
+        return [value[0]] * surfaces
+    if len(value) != surfaces:
+        raise ValueError('%s has %i values, expected one per surface (%i) or a single value'
+                         % (name, len(value), surfaces))
+    return list(value)
+
+
+def pv_surfaces(I, T_amb, A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, efficiency=True):
+    """
+    PV yield of many surfaces under the same ambient temperature, e.g. every face of a facade mesh, same model as
+    pv(). The efficiency is linear in the irradiance, eta = eta_PVref * (1 - beta * (T_amb - 25)) - slope * I, with
+    the first term computed once per module type (eta_PVref, beta) and shared by all surfaces
+    :param I: irradiance on each surface [W/m2], S time series (S x T)
+    :param T_amb: ambient temperature [deg C], time series shared by all surfaces
+    :param A: area of each surface [m2], list of S values, or a number or one-element list for all surfaces. Same for
+    the module parameters. Other lengths raise a ValueError
+    :param efficiency: False to skip the S x T efficiencies, e.g. for layout screening
+    :return: dict with 'yield' [Wh] and 'efficiency' [-] (None if not asked for), S x T, 'total' yield of all
+    surfaces per timestep [Wh] and 'annual' yield of each surface [Wh]
+    """
+    surfaces = len(I)
+    length = horizon(T_amb, *I)
+    T_amb = broadcast(T_amb, length)
+    names = ('A', 'eta_PVref', 'beta', 'NOCT', 'NOCT_ref', 'NOCT_sol')
+    A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol = [_per_surface(name, value, surfaces) for name, value in
+                                                   zip(names, (A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol))]
+    base = {}
+    yields, efficiencies = [], []
+    for s in range(surfaces):
+        e, b = eta_PVref[s], beta[s]
+        if (e, b) not in base:
+            base[e, b] = [e * (1 - b * (t - 25)) for t in T_amb]
+        eta_t = base[e, b]
+        slope = e * b * (NOCT[s] - NOCT_ref[s]) / NOCT_sol[s]
+        irradiance = I[s] if len(I[s]) == length else I[s][:length]
+        if efficiency:
+            eta = [n - slope * i for n, i in zip(eta_t, irradiance)]
+            efficiencies.append(eta)
+            yields.append([A[s] * n * i for n, i in zip(eta, irradiance)])
+        else:
+            a = A[s]
+            yields.append([a * (n - slope * i) * i for n, i in zip(eta_t, irradiance)])
+    return {'yield': yields, 'efficiency': efficiencies if efficiency else None,
+            'total': [sum(column) for column in zip(*yields)] if yields else [0.0] * (length or 0),
+            'annual': [sum(y) for y in yields]}
+
+
+def solar_thermal(inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance, surface_area):
+    """
+    Solar thermal collector, Eq. (A.11) in 10.1016/j.apenergy.2019.03.177 (see
+    solar_tech/solar_thermal_timeresolved.py). Timesteps without irradiance have an efficiency of 0
+    :param inlet_temp: inlet temperature into the collector [°C]
+    :param ambient_temp: ambient air temperature at the collector [°C]
+    :param FRtaualpha: optical efficiency [-]
+    :param FRUL: heat loss coefficient [W/m2K]
+    :param irradiance: irradiance on the collector [W/m2]
+    :param surface_area: surface area of the collector [m2]
+    :return: heating energy [kWh], efficiency [-]
+    """
+    inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance, surface_area = _align(
+        inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance, surface_area)
+    eta = [max(0, fta - ful * (t_in - t_amb) / i) if i > 0 else 0.0
+           for t_in, t_amb, fta, ful, i in zip(inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance)]
+    return [i * e * a / 1000.0 for i, e, a in zip(irradiance, eta, surface_area)], eta
+
+
+def screen(technology, variants, **inputs):
+    """
+    Evaluates a technology for many variants
+    :param technology: one of the functions above
+    :param variants: list of dicts of inputs that differ between variants, e.g. [{'eta': 0.85}, {'eta': 0.9}]
+    :param inputs: inputs shared by all variants, time series or numbers
+    :return: list with the outputs of the technology for each variant
+    """
+    # shared series are cut to a common horizon once, not once per variant
+    length = horizon(*inputs.values())
+    if length is not None:
+        inputs = dict((name, broadcast(value, length) if _is_series(value) else value)
+                      for name, value in inputs.items())
+    results = []
+    for variant in variants:
+        arguments = dict(inputs)
+        arguments.update(variant)
+        results.append(technology(**arguments))
+    return results
+
+
+if __name__ == '__main__':
+    def test():
+        import time
+
+        hours = range(8760)
+        t_amb = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        loads = [max(0.0, 3.0 - 0.15 * t) for t in t_amb]
+        irradiance = [max(0.0, 800 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+
+        # same results as the loops of the *_timeresolved components
+        x_el, cop = ashp(loads, 55.0, t_amb, 13.39, -0.047, 1.109, 0.012)
+        for i in (0, 100, 5000):
+            expected = 13.39 * math.exp(-0.047 * (55.0 - t_amb[i])) + 1.109 * math.exp(0.012 * (55.0 - t_amb[i]))
+            assert abs(cop[i] - expected) < 1e-12 and abs(x_el[i] - loads[i] / expected) < 1e-12
+        cost, emissions = boiler(loads, 0.1, [0.2] * 10, 1.1)
+        assert len(cost) == 10 and abs(cost[3] - loads[3] * 1.1 * 0.1) < 1e-12
+        cost, carbon, htg_gen, elec_gen = chp('heating_in', [10.0, 20.0], 0.3, 0.5, 0.1, 0.2)
+        assert elec_gen == [5.0, 10.0] and abs(cost[1] - 10.0 / 0.3 * 0.1) < 1e-12
+        elec_load, cost, emissions, cop = chiller([10.0], 0.2, 0.1, [30.0])
+        assert abs(cop[0] - (638.95 - 4.238 * 30) / (100 + 3.534 * 30)) < 1e-12
+        yield_pv, eta_pv = pv(10.0, 0.16, 0.004, 45.0, 20.0, 800.0, [20.0], [1000.0])
+        assert abs(eta_pv[0] - 0.16 * (1 - 0.004 * (20 + 25 / 800.0 * 1000 - 25))) < 1e-12
+        heating, eta = solar_thermal([10.0, 4.0, 20.0], [-5.0, 2.0, 10.0], 0.68, 4.9, [890.0, 12.0, 0.0], 1.0)
+        assert eta[1:] == [0, 0.0] and abs(heating[0] - 890 * (0.68 - 4.9 * 15 / 890.0) / 1000) < 1e-12
+
+        # 500 heat pump variants against the same hourly loads
+        variants = [{'T_supply': 30.0 + 0.05 * v, 'pi_1': 13.39 * (0.9 + 0.0004 * v)} for v in range(500)]
+        t0 = time.time()
+        results = screen(ashp, variants, Q_th=loads, T_amb=t_amb, pi_2=-0.047, pi_3=1.109, pi_4=0.012)
+        t1 = time.time()
+        annual = [sum(x_el) for x_el, cop in results]
+        assert len(results) == 500 and len(results[0][0]) == 8760
+        assert abs(annual[42] - sum(ashp(loads, 32.1, t_amb, 13.39 * (0.9 + 0.0004 * 42), -0.047, 1.109,
+                                         0.012)[0])) < 1e-9
+
+        # 200 facade faces, two module types
+        faces = [[i * (0.3 + 0.7 * ((f * 7919) % 200) / 200.0) for i in irradiance] for f in range(200)]
+        areas = [0.5 + 0.01 * f for f in range(200)]
+        eta_ref = [0.16 if f % 2 else 0.19 for f in range(200)]
+        t2 = time.time()
+        separate = [pv(a, e, 0.004, 45.0, 20.0, 800.0, t_amb, face) for a, e, face in zip(areas, eta_ref, faces)]
+        t3 = time.time()
+        batch = pv_surfaces(faces, t_amb, areas, eta_ref, 0.004, 45.0, 20.0, 800.0)
+        t4 = time.time()
+        screening = pv_surfaces(faces, t_amb, areas, eta_ref, 0.004, 45.0, 20.0, 800.0, efficiency=False)
+        t5 = time.time()
+        for f in (0, 1, 57, 199):
+            assert all(abs(a - b) < 1e-9 for a, b in zip(batch['yield'][f], separate[f][0]))
+            assert all(abs(a - b) < 1e-12 for a, b in zip(batch['efficiency'][f], separate[f][1]))
+            assert abs(batch['annual'][f] - sum(separate[f][0])) < 1e-6
+        assert screening['efficiency'] is None and screening['annual'] == batch['annual']
+        assert abs(batch['total'][4000] - sum(y[4000] for y, eta in separate)) < 1e-6
+
+        # one-element lists are shared by all surfaces, other lengths that do not match are rejected
+        shared = pv_surfaces(faces[:3], t_amb, [2.0], [0.18], 0.004, 45.0, 20.0, 800.0)
+        assert shared['annual'] == pv_surfaces(faces[:3], t_amb, 2.0, 0.18, 0.004, 45.0, 20.0, 800.0)['annual']
+        try:
+            pv_surfaces(faces[:3], t_amb, [2.0, 3.0], 0.18, 0.004, 45.0, 20.0, 800.0)
+            raise AssertionError('two areas for three surfaces')
+        except ValueError:
+            pass
+        print('500 heat pump variants x 8760 hours in %.2fs, PV of 200 surfaces: %.2fs separately, %.2fs batched '
+              '(%.2fs without efficiencies)' % (t1 - t0, t3 - t2, t4 - t3, t5 - t4))
+
+
+    test()
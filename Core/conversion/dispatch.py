@@ -0,0 +1,470 @@
+# coding=utf-8
+"""
+Energy hub dispatch: which conversion technology serves which part of the hourly heating, cooling and electricity
+demand, at least cost or least carbon.
+
+A technology is dispatched per hour with an amount x [kWh/h] of the carrier it serves (its output of that carrier
+per unit of x is 1), between 0 and its capacity. Per unit of x it produces (> 0) or consumes (< 0) other carriers,
+e.g. a heat pump consumes 1 / COP electricity per kWh of heat, and it costs money and carbon. The technology helpers
+below take these coefficients from the time resolved models in conversion.py, so every coefficient, cost and
+capacity can change from hour to hour (COP over the outdoor temperature, PV yield, day and night tariffs).
+Technologies without a carrier are sinks, e.g. the grid export, which consumes electricity at a negative cost.
+
+Without storage the hours don't depend on each other, so the sparse 8760 x technologies LP splits into one small LP
+per hour: supply >= demand for each carrier (surplus is dumped, e.g. heat of a CHP), 0 <= x <= capacity.
+dispatch(..., method='lp') solves them with the bounded simplex below, starting every hour from the optimal basis
+of the hour before, which is mostly still optimal: a year of 10 technologies takes about a second, no LP solver has
+to be installed. method='merit_order' is a greedy screening mode: cooling, then heating is served by the technologies
+with the lowest cost per kWh, where electricity they consume or produce is valued at the price of the unlimited
+electricity sources (the grid), then the electricity demand left is served in the order of cost. It is exact for
+hubs without coupled carriers and otherwise an upper bound of the LP objective.
+
+Demands and dispatch are in kWh per hour, e.g. the heating_demand [W] of the RC model / 1000.
+
+usage:
+    hub = [grid(tariff, 0.13), export(0.08), pv(pv_yield), boiler(0.09, 0.2, 1.1),
+           ashp(55.0, t_amb, 13.39, -0.047, 1.109, 0.012, tariff, 0.13, capacity=8.0),
+           chiller(t_amb, tariff, 0.13)]
+    results = dispatch(hub, heating, cooling, electricity, objective='cost')
+    ashp_heat = results['ashp']
+"""
+
+from __future__ import division
+
+import conversion
+
+CARRIERS = ('heating', 'cooling', 'electricity')
+OBJECTIVES = ('cost', 'carbon')
+METHODS = ('lp', 'merit_order')
+
+_INF = float('inf')
+_EPS = 1e-9
+
+
+class Technology(object):
+    """
+    A technology of the energy hub, all values are time series or numbers (used for every hour)
+    """
+
+    def __init__(self, name, carrier, cost=0.0, carbon=0.0, capacity=None, **outputs):
+        """
+        :param name: name of the technology in the results, unique in the hub
+        :param carrier: carrier it is dispatched for, one of CARRIERS, or None for sinks (e.g. grid export)
+        :param cost: cost per kWh dispatched [CHF/kWh]
+        :param carbon: emissions per kWh dispatched [kgCO2eq./kWh]
+        :param capacity: maximum dispatch [kWh/h], None for unlimited
+        :param outputs: other carriers produced (> 0) or consumed (< 0) per kWh dispatched, e.g. electricity=-0.3
+        """
+        if carrier is not None and carrier not in CARRIERS:
+            raise ValueError('carrier must be one of %s or None, not %r' % (CARRIERS, carrier))
+        for other in outputs:
+            if other not in CARRIERS:
+                raise ValueError('unknown carrier %r of %s' % (other, name))
+        self.name = name
+        self.carrier = carrier
+        self.cost = cost
+        self.carbon = carbon
+        self.capacity = _INF if capacity is None else capacity
+        self.outputs = dict((c, outputs.get(c, 0.0)) for c in CARRIERS)
+        if carrier is not None:
+            self.outputs[carrier] = 1.0
+
+    def series(self, length):
+        """
+        :return: cost, carbon, capacity and one coefficient per carrier in CARRIERS, each a list of length values
+        """
+        values = [self.cost, self.carbon, self.capacity] + [self.outputs[c] for c in CARRIERS]
+        return [conversion.broadcast(value, length) for value in values]
+
+
+def grid(tariff, emissions, capacity=None, name='grid'):
+    """
+    Electricity import
+    :param tariff: [CHF/kWh]
+    :param emissions: [kgCO2eq./kWh]
+    """
+    return Technology(name, 'electricity', tariff, emissions, capacity)
+
+
+def export(feed_in, capacity=None, name='export'):
+    """
+    Electricity export, a sink with a negative cost
+    :param feed_in: feed-in tariff [CHF/kWh]
+    """
+    return Technology(name, None, [-f for f in feed_in] if conversion._is_series(feed_in) else -feed_in, 0.0,
+                      capacity, electricity=-1.0)
+
+
+def pv(pv_yield, name='pv'):
+    """
+    PV, curtailable, free and without emissions
+    :param pv_yield: electricity generation [kWh/h], e.g. conversion.pv(...)[0] / 1000
+    """
+    return Technology(name, 'electricity', 0.0, 0.0, pv_yield)
+
+
+def boiler(carrier_cost, carrier_emissions, eta, capacity=None, name='boiler'):
+    """
+    Boiler, cost and emissions per kWh of heat as in conversion.boiler
+    """
+    cost, carbon = conversion.boiler(1.0, carrier_cost, carrier_emissions, eta)
+    return Technology(name, 'heating', _value(cost, carrier_cost, carrier_emissions, eta),
+                      _value(carbon, carrier_cost, carrier_emissions, eta), capacity)
+
+
+def chp(eta, htp, fuel_cost, fuel_emissions, capacity=None, name='chp'):
+    """
+    Heat led combined heat and power, producing htp kWh of electricity per kWh of heat, see conversion.chp
+    :param capacity: maximum heat generation [kWh/h]
+    """
+    cost, carbon, htg_gen, elec_gen = conversion.chp('heating_in', 1.0, eta, htp, fuel_cost, fuel_emissions)
+    inputs = (eta, htp, fuel_cost, fuel_emissions)
+    return Technology(name, 'heating', _value(cost, *inputs), _value(carbon, *inputs), capacity,
+                      electricity=_value(elec_gen, *inputs))
+
+
+def ashp(T_supply, T_amb, pi_1, pi_2, pi_3, pi_4, elec_cost=0.0, elec_emissions=0.0, capacity=None, name='ashp'):
+    """
+    Air source heat pump consuming 1 / COP kWh of electricity per kWh of heat, see conversion.ashp. Its electricity
+    comes from the hub (grid, PV, CHP), elec_cost and elec_emissions are only for electricity paid on top of that
+    """
+    inputs = (T_supply, T_amb, pi_1, pi_2, pi_3, pi_4)
+    x_el, cop = conversion.ashp(1.0, *inputs)
+    return Technology(name, 'heating', elec_cost, elec_emissions, capacity,
+                      electricity=_value([-x for x in x_el], *inputs))
+
+
+def chiller(temperature, elec_cost=0.0, elec_emissions=0.0, capacity=None, ac=conversion.CHILLER_AC,
+            name='chiller'):
+    """
+    Chiller consuming 1 / COP kWh of electricity per kWh of cooling, see conversion.chiller and ashp
+    """
+    elec_load, cost, emissions, cop = conversion.chiller(1.0, 0.0, 0.0, temperature, ac)
+    return Technology(name, 'cooling', elec_cost, elec_emissions, capacity,
+                      electricity=_value([-e for e in elec_load], temperature))
+
+
+def _value(values, *inputs):
+    # a number if all inputs were numbers, so the technology can be used with any horizon
+    return values if conversion.horizon(*inputs) is not None else values[0]
+
+
+def _inverse(matrix):
+    """
+    Gauss-Jordan inverse of a small square matrix (list of rows), None if it is singular
+    """
+    n = len(matrix)
+    rows = [list(row) + [1.0 if i == j else 0.0 for j in range(n)] for i, row in enumerate(matrix)]
+    for k in range(n):
+        pivot = max(range(k, n), key=lambda i: abs(rows[i][k]))
+        if abs(rows[pivot][k]) < 1e-12:
+            return None
+        rows[k], rows[pivot] = rows[pivot], rows[k]
+        row_k = rows[k]
+        p = row_k[k]
+        for j in range(2 * n):
+            row_k[j] /= p
+        for i in range(n):
+            if i != k:
+                f = rows[i][k]
+                if f:
+                    row_i = rows[i]
+                    for j in range(k, 2 * n):
+                        row_i[j] -= f * row_k[j]
+    return [row[n:] for row in rows]
+
+
+def simplex(columns, cost, upper, b, basis, at_upper, max_iterations=200):
+    """
+    Bounded primal simplex for small LPs: minimize cost . x subject to sum_j columns[j] * x_j = b, 0 <= x <= upper.
+    Nonbasic variables are at 0 or at their upper bound, so bounds need no extra rows
+    :param columns: one tuple of m coefficients per variable
+    :param cost: cost per variable
+    :param upper: upper bound per variable, float('inf') for none
+    :param b: right hand side, m values
+    :param basis: m indices of the starting basis, which has to be primal feasible
+    :param at_upper: set of nonbasic variables at their upper bound
+    :return: x, optimal basis, set of nonbasic variables at their upper bound; None if the basis is singular or
+    infeasible
+    """
+    m = len(b)
+    basis = list(basis)
+    at_upper = set(at_upper)
+    for iteration in range(max_iterations):
+        b_inv = _inverse([[columns[j][i] for j in basis] for i in range(m)])
+        if b_inv is None:
+            return None
+        rhs = list(b)
+        for j in at_upper:
+            column, u = columns[j], upper[j]
+            for i in range(m):
+                rhs[i] -= column[i] * u
+        x_basis = [sum(b_inv[k][i] * rhs[i] for i in range(m)) for k in range(m)]
+        if iteration == 0:
+            for k, j in enumerate(basis):
+                if x_basis[k] < -1e-7 or x_basis[k] > upper[j] + 1e-7:
+                    return None
+        y = [sum(cost[j] * b_inv[k][i] for k, j in enumerate(basis)) for i in range(m)]
+
+        # entering variable, Dantzig's rule, Bland's rule against cycling in long runs
+        in_basis = set(basis)
+        entering, best = None, _EPS
+        for j, column in enumerate(columns):
+            if j in in_basis:
+                continue
+            d = cost[j] - sum(y[i] * column[i] for i in range(m))
+            if j in at_upper:
+                d = -d
+            elif upper[j] <= 0:
+                continue
+            if -d > best:
+                entering, best = j, -d
+                if iteration > 50:
+                    break
+        if entering is None:
+            x = [0.0] * len(columns)
+            for j in at_upper:
+                x[j] = upper[j]
+            for k, j in enumerate(basis):
+                x[j] = min(max(x_basis[k], 0.0), upper[j])
+            return x, basis, at_upper
+
+        # ratio test, direction +1 increases the entering variable from 0, -1 decreases it from its upper bound
+        direction = -1 if entering in at_upper else 1
+        column = columns[entering]
+        w = [direction * sum(b_inv[k][i] * column[i] for i in range(m)) for k in range(m)]
+        step, leaving, to_upper = upper[entering], None, False
+        for k, j in enumerate(basis):
+            if w[k] > _EPS:
+                limit = max(x_basis[k], 0.0) / w[k]
+                if limit < step:
+                    step, leaving, to_upper = limit, k, False
+            elif w[k] < -_EPS and upper[j] < _INF:
+                limit = max(upper[j] - x_basis[k], 0.0) / -w[k]
+                if limit < step:
+                    step, leaving, to_upper = limit, k, True
+        if step == _INF:
+            raise ValueError('unbounded dispatch, e.g. unlimited export at a feed-in tariff above the import tariff')
+        if leaving is None:
+            # bound flip, the basis stays the same
+            at_upper.symmetric_difference_update((entering,))
+            continue
+        at_upper.discard(entering)
+        if to_upper:
+            at_upper.add(basis[leaving])
+        basis[leaving] = entering
+    raise ValueError('simplex did not converge in %i iterations' % max_iterations)
+
+
+def _objective(technology_series, objective):
+    if objective not in OBJECTIVES:
+        raise ValueError('objective must be one of %s, not %r' % (OBJECTIVES, objective))
+    return [series[0] if objective == 'cost' else series[1] for series in technology_series]
+
+
+def _check(technologies):
+    names = [technology.name for technology in technologies]
+    if len(set(names)) != len(names):
+        raise ValueError('technology names must be unique: %s' % names)
+    for name in names:
+        if name in ('cost', 'carbon') or name.startswith('dump_'):
+            raise ValueError('%r is reserved for the results' % name)
+
+
+def _dispatch_lp(technologies, series, demands, objective, hours):
+    n = len(technologies)
+    m = len(CARRIERS)
+    weights = _objective(series, objective)
+    capacities = [s[2] for s in series]
+    coefficients = [s[3:] for s in series]
+
+    # variables: technologies, dump per carrier, artificial per carrier (big M, for hours the warm basis doesn't fit)
+    dumps = [tuple(-1.0 if i == k else 0.0 for i in range(m)) for k in range(m)]
+    big_m = 1e6 * (1 + max([abs(w) for weight in weights for w in weight] or [0.0]))
+    artificial = list(range(n + m, n + 2 * m))
+
+    x_hours = [[0.0] * hours for _ in range(n + m)]
+    basis, at_upper = None, set()
+    for t in range(hours):
+        b = [demand[t] for demand in demands]
+        columns = [tuple(c[t] for c in coefficient) for coefficient in coefficients] + dumps + \
+            [tuple((1.0 if b[k] >= 0 else -1.0) if i == k else 0.0 for i in range(m)) for k in range(m)]
+        cost = [weight[t] for weight in weights] + [0.0] * m + [big_m] * m
+        upper = [capacity[t] for capacity in capacities] + [_INF] * (2 * m)
+        solution = None
+        if basis is not None:
+            solution = simplex(columns, cost, upper, b, basis, [j for j in at_upper if upper[j] < _INF])
+        if solution is None:
+            solution = simplex(columns, cost, upper, b, artificial, ())
+        x, basis, at_upper = solution
+        if any(x[j] > 1e-6 * (1 + max(abs(v) for v in b)) for j in artificial):
+            raise ValueError('demand can not be met in hour %i, the capacities are too small' % t)
+        for j in range(n + m):
+            x_hours[j][t] = x[j]
+    return x_hours
+
+
+def _dispatch_merit_order(technologies, series, demands, objective, hours):
+    n = len(technologies)
+    weights = _objective(series, objective)
+    capacities = [s[2] for s in series]
+    coefficients = [s[3:] for s in series]
+    electricity = CARRIERS.index('electricity')
+    by_carrier = dict((carrier, [j for j in range(n) if technologies[j].carrier == carrier]) for carrier in CARRIERS)
+    sinks = [j for j in range(n) if technologies[j].carrier is None]
+    unlimited = [j for j in by_carrier['electricity'] if all(c == _INF for c in capacities[j])]
+
+    x_hours = [[0.0] * hours for _ in range(n + len(CARRIERS))]
+    for t in range(hours):
+        need = [demand[t] for demand in demands]
+        price = min([weights[j][t] for j in unlimited]) if unlimited else 0.0
+        for carrier in ('cooling', 'heating', 'electricity'):
+            c = CARRIERS.index(carrier)
+            if c == electricity:
+                ranked = sorted(by_carrier[carrier], key=lambda j: weights[j][t])
+            else:
+                ranked = sorted(by_carrier[carrier],
+                                key=lambda j: weights[j][t] - coefficients[j][electricity][t] * price)
+            for j in ranked:
+                if need[c] <= _EPS:
+                    break
+                x = min(need[c], capacities[j][t])
+                x_hours[j][t] = x
+                for k in range(len(CARRIERS)):
+                    need[k] -= coefficients[j][k][t] * x
+            if need[c] > 1e-6 * (1 + demands[c][t]):
+                raise ValueError('%s demand can not be met in hour %i, the capacities are too small' % (carrier, t))
+
+        # electricity surplus to the sinks, then cheap electricity to sinks that pay for it (e.g. export)
+        surplus = -need[electricity]
+        # sinks by their cost per kWh of electricity taken up
+        ranked_sinks = sorted(sinks, key=lambda j: weights[j][t] / -coefficients[j][electricity][t])
+        for j in ranked_sinks:
+            if surplus <= _EPS:
+                break
+            x = min(surplus / -coefficients[j][electricity][t], capacities[j][t])
+            x_hours[j][t] += x
+            surplus += coefficients[j][electricity][t] * x
+        sources = sorted(by_carrier['electricity'], key=lambda j: weights[j][t])
+        for j in ranked_sinks:
+            for i in sources:
+                value = weights[i][t] + weights[j][t] / -coefficients[j][electricity][t]
+                if value >= -_EPS:
+                    break
+                x = min(capacities[i][t] - x_hours[i][t],
+                        (capacities[j][t] - x_hours[j][t]) * -coefficients[j][electricity][t])
+                if x == _INF:
+                    raise ValueError('unbounded dispatch, e.g. unlimited export at a feed-in tariff above the '
+                                     'import tariff')
+                if x > _EPS:
+                    x_hours[i][t] += x
+                    x_hours[j][t] += x / -coefficients[j][electricity][t]
+        for k in range(len(CARRIERS)):
+            x_hours[n + k][t] = max(0.0, -need[k]) if k != electricity else max(0.0, surplus)
+    return x_hours
+
+
+def dispatch(technologies, heating=0.0, cooling=0.0, electricity=0.0, objective='cost', method='lp'):
+    """
+    Hourly dispatch of the energy hub
+    :param technologies: list of Technology, e.g. from the helpers above
+    :param heating: heating demand [kWh/h], time series or number. Same for cooling and electricity (the demand of
+    the building, without heat pumps and chillers of the hub)
+    :param objective: 'cost' or 'carbon', what is minimized
+    :param method: 'lp' for the optimal dispatch, 'merit_order' for the greedy screening dispatch
+    :return: dict with the dispatch [kWh/h] per technology name, the surplus dumped per carrier as 'dump_heating',
+    'dump_cooling' and 'dump_electricity', and the 'cost' [CHF/h] and 'carbon' [kgCO2eq./h] per hour
+    """
+    if method not in METHODS:
+        raise ValueError('method must be one of %s, not %r' % (METHODS, method))
+    _check(technologies)
+    technology_inputs = [value for technology in technologies
+                         for value in [technology.cost, technology.carbon, technology.capacity] +
+                         list(technology.outputs.values())]
+    hours = conversion.horizon(heating, cooling, electricity, *technology_inputs)
+    if hours is None:
+        hours = 1
+    demands = [conversion.broadcast(demand, hours) for demand in (heating, cooling, electricity)]
+    series = [technology.series(hours) for technology in technologies]
+
+    solve = _dispatch_lp if method == 'lp' else _dispatch_merit_order
+    x_hours = solve(technologies, series, demands, objective, hours)
+
+    results = dict((technology.name, x) for technology, x in zip(technologies, x_hours))
+    for k, carrier in enumerate(CARRIERS):
+        results['dump_' + carrier] = x_hours[len(technologies) + k]
+    for name, index in (('cost', 0), ('carbon', 1)):
+        results[name] = [sum(s[index][t] * x[t] for s, x in zip(series, x_hours) if x[t])
+                         for t in range(hours)]
+    return results
+
+
+if __name__ == '__main__':
+    def test():
+        import math
+        import time
+
+        hours = range(8760)
+        t_amb = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        irradiance = [max(0.0, 800 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) for h in hours]
+        heating = [max(0.0, 12.0 - 0.6 * t) for t in t_amb]
+        cooling = [max(0.0, 0.8 * (t - 20)) for t in t_amb]
+        electricity = [2.0 + 1.5 * (8 <= h % 24 <= 20) for h in hours]
+        tariff = [0.25 if 7 <= h % 24 <= 20 else 0.15 for h in hours]
+        pv_yield = [y / 1000 for y in conversion.pv(40.0, 0.16, 0.004, 45.0, 20.0, 800.0, t_amb, irradiance)[0]]
+
+        def hub():
+            return [grid(tariff, 0.13), export(0.08), pv(pv_yield),
+                    boiler(0.09, 0.23, 1.1, name='gas boiler'), boiler(0.28, 0.0, 1.0, name='electric heater'),
+                    chp(0.3, 0.6, 0.09, 0.23, capacity=3.0),
+                    ashp(55.0, t_amb, 13.39, -0.047, 1.109, 0.012, capacity=6.0),
+                    ashp(35.0, t_amb, 13.39, -0.047, 1.109, 0.012, capacity=2.0, name='floor heating ashp'),
+                    chiller(t_amb, capacity=4.0), chiller(t_amb, ac=(500.0, 4.238, 100.0, 3.534), name='old chiller')]
+
+        # a single hour: the heat pump is cheaper than the boiler as long as the tariff / COP is lower than the gas
+        x_el, cop = conversion.ashp(1.0, 55.0, 5.0, 13.39, -0.047, 1.109, 0.012)
+        for price in (0.05, 0.5):
+            one_hour = dispatch([grid(price, 0.1), boiler(0.09, 0.2, 1.0), ashp(55.0, 5.0, 13.39, -0.047, 1.109, 0.012)],
+                                heating=10.0)
+            expected = 'ashp' if price / cop[0] < 0.09 else 'boiler'
+            assert abs(one_hour[expected][0] - 10.0) < 1e-9 and abs(one_hour['grid'][0] - (
+                10.0 * x_el[0] if expected == 'ashp' else 0.0)) < 1e-9
+
+        # a sink taking 1.1 kWh per unit is worth its tariff / 1.1 per kWh: no grid arbitrage at 0.1 / 1.1 < 0.1,
+        # and a PV surplus goes to the plain export first at 0.085 / 1.1 < 0.08
+        for method in ('lp', 'merit_order'):
+            lossy = Technology('lossy export', None, -0.1, 0.0, 5.0, electricity=-1.1)
+            one_hour = dispatch([grid(0.1, 0.1), lossy], electricity=1.0, method=method)
+            assert abs(one_hour['grid'][0] - 1.0) < 1e-9 and abs(one_hour['lossy export'][0]) < 1e-9
+            lossy = Technology('lossy export', None, -0.085, 0.0, None, electricity=-1.1)
+            one_hour = dispatch([grid(0.25, 0.1), pv(3.0), export(0.08, capacity=1.5), lossy], electricity=1.0,
+                                method=method)
+            assert abs(one_hour['export'][0] - 1.5) < 1e-9
+            assert abs(one_hour['lossy export'][0] - 0.5 / 1.1) < 1e-9 and abs(one_hour['grid'][0]) < 1e-9
+
+        t0 = time.time()
+        lp = dispatch(hub(), heating, cooling, electricity)
+        t1 = time.time()
+        greedy = dispatch(hub(), heating, cooling, electricity, method='merit_order')
+        t2 = time.time()
+        carbon = dispatch(hub(), heating, cooling, electricity, objective='carbon')
+
+        # demand met every hour, with the technologies' own consumption
+        technologies = hub()
+        for results in (lp, greedy, carbon):
+            for k, (carrier, demand) in enumerate(zip(CARRIERS, (heating, cooling, electricity))):
+                coefficients = [conversion.broadcast(technology.outputs[carrier], 8760) for technology in technologies]
+                for t in range(0, 8760, 7):
+                    supply = sum(c[t] * results[technology.name][t] for c, technology in zip(coefficients, technologies))
+                    assert abs(supply - results['dump_' + carrier][t] - demand[t]) < 1e-6, (carrier, t)
+            for technology in technologies:
+                capacity = conversion.broadcast(technology.capacity, 8760)
+                assert all(-1e-9 <= x <= c + 1e-9 for x, c in zip(results[technology.name], capacity))
+        assert sum(lp['cost']) <= sum(greedy['cost']) + 1e-6 and sum(carbon['carbon']) <= sum(lp['carbon']) + 1e-6
+        print('8760 hours x %i technologies: LP in %.2fs (%.0f CHF, %.0f kgCO2), merit order in %.2fs (%.0f CHF), '
+              'least carbon %.0f kgCO2'
+              % (len(technologies), t1 - t0, sum(lp['cost']), sum(lp['carbon']), t2 - t1, sum(greedy['cost']),
+                 sum(carbon['carbon'])))
+
+
+    test()
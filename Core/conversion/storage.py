@@ -0,0 +1,263 @@
+# coding=utf-8
+"""
+Storage on aligned time series: battery and hot water tank, and sizing sweeps over many capacities.
+
+All storages are propagated in stored energy [kWh]. charge_flow turns a surplus (> 0, e.g. PV yield minus the
+electricity demand) or deficit (< 0) per hour into the flow into or out of the storage, after the charging and
+discharging efficiencies and power limits. These don't depend on the state of charge, so they are computed once per
+time series and shared by all capacities. state_of_charge then propagates the state of charge hour by hour, cut at
+0 and at the capacity, with the losses of the storage: a fraction of the content per hour (self_discharge) and a
+constant loss per hour (standing_loss).
+
+sweep evaluates the same flows for many capacities, e.g. thousands of battery sizes. Without losses, consecutive
+hours of charging (or discharging) can be summed up beforehand, as min(C, min(C, s + a) + b) = min(C, s + a + b) for
+a, b >= 0: a year of hourly PV surplus collapses to about two runs per day, so each capacity takes a few hundred
+steps instead of 8760. With losses every hour has to be propagated.
+
+usage:
+    pv_yield = [y / 1000 for y in noct_pv.pv_yield(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I)[0]]
+    results = battery(pv_yield, electricity_demand, 10.0)
+    self_consumption = sum(results['discharge'])
+    flow = charge_flow([p - d for p, d in zip(pv_yield, electricity_demand)], 0.95, 0.95)
+    sizes = sweep(flow, [0.5 * c for c in range(1, 2001)])
+"""
+
+from __future__ import division
+
+import conversion
+
+# water: density [kg/m3] * heat capacity [kJ/kgK] / 3600 [kJ/kWh]
+WATER_KWH_PER_M3K = 1000 * 4.18 / 3600
+
+
+def charge_flow(surplus, eta_charge=1.0, eta_discharge=1.0, charge_power=None, discharge_power=None):
+    """
+    Flow into the storage per hour if it could take and deliver everything
+    :param surplus: surplus (> 0) or deficit (< 0) per hour [kWh/h], e.g. PV yield minus electricity demand
+    :param eta_charge: charging efficiency [-], stored energy per kWh of surplus
+    :param eta_discharge: discharging efficiency [-], kWh delivered per kWh of stored energy
+    :param charge_power: maximum charging [kWh/h] taken from the surplus, None for unlimited
+    :param discharge_power: maximum discharging [kWh/h] delivered, None for unlimited
+    :return: flow into (> 0) or out of (< 0) the storage per hour, in stored energy [kWh]
+    """
+    charge_power = float('inf') if charge_power is None else charge_power
+    discharge_power = float('inf') if discharge_power is None else discharge_power
+    return [eta_charge * min(s, charge_power) if s > 0 else -min(-s, discharge_power) / eta_discharge if s < 0
+            else 0.0 for s in surplus]
+
+
+def state_of_charge(flow, capacity, soc_init=0.0, self_discharge=0.0, standing_loss=0.0):
+    """
+    Propagates the state of charge. Losses are taken at the start of each hour, then the flow
+    :param flow: flow into (> 0) or out of (< 0) the storage per hour [kWh], see charge_flow
+    :param capacity: usable capacity [kWh]
+    :param soc_init: state of charge before the first hour [kWh]
+    :param self_discharge: fraction of the content lost per hour [-]
+    :param standing_loss: loss per hour [kWh/h], time series or number
+    :return: state of charge at the end of each hour [kWh], flow actually stored (> 0) or taken (< 0) per hour [kWh]
+    """
+    length = len(flow)
+    keep = 1 - self_discharge
+    losses = conversion.broadcast(standing_loss, length)
+    soc = [0.0] * length
+    taken = [0.0] * length
+    s = min(max(soc_init, 0.0), capacity)
+    for t, f in enumerate(flow):
+        s = s * keep - losses[t]
+        if s < 0:
+            s = 0.0
+        s_next = s + f
+        if s_next > capacity:
+            s_next = capacity
+        elif s_next < 0:
+            s_next = 0.0
+        taken[t] = s_next - s
+        soc[t] = s = s_next
+    return soc, taken
+
+
+def _runs(flow):
+    # sums of consecutive charging and discharging hours, hours without flow don't split a run
+    runs = []
+    current = 0.0
+    for f in flow:
+        if not f:
+            continue
+        if current and (f > 0) != (current > 0):
+            runs.append(current)
+            current = f
+        else:
+            current += f
+    if current:
+        runs.append(current)
+    return runs
+
+
+def sweep(flow, capacities, soc_init=0.0, self_discharge=0.0, standing_loss=0.0):
+    """
+    Energy stored and taken over the whole horizon, for many capacities
+    :param flow: flow per hour [kWh], see charge_flow
+    :param capacities: usable capacities [kWh]
+    :param soc_init: state of charge before the first hour, as a fraction of the capacity [-]
+    :return: dict with 'charged' and 'discharged', stored and taken energy [kWh] per capacity. Multiply by
+    1 / eta_charge and eta_discharge for the surplus used and the energy delivered
+    """
+    charged, discharged = [], []
+    if not self_discharge and not any(conversion.broadcast(standing_loss, len(flow))):
+        runs = _runs(flow)
+        for capacity in capacities:
+            s = s_init = soc_init * capacity
+            total_in = 0.0
+            for r in runs:
+                if r > 0:
+                    s_next = s + r
+                    if s_next > capacity:
+                        s_next = capacity
+                    total_in += s_next - s
+                else:
+                    s_next = s + r
+                    if s_next < 0:
+                        s_next = 0.0
+                s = s_next
+            charged.append(total_in)
+            # nothing is lost: what went in and is not left went out
+            discharged.append(total_in + s_init - s)
+    else:
+        for capacity in capacities:
+            soc, taken = state_of_charge(flow, capacity, soc_init * capacity, self_discharge, standing_loss)
+            charged.append(sum(f for f in taken if f > 0))
+            discharged.append(-sum(f for f in taken if f < 0))
+    return {'charged': charged, 'discharged': discharged}
+
+
+def _delivered(surplus, taken, eta_charge, eta_discharge):
+    charge = [f / eta_charge if f > 0 else 0.0 for f in taken]
+    discharge = [-f * eta_discharge if f < 0 else 0.0 for f in taken]
+    shortfall = [max(0.0, -s) - d for s, d in zip(surplus, discharge)]
+    excess = [max(0.0, s) - c for s, c in zip(surplus, charge)]
+    return charge, discharge, shortfall, excess
+
+
+def battery(pv_yield, demand, capacity, eta_charge=0.95, eta_discharge=0.95, charge_power=None,
+            discharge_power=None, self_discharge=0.0001, soc_init=0.0):
+    """
+    Battery charged with the PV surplus, discharged when the demand is higher than the PV yield
+    :param pv_yield: PV generation [kWh/h], e.g. noct_pv.pv_yield(...)[0] / 1000, time series
+    :param demand: electricity demand [kWh/h], time series or number
+    :param capacity: usable capacity [kWh]
+    :param eta_charge: charging efficiency [-]
+    :param eta_discharge: discharging efficiency [-]
+    :param charge_power: maximum charging [kWh/h], None for unlimited
+    :param discharge_power: maximum discharging [kWh/h], None for unlimited
+    :param self_discharge: fraction of the content lost per hour [-]
+    :param soc_init: state of charge before the first hour [kWh]
+    :return: dict of time series: 'soc' [kWh] at the end of each hour, 'charge' from PV, 'discharge' delivered,
+    'import' and 'export' from and to the grid [kWh/h]
+    """
+    length = conversion.horizon(pv_yield, demand)
+    surplus = [p - d for p, d in zip(conversion.broadcast(pv_yield, length), conversion.broadcast(demand, length))]
+    flow = charge_flow(surplus, eta_charge, eta_discharge, charge_power, discharge_power)
+    soc, taken = state_of_charge(flow, capacity, soc_init, self_discharge)
+    charge, discharge, grid_import, grid_export = _delivered(surplus, taken, eta_charge, eta_discharge)
+    return {'soc': soc, 'charge': charge, 'discharge': discharge, 'import': grid_import, 'export': grid_export}
+
+
+def tank_capacity(volume, t_min, t_max):
+    """
+    :param volume: water volume [m3]
+    :param t_min: lowest usable temperature [°C], e.g. the supply temperature
+    :param t_max: highest temperature [°C]
+    :return: usable capacity [kWh]
+    """
+    return WATER_KWH_PER_M3K * volume * (t_max - t_min)
+
+
+def hot_water_tank(heat_surplus, heat_demand, volume, t_min=45.0, t_max=65.0, ua=2.0, t_ambient=20.0,
+                   charge_power=None, discharge_power=None, soc_init=0.0):
+    """
+    Fully mixed hot water tank between t_min (empty) and t_max (full), losing ua * (T - t_ambient) to its room.
+    Charged with surplus heat, e.g. from solar thermal collectors or PV surplus through a heat pump
+    (pv surplus * COP), discharged for the heat demand
+    :param heat_surplus: heat available for charging [kWh/h], time series or number
+    :param heat_demand: heat demand [kWh/h], time series or number
+    :param volume: water volume [m3]
+    :param t_min: tank temperature when empty [°C]
+    :param t_max: tank temperature when full [°C]
+    :param ua: heat loss coefficient of the tank [W/K]
+    :param t_ambient: temperature around the tank [°C], time series or number
+    :param soc_init: state of charge before the first hour [kWh]
+    :return: dict of time series: 'soc' [kWh] and 'temperature' [°C] at the end of each hour, 'charge' and
+    'discharge' [kWh/h], 'backup' heat demand not covered by the tank and 'unused' surplus heat [kWh/h]
+    """
+    length = conversion.horizon(heat_surplus, heat_demand, t_ambient) or 1
+    heat_surplus, heat_demand, t_ambient = [conversion.broadcast(v, length)
+                                            for v in (heat_surplus, heat_demand, t_ambient)]
+    capacity = tank_capacity(volume, t_min, t_max)
+    # losses ua * (t_min + (t_max - t_min) * soc / capacity - t_ambient): a fraction of the content and a constant
+    self_discharge = ua * (t_max - t_min) / 1000.0 / capacity if capacity else 0.0
+    standing_loss = [ua * (t_min - t) / 1000.0 for t in t_ambient]
+    surplus = [s - d for s, d in zip(heat_surplus, heat_demand)]
+    flow = charge_flow(surplus, 1.0, 1.0, charge_power, discharge_power)
+    soc, taken = state_of_charge(flow, capacity, soc_init, self_discharge, standing_loss)
+    charge, discharge, backup, unused = _delivered(surplus, taken, 1.0, 1.0)
+    temperature = [t_min + (t_max - t_min) * s / capacity if capacity else t_min for s in soc]
+    return {'soc': soc, 'temperature': temperature, 'charge': charge, 'discharge': discharge, 'backup': backup,
+            'unused': unused}
+
+
+if __name__ == '__main__':
+    def test():
+        import math
+        import time
+
+        hours = range(8760)
+        t_amb = [8 - 12 * math.cos(2 * math.pi * h / 8760) + 5 * math.sin(2 * math.pi * h / 24) for h in hours]
+        irradiance = [max(0.0, 800 * math.sin(2 * math.pi * (h % 24 - 6) / 24)) *
+                      (0.4 + 0.6 * abs(math.sin(h / 37.0))) for h in hours]
+        pv_yield = [y / 1000 for y in conversion.pv(30.0, 0.16, 0.004, 45.0, 20.0, 800.0, t_amb, irradiance)[0]]
+        demand = [0.3 + 0.5 * (7 <= h % 24 <= 9) + 0.8 * (18 <= h % 24 <= 22) for h in hours]
+
+        # without capacity everything goes to and comes from the grid
+        empty = battery(pv_yield, demand, 0.0)
+        assert all(abs(i - max(0.0, d - p)) < 1e-12 for i, d, p in zip(empty['import'], demand, pv_yield))
+        results = battery(pv_yield, demand, 10.0, charge_power=3.0)
+        assert max(results['soc']) <= 10.0 and min(results['soc']) >= 0.0
+        assert max(results['charge']) <= 3.0 + 1e-12
+        assert sum(results['import']) < sum(empty['import'])
+        for t in (1000, 4000, 6000):
+            balance = pv_yield[t] + results['import'][t] + results['discharge'][t] - results['charge'][t] - \
+                results['export'][t]
+            assert abs(balance - demand[t]) < 1e-9
+
+        # the runs of the lossless sweep are the hourly propagation
+        flow = charge_flow([p - d for p, d in zip(pv_yield, demand)], 0.95, 0.95, 3.0, 2.5)
+        capacities = [0.01 * c for c in range(1, 3001)]
+        t0 = time.time()
+        sizes = sweep(flow, capacities)
+        t1 = time.time()
+        for i in (0, 99, 999, 2999):
+            soc, taken = state_of_charge(flow, capacities[i])
+            assert abs(sizes['charged'][i] - sum(f for f in taken if f > 0)) < 1e-6
+            assert abs(sizes['discharged'][i] + sum(f for f in taken if f < 0)) < 1e-6
+        assert all(a <= b + 1e-9 for a, b in zip(sizes['discharged'], sizes['discharged'][1:]))
+        t2 = time.time()
+        lossy = sweep(flow, capacities[::10], self_discharge=0.0001)
+        t3 = time.time()
+        assert all(a <= b + 1e-9 for a, b in zip(lossy['discharged'], sizes['discharged'][::10]))
+
+        # a tank charged by a heat pump running on the PV surplus, cooling down to the room
+        cop = conversion.ashp(1.0, 60.0, t_amb, 13.39, -0.047, 1.109, 0.012)[1]
+        heat_surplus = [max(0.0, p - d) * c for p, d, c in zip(pv_yield, demand, cop)]
+        heat_demand = [0.4 + 1.5 * (h % 24 in (7, 19, 20)) for h in hours]
+        tank = hot_water_tank(heat_surplus, heat_demand, 0.8)
+        assert all(45.0 - 1e-9 <= t <= 65.0 + 1e-9 for t in tank['temperature'])
+        idle = hot_water_tank(0.0, 0.0, 0.8, soc_init=tank_capacity(0.8, 45.0, 65.0), t_ambient=20.0)
+        cooled = hot_water_tank([0.0] * 24, 0.0, 0.8, soc_init=tank_capacity(0.8, 45.0, 65.0))['temperature']
+        expected = 20 + 45 * math.exp(-2.0 * 3600 / (1000 * 4180 * 0.8))
+        assert abs(idle['temperature'][0] - expected) < 0.01 and cooled[-1] < cooled[0]
+        print('%i capacities x 8760 hours in %.2fs, %i with self discharge in %.2fs, tank covers %.0f%% of the heat'
+              % (len(capacities), t1 - t0, len(capacities[::10]), t3 - t2,
+                 100 * sum(tank['discharge']) / sum(heat_demand)))
+
+
+    test()
@@ -0,0 +1,270 @@
+# coding=utf-8
+"""
+Binary columnar cache for .epw weather files.
+
+The first time an .epw file is read, every field is parsed once and written to a cache file with one float64
+column per EPW field plus the LOCATION header. Subsequent reads memory-map the cache file, so no text is parsed
+and (on CPython 3) the columns are zero-copy views into the mapped file.
+
+Cache files are keyed by absolute path, modification time and size of the .epw file. Editing or replacing the
+weather file therefore never returns stale data, it just produces a new cache file.
+
+Cache file layout (native byte order, recorded in the header):
+[0] magic b'HIVEEPW1'
+[1] header length, uint32
+[2] header, utf-8 json: {"location": [...], "fields": [...], "rows": 8760, "byteorder": "little"}
+[3] zero padding up to a multiple of 8 bytes
+[4] one float64 column per field, each `rows` values long, in the order of "fields"
+
+Non-numeric fields (e.g. the data source flags in column [5]) are stored as NaN.
+"""
+
+from __future__ import division
+import array
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+# column names of an .epw data row, same order as in the file. See epw_reader.py for units.
+FIELDS = ('year', 'month', 'day', 'hour', 'minute', 'datasource',
+          'drybulb', 'dewpoint', 'rh', 'atmos_pressure',
+          'exthorrad', 'extdirrad', 'horirsky', 'ghi', 'dni', 'dhi',
+          'glohorillum', 'dirnorillum', 'difhorillum', 'zenlum',
+          'winddir', 'windspd', 'totskycvr', 'opaqskycvr', 'visibility', 'ceiling_hgt',
+          'presweathobs', 'presweathcodes', 'precip_wtr', 'aerosol_opt_depth',
+          'snowdepth', 'days_since_last_snow', 'albedo', 'liq_precip_depth', 'liq_precip_rate')
+
+MAGIC = b'HIVEEPW1'
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'hive_epw_cache')
+
+# weather files already opened by this process, keyed by cache file path
+_opened = {}
+
+
+class EpwData(object):
+    """
+    Columns of an .epw file. Index with a field name from FIELDS, e.g. epw['drybulb'], to get a sequence of
+    floats (a memoryview or array.array('d')) with one value per row of the weather file.
+    """
+
+    def __init__(self, location, fields, rows, columns, buffer=None):
+        self.location = location  # LOCATION row as list of strings, see epw_reader.py
+        self.fields = fields
+        self.rows = rows
+        self._columns = columns
+        self._buffer = buffer  # keeps the file and mmap alive as long as the columns are used
+
+    def __getitem__(self, field):
+        return self._columns[field]
+
+    def __contains__(self, field):
+        return field in self._columns
+
+
+def cache_path(epw_path, cache_dir=None):
+    """
+    Path of the cache file for an .epw file, derived from its absolute path, modification time and size
+    :param epw_path: path to the .epw file
+    :param cache_dir: folder for cache files. Default is 'hive_epw_cache' in the system temp folder
+    :return: path of the cache file (which might not exist yet)
+    """
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    epw_path = os.path.abspath(epw_path)
+    stat = os.stat(epw_path)
+    key = '%s|%r|%i|%i' % (epw_path, stat.st_mtime, stat.st_size, CACHE_VERSION)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, digest + '.epwc')
+
+
+def load(epw_path, cache_dir=None):
+    """
+    Returns the contents of an .epw file, using (and if necessary creating) the binary cache
+    :param epw_path: path to the .epw file
+    :param cache_dir: folder for cache files. Default is 'hive_epw_cache' in the system temp folder
+    :return: EpwData
+    """
+    cache_file = cache_path(epw_path, cache_dir)
+    if cache_file in _opened:
+        return _opened[cache_file]
+
+    epw = None
+    if os.path.exists(cache_file):
+        epw = open_cache(cache_file)
+    if epw is None:
+        location, columns = parse_epw(epw_path)
+        try:
+            write_cache(cache_file, location, columns)
+            epw = open_cache(cache_file)
+        except (IOError, OSError):
+            # e.g. read-only temp folder. not worth failing for, just don't cache
+            epw = None
+        if epw is None:
+            epw = EpwData(location, FIELDS, len(columns[0]), dict(zip(FIELDS, columns)))
+    _opened[cache_file] = epw
+    return epw
+
+
+def load_if_cached(epw_path, cache_dir=None):
+    """
+    Like load, but never parses the .epw file
+    :return: EpwData, or None if there is no cache file for the .epw file yet
+    """
+    cache_file = cache_path(epw_path, cache_dir)
+    if cache_file in _opened:
+        return _opened[cache_file]
+    if not os.path.exists(cache_file):
+        return None
+    epw = open_cache(cache_file)
+    if epw is not None:
+        _opened[cache_file] = epw
+    return epw
+
+
+def parse_value(value):
+    """
+    :param value: one cell of an .epw data row
+    :return: float, NaN for non-numeric cells (e.g. the data source flags)
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+
+def parse_epw(epw_path):
+    """
+    Parses all rows of an .epw file
+    :param epw_path: path to the .epw file
+    :return: LOCATION row (list of strings), list with one array.array('d') per field in FIELDS
+    """
+    location = None
+    columns = [array.array('d') for _ in FIELDS]
+    nan = float('nan')
+    num_fields = len(FIELDS)
+    with open(epw_path) as epwfile:
+        for line in epwfile:
+            if not line[:1].isdigit():
+                # still parsing header portion of epw file
+                if line.startswith('LOCATION'):
+                    location = [cell.strip() for cell in next(csv.reader([line]))]
+                continue
+            row = line.rstrip().split(',', num_fields)
+            for column, value in zip(columns, row):
+                column.append(parse_value(value))
+            for i in range(len(row), num_fields):
+                columns[i].append(nan)
+
+    # let's just be sure we actually read an .epw file with a LOCATION entry
+    assert location is not None, 'No LOCATION entry in %s' % epw_path
+    return location, columns
+
+
+def write_cache(cache_file, location, columns):
+    """
+    Writes parsed .epw columns to a cache file. The file is written next to its final name and then renamed,
+    so concurrent readers never see a partially written cache.
+    """
+    cache_dir = os.path.dirname(cache_file)
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+    header = json.dumps({'location': location, 'fields': list(FIELDS), 'rows': len(columns[0]),
+                         'byteorder': sys.byteorder}).encode('utf-8')
+    offset = len(MAGIC) + 4 + len(header)
+    padding = b'\0' * (-offset % 8)
+
+    tmp_file = '%s.%i.tmp' % (cache_file, os.getpid())
+    with open(tmp_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(padding)
+        for column in columns:
+            column.tofile(f)
+    try:
+        os.rename(tmp_file, cache_file)
+    except OSError:
+        # another process was faster (on Windows rename does not overwrite)
+        os.remove(tmp_file)
+
+
+def open_cache(cache_file):
+    """
+    Memory-maps a cache file
+    :return: EpwData, or None if the file is not a valid cache file for this platform
+    """
+    f = open(cache_file, 'rb')
+    try:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, EnvironmentError):
+        f.close()
+        return None
+
+    header_start = len(MAGIC) + 4
+    if buf[:len(MAGIC)] != MAGIC:
+        buf.close()
+        f.close()
+        return None
+    header_length = struct.unpack('<I', buf[len(MAGIC):header_start])[0]
+    header = json.loads(buf[header_start:header_start + header_length].decode('utf-8'))
+    rows = header['rows']
+    fields = tuple(header['fields'])
+    offset = header_start + header_length
+    offset += -offset % 8
+    if header['byteorder'] != sys.byteorder or len(buf) != offset + 8 * rows * len(fields):
+        buf.close()
+        f.close()
+        return None
+
+    columns = {}
+    view = memoryview(buf) if hasattr(memoryview, 'cast') else None
+    for field in fields:
+        if view is not None:
+            columns[field] = view[offset:offset + 8 * rows].cast('d')
+        else:
+            # IronPython / Python 2: no memoryview.cast, copy the column out of the mapped file
+            column = array.array('d')
+            column.fromstring(buf[offset:offset + 8 * rows])
+            columns[field] = column
+        offset += 8 * rows
+    return EpwData(header['location'], fields, rows, columns, buffer=(f, buf, view))
+
+
+if __name__ == '__main__':
+    def test():
+        import math
+        import shutil
+        import time
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Zurich.epw')
+        cache_dir = tempfile.mkdtemp()
+        try:
+            t0 = time.time()
+            epw = load(path, cache_dir)
+            t1 = time.time()
+            _opened.clear()
+            cached = load(path, cache_dir)
+            t2 = time.time()
+            print('parse: %.4fs, mmap: %.4fs' % (t1 - t0, t2 - t1))
+            location, columns = parse_epw(path)
+            assert cached.location == location
+            assert cached.rows == 8760
+            for field, column in zip(FIELDS, columns):
+                for a, b in zip(cached[field], column):
+                    assert a == b or (math.isnan(a) and math.isnan(b)), field
+            assert load(path, cache_dir) is cached
+        finally:
+            _opened.clear()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+    test()
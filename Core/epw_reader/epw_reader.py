@@ -31,15 +31,10 @@ Default is 'hourly'. Alternatives: 'monthly', 'daily', 'quarter-hourly', 'five-m
 - GROUNDTEMPERATURE
 """
 
-import csv
+import itertools
 
-# indexes into .epw data rows:
-DRYBULB_INDEX = 6
-DEWPOINT_INDEX = 7
-GHI_INDEX = 13
-DNI_INDEX = 14
-DHI_INDEX = 15
-RH_INDEX = 8
+import epw_cache
+import timeseries
 
 
 def main(path):
@@ -48,57 +43,67 @@ def main(path):
 
 
 def epw_reader(path):
-    drybulb = []
-    dewpoint = []
-    ghi = []
-    dni = []
-    dhi = []
-    rh = []
-    ghi_monthly = []
-    drybulb_monthly = []
-    rh_monthly = []
-
-    latitude = None
-    longitude = None
-    city_country = None
-
-    with open(path) as csvfile:
-        for row in csv.reader(csvfile):
-            if row[0] == "LOCATION":
-                # read in location stuff here
-                _, city, _, country, _, _, latitude, longitude, _, _ = row
-                city_country = (city, country)
-            elif not row[0].isdigit():
-                # still parsing header portion of epw file
-                continue
-            else:
-                drybulb.append(float(row[DRYBULB_INDEX]))
-                dewpoint.append(float(row[DEWPOINT_INDEX]))
-                ghi.append(float(row[GHI_INDEX]))
-                dni.append(float(row[DNI_INDEX]))
-                dhi.append(float(row[DHI_INDEX]))
-                rh.append(float(row[RH_INDEX]))
-
-    # let's just be sure we actually read an .epw file with a LOCATION entry
-    assert latitude is not None
-    assert longitude is not None
+    # parsed once into a binary cache, later calls just memory-map it. see epw_cache.py
+    epw = epw_cache.load(path)
+    _, city, _, country, _, _, latitude, longitude, _, _ = epw.location[:10]
+    city_country = (city, country)
+
+    drybulb = list(epw['drybulb'])
+    dewpoint = list(epw['dewpoint'])
+    ghi = list(epw['ghi'])
+    dni = list(epw['dni'])
+    dhi = list(epw['dhi'])
+    rh = list(epw['rh'])
 
     # monthly data
-    dayspermonth = [31.0, 28.0, 31.0, 30.0, 31.0, 30.0, 31.0, 31.0, 30.0, 31.0, 30.0, 31.0]
-    hours_per_day = 24
-    total_months = 12
-    for month in range(total_months):
-        start_hour = int(hours_per_day * sum(dayspermonth[0:month]))
-        end_hour = int(hours_per_day * sum(dayspermonth[0:month + 1]))
-        hours_per_month = dayspermonth[month] * hours_per_day
-        ghi_monthly.append(sum(ghi[start_hour:end_hour]) / 1000)
-        drybulb_monthly.append(sum(drybulb[start_hour:end_hour]) / hours_per_month)
-        rh_monthly.append(sum(rh[start_hour:end_hour]) / hours_per_month)
+    ghi_monthly = [ghi_sum / 1000 for ghi_sum in timeseries.aggregate(ghi, 'month', 'sum')]
+    drybulb_monthly, rh_monthly = timeseries.aggregate([drybulb, rh], 'month', 'mean')
 
     return latitude, longitude, city_country, ghi, dni, dhi, drybulb, dewpoint, rh, \
            ghi_monthly, drybulb_monthly, rh_monthly
 
 
+def read_fields(path, fields=("drybulb", "dni", "dhi"), start_HOY=1, end_HOY=8760):
+    """
+    Reads only the requested fields for the hours start_HOY to end_HOY of an .epw file. Rows are only split up to
+    the last requested column and parsing stops after end_HOY, so loading e.g. a design week is much cheaper than
+    reading the entire file with epw_reader. If the file is already in the binary cache (see epw_cache.py), the
+    values are sliced out of the cache instead.
+    :param path: path to the .epw file
+    :param fields: names of the fields to read, see epw_cache.FIELDS. E.g. ("drybulb", "dni", "dhi")
+    :param start_HOY: first hour of the year to read, starting at 1
+    :param end_HOY: last hour of the year to read (inclusive), at most the number of rows in the file (8760)
+    :return: dict with a list of floats for each requested field, end_HOY - start_HOY + 1 values each. Non-numeric
+    values (e.g. 'datasource') are NaN, as in the cache
+    """
+    for field in fields:
+        if field not in epw_cache.FIELDS:
+            raise ValueError("Unknown epw field '%s'. Valid fields: %s" % (field, ", ".join(epw_cache.FIELDS)))
+    if not 1 <= start_HOY <= end_HOY:
+        raise ValueError("Invalid hour range: start_HOY=%s, end_HOY=%s" % (start_HOY, end_HOY))
+
+    epw = epw_cache.load_if_cached(path)
+    if epw is not None:
+        if end_HOY > epw.rows:
+            raise ValueError("end_HOY=%s is beyond the %i rows of %s" % (end_HOY, epw.rows, path))
+        return {field: list(epw[field][start_HOY - 1:end_HOY]) for field in fields}
+
+    indices = [epw_cache.FIELDS.index(field) for field in fields]
+    maxsplit = max(indices) + 1
+    columns = [[] for _ in fields]
+    parse_value, nan = epw_cache.parse_value, float("nan")
+    with open(path) as epwfile:
+        data_rows = (line for line in epwfile if line[:1].isdigit())
+        for line in itertools.islice(data_rows, start_HOY - 1, end_HOY):
+            row = line.split(",", maxsplit)
+            for column, index in zip(columns, indices):
+                # same parsing as the cache: NaN for non-numeric and missing values
+                column.append(parse_value(row[index]) if index < len(row) else nan)
+    if columns and len(columns[0]) < end_HOY - start_HOY + 1:
+        raise ValueError("end_HOY=%s is beyond the %i rows of %s" % (end_HOY, start_HOY - 1 + len(columns[0]), path))
+    return dict(zip(fields, columns))
+
+
 if __name__ == "__main__":
     def mean(lst):
         return sum(lst) / len(lst)
@@ -111,5 +116,40 @@ if __name__ == "__main__":
          ghi_monthly, drybulb_monthly, rh_monthly) = main(path)
         print(latitude, longitude, city_country, mean(dni), mean(dhi), mean(drybulb), mean(dewpoint), mean(rh))
 
+        # one week in july, only three fields
+        week = read_fields(path, ("drybulb", "dni", "dhi"), start_HOY=4345, end_HOY=4512)
+        assert len(week["drybulb"]) == 168
+        assert week["drybulb"] == drybulb[4344:4512]
+        assert week["dhi"] == dhi[4344:4512]
+
+        # the text and the cached path agree, also for non-numeric fields
+        import math
+        import shutil
+        import tempfile
+        folder = tempfile.mkdtemp()
+        copy = os.path.join(folder, "weather.epw")
+        shutil.copy(path, copy)
+        try:
+            results = []
+            for cached in (False, True):
+                if cached:
+                    epw_cache.load(copy)
+                results.append(read_fields(copy, ("datasource", "dni"), 1, 24))
+                # end_HOY beyond the last row
+                try:
+                    read_fields(copy, ("dni",), 8700, 8800)
+                    raise AssertionError("read 8800 hours, cached: %s" % cached)
+                except ValueError:
+                    pass
+            text, cached = results
+            assert all(math.isnan(x) for x in text["datasource"] + cached["datasource"])
+            assert text["dni"] == cached["dni"]
+        finally:
+            epw_cache._opened.clear()
+            cache_file = epw_cache.cache_path(copy)
+            if os.path.exists(cache_file):
+                os.remove(cache_file)
+            shutil.rmtree(folder, ignore_errors=True)
+
 
     test()
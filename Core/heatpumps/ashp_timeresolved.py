@@ -17,13 +17,9 @@ arguments:
 output:
     - x_el,t [kW]
 """
-import math
+import conversion
+
 
 def main(Q_th, T_supply, T_amb, pi_1, pi_2, pi_3, pi_4):
-    horizon = len(T_amb) if len(T_amb) < len(Q_th) else len(Q_th)
-    COP = [0] * horizon
-    x_el = [0] * horizon
-    for i in range(horizon):
-        COP[i] = pi_1 * math.exp(pi_2 * (T_supply - T_amb[i])) + pi_3 * math.exp(pi_4 * (T_supply - T_amb[i]))
-        x_el[i] = Q_th[i] / COP[i]
-    return x_el, COP
+    # see Core/conversion, also for screening many heat pump variants at once
+    return conversion.ashp(Q_th, T_supply, T_amb, pi_1, pi_2, pi_3, pi_4)
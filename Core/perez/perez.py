@@ -0,0 +1,174 @@
+# coding=utf-8
+"""
+Perez 1990 diffuse irradiance model for whole time series.
+
+Splits the diffuse horizontal irradiance into circumsolar, horizon brightening and isotropic components on a tilted
+surface (credits: JoanDM, see WindowRadiation.perez in HIVE_RC_simulator/src/Hive_Hive.py). The sky clearness
+epsilon is binned into the 8 coefficient rows with a binary search over the bin limits (like numpy.searchsorted)
+instead of an if/elif ladder, and each row holds all six coefficients, so one lookup per timestep replaces six dict
+lookups. Constants of the surface are computed once per series, not once per hour.
+
+All series are plain sequences (lists, array('d'), ...) of equal length, one value per timestep. Used by the Hive
+component (WindowRadiation) and by the Tilted Irradiance component (solar_tech/tilted_irradiance.py).
+
+usage:
+    circumsolar, horizon, isotropic = perez_components(incidence, sun_alt, dni, dhi, surface_altitude_rad,
+                                                       view_factor)
+"""
+
+from __future__ import division
+
+import bisect
+import math
+
+# upper limits of the sky clearness (epsilon) bins, the last bin is open
+EPSILON_BINS = (1.065, 1.23, 1.5, 1.95, 2.8, 4.5, 6.2)
+
+# f_11, f_12, f_13, f_21, f_22, f_23 per epsilon bin
+COEFFICIENTS = ((-0.0083117, 0.5877285, -0.0620636, -0.0596012, 0.0721249, -0.0220216),
+                (0.1299457, 0.6825954, -0.1513752, -0.0189325, 0.065965, -0.0288748),
+                (0.3296958, 0.4868735, -0.2210958, 0.055414, -0.0639588, -0.0260542),
+                (0.5682053, 0.1874525, -0.295129, 0.1088631, -0.1519229, -0.0139754),
+                (0.873028, -0.3920403, -0.3616149, 0.2255647, -0.4620442, 0.0012448),
+                (1.1326077, -1.2367284, -0.4118494, 0.2877813, -0.8230357, 0.0558651),
+                (1.0601591, -1.5999137, -0.3589221, 0.2642124, -1.127234, 0.1310694),
+                (0.677747, -0.3272588, -0.2504286, 0.1561313, -1.3765031, 0.2506212))
+
+K = 5.534 / 1000000
+COS_85 = math.cos(math.radians(85))
+MAX_ZENITH = 87.5  # [deg], no circumsolar or horizon brightening for lower suns
+
+
+def coefficients(epsilon):
+    """
+    :param epsilon: sky clearness
+    :return: f_11, f_12, f_13, f_21, f_22, f_23 of the epsilon bin
+    """
+    return COEFFICIENTS[bisect.bisect_left(EPSILON_BINS, epsilon)]
+
+
+def perez_hour(angle_incidence, sun_alt, norm_radiation, hor_radiation, surface_altitude_rad):
+    """
+    Circumsolar and horizon brightening components of a single timestep
+    :param angle_incidence: Angle of incidence between sun rays and surface [rad]
+    :param sun_alt: sun altitude [deg]
+    :param norm_radiation: Direct normal radiation [Wh/m^2]
+    :param hor_radiation: Diffuse horizontal radiation [Wh/m^2], not 0
+    :param surface_altitude_rad: altitude (tilt) of the surface [rad], as WindowRadiation.window_altitude_rad
+    :return: diff_circum, diff_horizon [Wh/m^2], f_1
+    """
+    zenith = 90 - sun_alt
+    if not 0 <= zenith <= MAX_ZENITH:
+        return 0, 0, 0
+
+    cos_incidence = math.cos(angle_incidence)
+    a = max(0, cos_incidence)
+    b = max(COS_85, cos_incidence)
+    k_zenith = K * zenith ** 3
+    epsilon = ((norm_radiation + hor_radiation) / float(hor_radiation) + k_zenith) / (1 + k_zenith)
+    # as in WindowRadiation.perez, the cosine of b (itself already a cosine) is used for the air mass
+    air_mass = (math.cos(b) + 0.15 * (93.9 - zenith) ** (-1.253)) ** (-1)
+    delta = hor_radiation * (air_mass / 1367.0)
+
+    f_11, f_12, f_13, f_21, f_22, f_23 = coefficients(epsilon)
+    zenith_rad = math.radians(zenith)
+    f_1 = max(0, f_11 + delta * f_12 + zenith_rad * f_13)
+    f_2 = max(0, f_21 + delta * f_22 + zenith_rad * f_23)
+
+    diff_circum = hor_radiation * f_1 * a / b
+    diff_horizon = hor_radiation * f_2 * math.sin(surface_altitude_rad)
+    return diff_circum, diff_horizon, f_1
+
+
+def perez(angle_incidence, sun_alt, norm_radiation, hor_radiation, surface_altitude_rad):
+    """
+    Circumsolar and horizon brightening components of a whole time series, same as perez_hour for every timestep.
+    Timesteps without diffuse horizontal radiation have no diffuse components.
+    :param angle_incidence: Angles of incidence between sun rays and surface [rad]
+    :param sun_alt: sun altitudes [deg]
+    :param norm_radiation: Direct normal radiation [Wh/m^2]
+    :param hor_radiation: Diffuse horizontal radiation [Wh/m^2]
+    :param surface_altitude_rad: altitude (tilt) of the surface [rad]
+    :return: diff_circum, diff_horizon, f_1: lists with one value per timestep
+    """
+    horizon = len(sun_alt)
+    diff_circum = [0.0] * horizon
+    diff_horizon = [0.0] * horizon
+    f_1 = [0.0] * horizon
+
+    sin_surface = math.sin(surface_altitude_rad)
+    cos, radians, bisect_left = math.cos, math.radians, bisect.bisect_left
+    for i in range(horizon):
+        zenith = 90 - sun_alt[i]
+        dhi = hor_radiation[i]
+        if not 0 <= zenith <= MAX_ZENITH or dhi == 0:
+            continue
+        cos_incidence = cos(angle_incidence[i])
+        b = cos_incidence if cos_incidence > COS_85 else COS_85
+        k_zenith = K * zenith ** 3
+        epsilon = ((norm_radiation[i] + dhi) / dhi + k_zenith) / (1 + k_zenith)
+        delta = dhi / (cos(b) + 0.15 * (93.9 - zenith) ** (-1.253)) / 1367.0
+
+        f_11, f_12, f_13, f_21, f_22, f_23 = COEFFICIENTS[bisect_left(EPSILON_BINS, epsilon)]
+        zenith_rad = radians(zenith)
+        f1 = f_11 + delta * f_12 + zenith_rad * f_13
+        if f1 > 0:
+            f_1[i] = f1
+            if cos_incidence > 0:
+                diff_circum[i] = dhi * f1 * cos_incidence / b
+        f2 = f_21 + delta * f_22 + zenith_rad * f_23
+        if f2 > 0:
+            diff_horizon[i] = dhi * f2 * sin_surface
+    return diff_circum, diff_horizon, f_1
+
+
+def perez_components(angle_incidence, sun_alt, norm_radiation, hor_radiation, surface_altitude_rad, view_factor):
+    """
+    Circumsolar, horizon brightening and isotropic diffuse irradiance of a whole time series
+    :param view_factor: sky view factor of the surface, e.g. (1 + cos(tilt)) / 2. One value, or one per timestep
+    :return: diff_circum, diff_horizon, diff_isotropic [Wh/m^2]: lists with one value per timestep
+    """
+    diff_circum, diff_horizon, f_1 = perez(angle_incidence, sun_alt, norm_radiation, hor_radiation,
+                                           surface_altitude_rad)
+    if hasattr(view_factor, '__len__'):
+        diff_isotropic = [dhi * vf * (1 - f1) for dhi, vf, f1 in zip(hor_radiation, view_factor, f_1)]
+    else:
+        diff_isotropic = [dhi * view_factor * (1 - f1) for dhi, f1 in zip(hor_radiation, f_1)]
+    return diff_circum, diff_horizon, diff_isotropic
+
+
+if __name__ == '__main__':
+    def test():
+        import random
+        import time
+
+        random.seed(1)
+        horizon = 8760
+        sun_alt = [random.uniform(-30, 90) for _ in range(horizon)]
+        incidence = [random.uniform(0, math.pi) for _ in range(horizon)]
+        dni = [random.choice([0.0, random.uniform(0, 900)]) for _ in range(horizon)]
+        dhi = [random.choice([0.0, random.uniform(1, 400)]) for _ in range(horizon)]
+        surface_altitude_rad = math.radians(90)
+
+        t0 = time.time()
+        expected = [perez_hour(incidence[i], sun_alt[i], dni[i], dhi[i], surface_altitude_rad) if dhi[i] else
+                    (0, 0, 0) for i in range(horizon)]
+        t1 = time.time()
+        result = perez(incidence, sun_alt, dni, dhi, surface_altitude_rad)
+        t2 = time.time()
+        for i in range(horizon):
+            for a, b in zip([r[i] for r in result], expected[i]):
+                assert abs(a - b) <= 1e-9 * max(1.0, abs(b)), (i, a, b)
+
+        # bins: upper limits belong to the lower bin
+        assert coefficients(1.065) == COEFFICIENTS[0] and coefficients(1.0651) == COEFFICIENTS[1]
+        assert coefficients(6.2) == COEFFICIENTS[6] and coefficients(50) == COEFFICIENTS[7]
+
+        circum, horizon_brightening, isotropic = perez_components(incidence, sun_alt, dni, dhi,
+                                                                  surface_altitude_rad, 0.5)
+        assert circum == result[0]
+        assert all(abs(iso - dhi[i] * 0.5 * (1 - result[2][i])) < 1e-9 for i, iso in enumerate(isotropic))
+        print('per hour: %.3fs, whole series: %.3fs' % (t1 - t0, t2 - t1))
+
+
+    test()
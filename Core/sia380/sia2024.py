@@ -2,16 +2,24 @@
 """
 Implements predefined default values from SIA 2024:2015 for SIA 380.1 calculations.
 
+A room is either a dictionary with all the properties (json, e.g. from the RoomsStandard component), or a room code
+such as '3.1', which is read from the typed columns and monthly tables of the compiled room database (see
+sia2024_db.py), e.g. for batch runs over many rooms.
 """
 
+from __future__ import division
 
-def default_values(room, area, month, season):
+import sia2024_db
+
+
+def default_values(room, area, month, season, level='Standardwert'):
     """
 
-    :param room: sia2024 room type. dictionary with all the properties
+    :param room: sia2024 room type. dictionary with all the properties, or a room code, e.g. '3.1'
     :param area: room area
     :param month: month of the year
     :param season: winter or summer
+    :param level: 'Standardwert', 'Zielwert' or 'Bestand', standard level for room codes
     :return:
     """
 
@@ -39,7 +47,6 @@ def default_values(room, area, month, season):
     """
 
     summerstart, summerend = 3, 10
-    dayspermonth = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
 
     # length of calculation period (hours per month) [h]
     t = [744.0, 672.0, 744.0, 720.0, 744.0, 720.0, 744.0, 744.0, 720.0, 744.0, 720.0, 744.0]
@@ -64,51 +71,50 @@ def default_values(room, area, month, season):
 
     f_sh = 0.9  # sia2024, p.12, 1.3.1.9 Reduktion solare Wärmeeinträge
 
+    # properties by short name, straight from the typed columns for room codes, see sia2024_db.py
+    value, monthly = sia2024_db.room_reader(room, level)
+
     if area is None:
-        area = room["Nettogeschossflaeche"]
+        area = value('floor_area')
 
-    tau = room["Zeitkonstante"]
+    tau = value('tau')
     if not season:
         if summerstart <= month <= summerend:
-            theta_i = room["Raumlufttemperatur Auslegung Kuehlung (Sommer)"]
+            theta_i = value('theta_i_summer')
         else:
-            theta_i = room["Raumlufttemperatur Auslegung Heizen (Winter)"]
+            theta_i = value('theta_i_winter')
     else:
         if season == "summer":
-            theta_i = room["Raumlufttemperatur Auslegung Kuehlung (Sommer)"]
+            theta_i = value('theta_i_summer')
         else:
-            theta_i = room["Raumlufttemperatur Auslegung Heizen (Winter)"]
-
-    A_th = room["Thermische Gebaeudehuellflaeche"]
-    A_w = A_th * (room["Glasanteil"] / 100.0)
-    U_op = room["U-Wert opake Bauteile"]
-    U_w = room["U-Wert Fenster"]
-    q_ve = room["Aussenluft-Volumenstrom (pro NGF)"]
-    q_vinf = room["Aussenluft-Volumenstrom durch Infiltration"]
-    eta_rec = room["Temperatur-Aenderungsgrad der Waermerueckgewinnung"]
-    phi_P = room["Waermeeintragsleistung Personen (bei 24.0 deg C, bzw. 70 W)"]
-    phi_L = room["Waermeeintragsleistung der Raumbeleuchtung"]
-    phi_A = room["Waermeeintragsleistung der Geraete"]
-    t_P = [room["Vollaststunden pro Jahr (Personen)"]] * 12
-    t_L = [room["Jaehrliche Vollaststunden der Raumbeleuchtung"]] * 12
-    t_A = [room["Jaehrliche Vollaststunden der Geraete"]] * 12
-    g = room["Gesamtenergiedurchlassgrad Verglasung"]
-
-    # transforming yearly sia2024 data to monthly
-    for i in range(len(dayspermonth)):
-        t_P[i] *= dayspermonth[i] / 365.0
-        t_L[i] *= dayspermonth[i] / 365.0
-        t_A[i] *= dayspermonth[i] / 365.0
+            theta_i = value('theta_i_winter')
+
+    A_th = value('A_th')
+    A_w = A_th * (value('f_g') / 100.0)
+    U_op = value('U_op')
+    U_w = value('U_w')
+    q_ve = value('q_ve')
+    q_vinf = value('q_vinf')
+    eta_rec = value('eta_rec')
+    phi_P = value('phi_P')
+    phi_L = value('phi_L')
+    phi_A = value('phi_A')
+    g = value('g')
+
+    # monthly full-load hours of the requested month
+    t_P = monthly('t_P')[month - 1]
+    t_L = monthly('t_L')[month - 1]
+    t_A = monthly('t_A')[month - 1]
 
     return tau, theta_i, t[month - 1], \
            A_th - A_w, A_w, U_op, U_w, \
            q_ve * area, q_vinf * area, eta_rec, \
            phi_P * area, phi_L * area, phi_A * area, \
-           t_P[month - 1], t_L[month - 1], t_A[month - 1], \
+           t_P, t_L, t_A, \
            g, f_sh
 
 
 if __name__ == '__main__':
-    values = default_values("mfh", "standard", None, 1, "winter")
+    values = default_values("1.1", None, 1, "winter")
     for i in range(len(values)):
         print(values[i])
\ No newline at end of file
@@ -0,0 +1,294 @@
+# coding=utf-8
+"""
+Compiled SIA 2024:2015 room database.
+
+Reads the SIA2024_Raumdaten_*.csv files once and compiles them into one typed array per room property, indexed by
+room code ('1.1', '3.1', ...) and standard level ('Standardwert', 'Zielwert', 'Bestand'). Monthly full-load hours
+for persons, lighting and appliances are precomputed. The compiled database is cached on disk in the system temp
+folder, keyed by path, modification time and size of the csv file, and kept in memory once loaded: loading the
+same level again does not touch the file system.
+
+usage:
+    db = load('Standardwert')
+    i = db.index('3.1')
+    U_op, tau = db['U_op'][i], db['tau'][i]
+    t_L_january = db.monthly('t_L', i)[0]
+    room_properties = db.room('3.1')  # json-style dict with the long German keys, e.g. for sia380.main
+    value, monthly = room_reader('3.1')  # or room_reader(room_properties), e.g. value('U_op'), monthly('t_L')
+"""
+
+from __future__ import division
+import array
+import csv
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+# short property names (nomenclature of sia2024.py) and the csv column they are read from
+COLUMNS = (('tau', 'Zeitkonstante'),
+           ('theta_i_summer', 'Raumlufttemperatur Auslegung Kuehlung (Sommer)'),
+           ('theta_i_winter', 'Raumlufttemperatur Auslegung Heizen (Winter)'),
+           ('floor_area', 'Nettogeschossflaeche'),
+           ('A_th', 'Thermische Gebaeudehuellflaeche'),
+           ('f_g', 'Glasanteil'),
+           ('U_op', 'U-Wert opake Bauteile'),
+           ('U_w', 'U-Wert Fenster'),
+           ('f_frame', 'Abminderungsfaktor fuer Fensterrahmen'),
+           ('q_ve', 'Aussenluft-Volumenstrom (pro NGF)'),
+           ('q_vinf', 'Aussenluft-Volumenstrom durch Infiltration'),
+           ('eta_rec', 'Temperatur-Aenderungsgrad der Waermerueckgewinnung'),
+           ('phi_P', 'Waermeeintragsleistung Personen (bei 24.0 deg C, bzw. 70 W)'),
+           ('phi_L', 'Waermeeintragsleistung der Raumbeleuchtung'),
+           ('phi_A', 'Waermeeintragsleistung der Geraete'),
+           ('t_P', 'Vollaststunden pro Jahr (Personen)'),
+           ('t_L', 'Jaehrliche Vollaststunden der Raumbeleuchtung'),
+           ('t_A', 'Jaehrliche Vollaststunden der Geraete'),
+           ('g', 'Gesamtenergiedurchlassgrad Verglasung'))
+PROPERTIES = tuple(name for name, _ in COLUMNS)
+COLUMN = dict(COLUMNS)
+MONTHLY_PROPERTIES = ('t_P', 't_L', 't_A')
+
+LEVELS = ('Standardwert', 'Zielwert', 'Bestand')
+CSV_FILES = dict((level, '200123_SIA2024_Raumdaten_%s.csv' % level) for level in LEVELS)
+
+DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+MONTHLY_SHARE = [days / 365.0 for days in DAYS_PER_MONTH]
+
+MAGIC = b'HIVE2024'
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'hive_sia2024_cache')
+
+# databases already loaded by this process, keyed by (level, csv_path, cache_dir) as passed to load
+_loaded = {}
+
+
+class RoomDatabase(object):
+    """
+    SIA 2024 rooms of one standard level. db[name] is an array.array('d') with one value per room, in the order of
+    db.codes; db.monthly(name, i) the 12 monthly values of t_P, t_L or t_A of room i.
+    """
+
+    def __init__(self, level, codes, descriptions, columns, monthly):
+        self.level = level
+        self.codes = codes
+        self.descriptions = descriptions
+        self._columns = columns
+        self._monthly = monthly
+        self._index = dict((code, i) for i, code in enumerate(codes))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def index(self, code):
+        """
+        :param code: room code as in SIA 2024, e.g. '3.1', or the full description, e.g. '3.1 Einzel-, Gruppenbuero'
+        :return: row of the room in all columns
+        """
+        code = code.split(' ', 1)[0]
+        if code not in self._index:
+            raise KeyError("Unknown SIA 2024 room '%s'. Valid rooms: %s" % (code, ', '.join(self.codes)))
+        return self._index[code]
+
+    def monthly(self, name, i):
+        """
+        Monthly full-load hours [h] of room i, i.e. the annual value split by days per month
+        :param name: 't_P', 't_L' or 't_A'
+        """
+        return self._monthly[name][12 * i:12 * i + 12]
+
+    def room(self, code):
+        """
+        Room properties in json format, as produced by the RoomsStandard/RoomsExisting/RoomsIdeal parameters
+        """
+        i = self.index(code)
+        room = dict((column, self._columns[name][i]) for name, column in COLUMNS)
+        room['description'] = self.descriptions[i]
+        return room
+
+
+def cache_path(csv_path, cache_dir=None):
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+    csv_path = os.path.abspath(csv_path)
+    stat = os.stat(csv_path)
+    key = '%s|%r|%i|%i' % (csv_path, stat.st_mtime, stat.st_size, CACHE_VERSION)
+    return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.sia2024')
+
+
+def load(level='Standardwert', csv_path=None, cache_dir=None):
+    """
+    Returns the compiled room database of a standard level, using (and if necessary creating) the disk cache
+    :param level: 'Standardwert', 'Zielwert' or 'Bestand'
+    :param csv_path: custom room data in the format of the SIA2024_Raumdaten csv files. Default is the file of level
+    :param cache_dir: folder for cache files. Default is 'hive_sia2024_cache' in the system temp folder
+    :return: RoomDatabase
+    """
+    key = (level, csv_path, cache_dir)
+    if key in _loaded:
+        return _loaded[key]
+    if csv_path is None:
+        if level not in CSV_FILES:
+            raise ValueError("Unknown standard level '%s'. Valid levels: %s" % (level, ', '.join(LEVELS)))
+        csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), CSV_FILES[level])
+    cache_file = cache_path(csv_path, cache_dir)
+
+    db = None
+    if os.path.exists(cache_file):
+        db = read_cache(cache_file)
+    if db is None:
+        db = compile_csv(csv_path, level)
+        try:
+            write_cache(cache_file, db)
+        except (IOError, OSError):
+            # e.g. read-only temp folder. compiling is cheap enough to do again next time
+            pass
+    _loaded[key] = db
+    return db
+
+
+def room_reader(room, level='Standardwert'):
+    """
+    Reads the properties of one room, from a dict or straight from the typed columns of the compiled database
+    :param room: room properties in json format (long German keys, see RoomDatabase.room), or a room code, e.g. '3.1'
+    :param level: 'Standardwert', 'Zielwert' or 'Bestand', standard level of room codes
+    :return: value(name), the property of the room by short name (see COLUMNS); monthly(name), the 12 monthly
+    full-load hours [h] of 't_P', 't_L' or 't_A'
+    """
+    if isinstance(room, dict):
+        def value(name):
+            return room[COLUMN[name]]
+
+        def monthly(name):
+            annual = room[COLUMN[name]]
+            return [annual * share for share in MONTHLY_SHARE]
+    else:
+        db = load(level)
+        i = db.index(room)
+
+        def value(name):
+            return db[name][i]
+
+        def monthly(name):
+            return db.monthly(name, i)
+    return value, monthly
+
+
+def compile_csv(csv_path, level):
+    """
+    Parses a SIA2024_Raumdaten csv file
+    :return: RoomDatabase
+    """
+    with open(csv_path) as f:
+        rows = list(csv.reader(f))
+    header, rows = rows[0], [row for row in rows[1:] if row]
+    indices = [header.index(column) for _, column in COLUMNS]
+
+    descriptions = [row[header.index('description')] for row in rows]
+    codes = [description.split(' ', 1)[0] for description in descriptions]
+    # empty cells (no value in SIA 2024) are stored as NaN
+    columns = dict((name, array.array('d', [float(row[i] or 'nan') for row in rows]))
+                   for name, i in zip(PROPERTIES, indices))
+    monthly = {}
+    for name in MONTHLY_PROPERTIES:
+        monthly[name] = array.array('d', [annual * share for annual in columns[name] for share in MONTHLY_SHARE])
+    return RoomDatabase(level, codes, descriptions, columns, monthly)
+
+
+def write_cache(cache_file, db):
+    """
+    Layout: magic, uint32 header length, json header {level, codes, descriptions}, then one float64 block per
+    property in PROPERTIES and one 12 x rooms block per property in MONTHLY_PROPERTIES
+    """
+    cache_dir = os.path.dirname(cache_file)
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+    header = json.dumps({'level': db.level, 'codes': db.codes, 'descriptions': db.descriptions}).encode('utf-8')
+    tmp_file = '%s.%i.tmp' % (cache_file, os.getpid())
+    with open(tmp_file, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for name in PROPERTIES:
+            db[name].tofile(f)
+        for name in MONTHLY_PROPERTIES:
+            db._monthly[name].tofile(f)
+    try:
+        os.rename(tmp_file, cache_file)
+    except OSError:
+        # another process was faster (on Windows rename does not overwrite)
+        os.remove(tmp_file)
+
+
+def read_cache(cache_file):
+    """
+    :return: RoomDatabase, or None if the file is not a valid cache file
+    """
+    with open(cache_file, 'rb') as f:
+        data = f.read()
+    header_start = len(MAGIC) + 4
+    if data[:len(MAGIC)] != MAGIC:
+        return None
+    header_length = struct.unpack('<I', data[len(MAGIC):header_start])[0]
+    header = json.loads(data[header_start:header_start + header_length].decode('utf-8'))
+    rooms = len(header['codes'])
+    offset = header_start + header_length
+    if len(data) != offset + 8 * rooms * (len(PROPERTIES) + 12 * len(MONTHLY_PROPERTIES)):
+        return None
+
+    def read_block(length):
+        block = array.array('d')
+        if hasattr(block, 'frombytes'):
+            block.frombytes(data[offset:offset + 8 * length])
+        else:
+            # IronPython / Python 2
+            block.fromstring(data[offset:offset + 8 * length])
+        return block
+
+    columns, monthly = {}, {}
+    for name in PROPERTIES:
+        columns[name] = read_block(rooms)
+        offset += 8 * rooms
+    for name in MONTHLY_PROPERTIES:
+        monthly[name] = read_block(12 * rooms)
+        offset += 8 * 12 * rooms
+    return RoomDatabase(header['level'], header['codes'], header['descriptions'], columns, monthly)
+
+
+if __name__ == '__main__':
+    def test():
+        import math
+        import shutil
+        cache_dir = tempfile.mkdtemp()
+        try:
+            for level in LEVELS:
+                db = load(level, cache_dir=cache_dir)
+                _loaded.clear()
+                cached = load(level, cache_dir=cache_dir)
+                assert cached.codes == db.codes and len(db) == 45
+                for name in PROPERTIES:
+                    for a, b in zip(cached[name], db[name]):
+                        assert a == b or (math.isnan(a) and math.isnan(b)), name
+                i = cached.index('3.1 Einzel-, Gruppenbuero')
+                assert abs(sum(cached.monthly('t_L', i)) - cached['t_L'][i]) < 1e-9
+                assert load(level, cache_dir=cache_dir) is cached
+            value, monthly = room_reader('3.1')
+            dict_value, dict_monthly = room_reader(load().room('3.1'))
+            assert all(value(name) == dict_value(name) for name in PROPERTIES if not math.isnan(value(name)))
+            assert list(monthly('t_L')) == dict_monthly('t_L')
+            office = load('Standardwert', cache_dir=cache_dir).room('3.1')
+            print(office['description'], office['U-Wert opake Bauteile'], office['Zeitkonstante'])
+        finally:
+            _loaded.clear()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+    test()
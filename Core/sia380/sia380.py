@@ -15,6 +15,13 @@ electricity demand: currently simply by using sqm and internal loads for lightin
 from __future__ import division
 import math
 
+import sia2024_db
+
+HOURS_PER_DAY = 24
+MONTHS_PER_YEAR = 12
+DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+TO_KWH = 1000.0
+
 
 def main(room_properties, floor_area, T_e, T_i, setpoints_ub, setpoints_lb, surface_areas, surface_type, surface_irradiance):
     '''
@@ -148,123 +155,166 @@ def main(room_properties, floor_area, T_e, T_i, setpoints_ub, setpoints_lb, surf
         _____________________________________________________________________________________
     """
 
-    rho = 1.2       # Luftdichte in kg/m^3
-    c_p = 1005      # Spez. Wärmekapazität Luft in J/(kgK)
-    hours_per_day = 24
-    months_per_year = 12
-    days_per_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-    t = [(hours_per_day * days) for days in days_per_month]   # length of calculation period (hours per month) [h]
-
-    # read room properties from sia2024
-    # f_sh = 0.9  # sia2024, p.12, 1.3.1.9 Reduktion solare Wärmeeinträge
-    # theta_i_summer = room_properties["Raumlufttemperatur Auslegung Kuehlung (Sommer)"]
-    # theta_i_winter = room_properties["Raumlufttemperatur Auslegung Heizen (Winter)"]
-    # g = room_properties["Gesamtenergiedurchlassgrad Verglasung"]
-    tau = room_properties["Zeitkonstante"]
-    U_op = room_properties["U-Wert opake Bauteile"]
-    U_w = room_properties["U-Wert Fenster"]
-    Vdot_e_spec = room_properties["Aussenluft-Volumenstrom (pro NGF)"]
-    Vdot_inf_spec = room_properties["Aussenluft-Volumenstrom durch Infiltration"]
-    eta_rec = room_properties["Temperatur-Aenderungsgrad der Waermerueckgewinnung"]
-    Phi_P = room_properties["Waermeeintragsleistung Personen (bei 24.0 deg C, bzw. 70 W)"]
-    Phi_L = room_properties["Waermeeintragsleistung der Raumbeleuchtung"]
-    Phi_A = room_properties["Waermeeintragsleistung der Geraete"]
-    t_P = [room_properties["Vollaststunden pro Jahr (Personen)"]] * 12
-    t_L = [room_properties["Jaehrliche Vollaststunden der Raumbeleuchtung"]] * 12
-    t_A = [room_properties["Jaehrliche Vollaststunden der Geraete"]] * 12
-
-    # transforming daily sia2024 data to monthly
-    for i in range(len(days_per_month)):
-        t_P[i] *= days_per_month[i] / 365.0
-        t_L[i] *= days_per_month[i] / 365.0
-        t_A[i] *= days_per_month[i] / 365.0
-
-
     Q_s_per_surface = surface_irradiance.data   # workaround, because grasshopper components can't read jagged arrays - they are converted into separate lists
 
     # assign room properties to individual surfaces
     #    surface_type = ["opaque", "opaque", "transp", "transp"]
     #    surface_areas = [44.0, 62.3, 4.0, 5.2]
-    num_surfaces = len(surface_type)
-
-    # calculations from Illias Excel sheet:
-    # preAllocate arrays. its a bit faster than .append (https://levelup.gitconnected.com/faster-lists-in-python-4c4287502f0a)
-    Q_i = [0.0] * months_per_year
-    Q_s = [0.0] * months_per_year
-    Q_V = [0.0] * months_per_year
-    Q_T = [0.0] * months_per_year
-    # Q_s_per_surface = [0.0] * months_per_year
-    Q_T_per_surface = [0.0] * months_per_year
-
-    Q_Heat = [0.0] * months_per_year
-    Q_Cool = [0.0] * months_per_year
-    Q_Elec = [0.0] * months_per_year
-
-
-    Phi_P_tot = Phi_P * floor_area
-    Phi_L_tot = Phi_L * floor_area
-    Phi_A_tot = Phi_A * floor_area
-
-    # For each month, compute:
-    for month in range(months_per_year):
-        # pre-allocate jagged arrays
-        # Q_s_per_surface[month] = [0.0] * num_surfaces   # solar gains per surface for this month. input for now
-        Q_T_per_surface[month] = [0.0] * num_surfaces   # transmission losses per surface for this month
-
-        # External air flowrate (thermisch wirksamer Aussenluftvolumenstrom)
-        Vdot_e = Vdot_e_spec * floor_area
-        Vdot_inf = Vdot_inf_spec * floor_area
-        Vdot_th = Vdot_e * (1 - eta_rec) + Vdot_inf
-
-        # Ventilation heat loss coefficient (Lüftungs-Wärmetransferkoeffizient), H_V
-        H_V = Vdot_th/3600 * rho * c_p
-
-        # Ventilation losses (Lüftungswärmeverluste), Q_V
-        Q_V[month] = H_V * (T_i[month] - T_e[month]) * t[month]
+    results = main_batch([room_properties], [floor_area], T_e, T_i, [surface_areas], surface_type, Q_s_per_surface)
+    return tuple(result[0] for result in results)
 
-        # Internal loads (interne Wärmeeinträge)
-        Q_i[month] = Phi_P_tot * t_P[month] + Phi_L_tot * t_L[month] + Phi_A_tot * t_A[month]
 
-        for surface in range(num_surfaces):
-            # solar gains (solare Wärmeeinträge), Q_s, (PER SURFACE)
-            # unobstructed or obstructed, both using SolarModel.dll and GHSolar.gha
+def monthly_room_values(room_properties, level='Standardwert'):
+    """
+    Reads the properties of a room that do not depend on its geometry and converts them to monthly values per m2
+    floor area. Used by main_batch once per distinct room, not once per variant.
+    :param room_properties: room properties in json format (see main), or a SIA 2024 room code, e.g. '3.1'
+    :param level: 'Standardwert', 'Zielwert' or 'Bestand', standard level of room codes
+    :return: dict with tau [h], U_op and U_w [W/(m2K)], H_V_spec [W/(m2K)], and monthly Q_i_spec (internal gains) and
+    Q_Elec_spec (lighting and equipment) [Wh/m2]
+    """
+    rho = 1.2       # Luftdichte in kg/m^3
+    c_p = 1005      # Spez. Wärmekapazität Luft in J/(kgK)
 
-            # Transmission heat transfer coefficient (Transmissions-Wärmetransferkoeffizient), H_T, (PER SURFACE)
-            if(surface_type[surface] == "opaque"):
-                H_T = surface_areas[surface] * U_op
+    # read room properties from sia2024
+    # f_sh = 0.9  # sia2024, p.12, 1.3.1.9 Reduktion solare Wärmeeinträge
+    # theta_i_summer = room_properties["Raumlufttemperatur Auslegung Kuehlung (Sommer)"]
+    # theta_i_winter = room_properties["Raumlufttemperatur Auslegung Heizen (Winter)"]
+    # g = room_properties["Gesamtenergiedurchlassgrad Verglasung"]
+    value, monthly = sia2024_db.room_reader(room_properties, level)
+    Vdot_e_spec = value('q_ve')
+    Vdot_inf_spec = value('q_vinf')
+    eta_rec = value('eta_rec')
+    Phi_P = value('phi_P')
+    Phi_L = value('phi_L')
+    Phi_A = value('phi_A')
+    # monthly full-load hours, from the monthly tables of the compiled database for room codes
+    t_P = monthly('t_P')
+    t_L = monthly('t_L')
+    t_A = monthly('t_A')
+
+    # External air flowrate (thermisch wirksamer Aussenluftvolumenstrom) and
+    # ventilation heat loss coefficient (Lüftungs-Wärmetransferkoeffizient), per m2 floor area
+    Vdot_th_spec = Vdot_e_spec * (1 - eta_rec) + Vdot_inf_spec
+    H_V_spec = Vdot_th_spec / 3600 * rho * c_p
+
+    return {
+        "tau": value('tau'),
+        "U_op": value('U_op'),
+        "U_w": value('U_w'),
+        "H_V_spec": H_V_spec,
+        "Q_i_spec": [Phi_P * P + Phi_L * L + Phi_A * A for P, L, A in zip(t_P, t_L, t_A)],
+        # lighting and utility loads. simplification, because utility and lighting have efficiencies (inefficiencies
+        # are heat loads). I would need to know that to get full electricity loads
+        "Q_Elec_spec": [Phi_L * L + Phi_A * A for L, A in zip(t_L, t_A)],
+    }
+
+
+def main_batch(room_properties, floor_areas, T_e, T_i, surface_areas, surface_type, surface_irradiance,
+               level='Standardwert'):
+    """
+    Computes monthly heating, cooling and electricity demand (SIA 380.1) for many variants of a thermal zone at once,
+    e.g. for a parameter study over facade areas, U-values or room types. Same results as calling main per variant,
+    but everything that is shared between variants (room properties, surface types, temperature differences, solar
+    gains) is only evaluated once, and each variant reduces its surfaces to one opaque and one transparent area.
+    :param room_properties: room properties in json format (see main) or SIA 2024 room codes (e.g. '3.1', read from
+    the compiled database of sia2024_db.py), one for all variants or a list of N
+    :param floor_areas: list of N floor areas in m2
+    :param T_e: monthly average ambient air temperature in degree Celsius, 12 values
+    :param T_i: monthly temperature setpoints, 12 values for all variants or a list of N such lists
+    :param surface_areas: N x S matrix of surface areas in m2, one row per variant
+    :param surface_type: 'opaque' or 'transp' per surface, S values for all variants or N x S
+    :param surface_irradiance: monthly solar gains in Wh per surface [months_per_year][num_srfs] for all variants, or
+    a list of N such jagged arrays
+    :param level: 'Standardwert', 'Zielwert' or 'Bestand', standard level of room codes
+    :return: Q_Heat, Q_Cool, Q_Elec in kWh and Q_T, Q_V, Q_i, Q_s in Wh, each as N lists of 12 monthly values
+    """
+    months = range(MONTHS_PER_YEAR)
+    t = [HOURS_PER_DAY * days for days in DAYS_PER_MONTH]   # length of calculation period (hours per month) [h]
+    num_variants = len(floor_areas)
+
+    if isinstance(room_properties, dict) or not isinstance(room_properties, (list, tuple)):
+        room_properties = [room_properties] * num_variants
+    shared_T_i = not isinstance(T_i[0], (list, tuple))
+    shared_types = not isinstance(surface_type[0], (list, tuple))
+    shared_irradiance = not isinstance(surface_irradiance[0][0], (list, tuple))
+
+    def degree_hours(T_i):
+        return [(T_i[month] - T_e[month]) * t[month] for month in months]
+
+    def is_opaque(surface_type):
+        return [srf_type == "opaque" for srf_type in surface_type]
+
+    def solar_gains(Q_s_per_surface):
+        return [sum(Q_s_per_surface[month]) for month in months]
+
+    rooms = {}
+    if shared_T_i:
+        dT_t = degree_hours(T_i)
+    if shared_types:
+        opaque = is_opaque(surface_type)
+    if shared_irradiance:
+        Q_s = solar_gains(surface_irradiance)
+
+    results = [[] for _ in range(7)]
+    Q_Heat_all, Q_Cool_all, Q_Elec_all, Q_T_all, Q_V_all, Q_i_all, Q_s_all = results
+    for n in range(num_variants):
+        properties = room_properties[n]
+        # dicts by identity, room codes by value
+        key = id(properties) if isinstance(properties, dict) else properties
+        room = rooms.get(key)
+        if room is None:
+            room = rooms[key] = monthly_room_values(properties, level)
+        if not shared_T_i:
+            dT_t = degree_hours(T_i[n])
+        if not shared_types:
+            opaque = is_opaque(surface_type[n])
+        if not shared_irradiance:
+            Q_s = solar_gains(surface_irradiance[n])
+        floor_area = floor_areas[n]
+        tau = room["tau"]
+        a = 1 + tau / 15
+
+        # Transmission heat transfer coefficient (Transmissions-Wärmetransferkoeffizient), H_T, and
+        # ventilation heat loss coefficient (Lüftungs-Wärmetransferkoeffizient), H_V
+        A_op = sum(area for area, is_op in zip(surface_areas[n], opaque) if is_op)
+        A_w = sum(area for area, is_op in zip(surface_areas[n], opaque) if not is_op)
+        H_T = A_op * room["U_op"] + A_w * room["U_w"]
+        H_V = room["H_V_spec"] * floor_area
+
+        Q_T = [H_T * x for x in dT_t]
+        Q_V = [H_V * x for x in dT_t]
+        Q_i = [x * floor_area for x in room["Q_i_spec"]]
+        Q_Heat = [0.0] * MONTHS_PER_YEAR
+        Q_Cool = [0.0] * MONTHS_PER_YEAR
+        for month in months:
+            losses = Q_T[month] + Q_V[month]
+            gains = Q_i[month] + Q_s[month]
+
+            # usage of heat gains (Ausnutzungsgrad für Wärmegewinne), eta_g
+            gamma = gains / losses
+            if losses < 0:
+                eta_g = 0
+            elif gamma == 1:
+                eta_g = (1 + tau / 5) / (2 + tau / 15)
             else:
-                H_T = surface_areas[surface] * U_w
-
-            # Transmission losses (Transmissionswärmeverluste), Q_T, (PER SURFACE, because function of H_T)
-            Q_T_per_surface[month][surface] = H_T * (T_i[month] - T_e[month]) * t[month]
-
-        Q_T[month] = sum(Q_T_per_surface[month])
-        Q_s[month] = sum(Q_s_per_surface[month])
-
-        # Heatgains/-losses ratio (Wärmeeintrag/-verlust Verhältnis), gamma
-        gamma = (Q_i[month] + Q_s[month]) / (Q_T[month] + Q_V[month])
-
-        # usage of heat gains (Ausnutzungsgrad für Wärmegewinne), eta_g
-        if Q_T[month] + Q_V[month] < 0:
-            eta_g = 0
-        elif gamma == 1:
-            eta_g = (1 + tau / 5) / (2 + tau / 15)
-        else:
-            a = 1 + tau / 15
-            eta_g = (1 - gamma ** a) / (1 - gamma ** (a + 1))
+                eta_g = (1 - gamma ** a) / (1 - gamma ** (a + 1))
 
-        # heating demand (Heizwärmebedarf), Q_H
-        demand = Q_T[month] + Q_V[month] - eta_g * (Q_i[month] + Q_s[month])
-        if(demand > 0):
-            Q_Heat[month] = demand
-        else:
-            Q_Cool[month] = demand
-
-        Q_Elec[month] = Phi_L_tot * t_L[month] + Phi_A_tot * t_A[month]   # lighting and utility loads. simplification, because utility and lighting have efficiencies (inefficiencies are heat loads). I would need to know that to get full electricity loads
-
-    tokWh = 1000.0
-    return [x / tokWh for x in Q_Heat], [x / tokWh for x in Q_Cool], [x / tokWh for x in Q_Elec], Q_T, Q_V, Q_i, Q_s
+            # heating demand (Heizwärmebedarf), Q_H
+            demand = losses - eta_g * gains
+            if demand > 0:
+                Q_Heat[month] = demand / TO_KWH
+            else:
+                Q_Cool[month] = demand / TO_KWH
 
+        Q_Heat_all.append(Q_Heat)
+        Q_Cool_all.append(Q_Cool)
+        Q_Elec_all.append([x * floor_area / TO_KWH for x in room["Q_Elec_spec"]])
+        Q_T_all.append(Q_T)
+        Q_V_all.append(Q_V)
+        Q_i_all.append(Q_i)
+        Q_s_all.append(list(Q_s))
+    return results
 
 
 if __name__ == "__main__":
@@ -324,5 +374,19 @@ if __name__ == "__main__":
         print(Q_i)
         print(Q_s)
 
+        # window-to-wall variants, batched vs. one call per variant
+        variants = [[A * f for A in surface_areas[:5]] + [surface_areas[5]] for f in (0.5, 1.0, 1.5)]
+        batched = main_batch(room_properties, [floor_area] * 3, T_e, T_i, variants, surface_type, Q_s_per_surface)
+        for n, areas in enumerate(variants):
+            single = main(room_properties, floor_area, T_e, T_i, setpoints_ub, setpoints_lb, areas, surface_type, jaggeddata)
+            for batch_result, single_result in zip(batched, single):
+                assert all(abs(x - y) < 1e-9 for x, y in zip(batch_result[n], single_result))
+
+        # room codes are read from the compiled SIA 2024 database
+        by_code = main_batch("1.1", [floor_area] * 3, T_e, T_i, variants, surface_type, Q_s_per_surface)
+        by_dict = main_batch(sia2024_db.load().room("1.1"), [floor_area] * 3, T_e, T_i, variants, surface_type,
+                             Q_s_per_surface)
+        assert by_code == by_dict
+
 
     test()
\ No newline at end of file
@@ -2,6 +2,8 @@
 Calculating solar irradiance on external building surfaces.
 Using external libraries SolarModel.dll and GHSolar.gha
 """
+from __future__ import division
+
 import System
 import Rhino.Geometry as rg
 import Grasshopper as gh
@@ -82,7 +84,7 @@ def simulate_obstructed_panel(mesh_analysis, mesh_obstructions,
     results = calc_mesh.getResults()  # GHSolar.CResults
 
     # use GHSolar.GHResultsRead component to read GHSolar.CResults
-    irradiance = read_results(results, mesh_analysis)
+    irradiance, face_irradiance = read_results(results, mesh_analysis)  # face_irradiance is None, not asked for
 
     # call visualize_as_mesh()
     mesh_visu = visualize_as_mesh(results, mesh_analysis, max_value, min_value)
@@ -90,42 +92,95 @@ def simulate_obstructed_panel(mesh_analysis, mesh_obstructions,
     return [irradiance, mesh_visu]
 
 
-def read_results(ghsolar_results, mshin):
+def mesh_faces(mshin):
     """
-    Returns the total irradiance of the entire mesh in [W], or [Wh] (same, since hourly resolution). 8760 values
-    :param ghsolar_results:
-    :param mshin:
-    :return:
+    Vertex indices and area of every mesh face, computed once per mesh instead of once per face and hour
+    :param mshin: Rhino.Geometry.Mesh
+    :return: list of vertex index tuples (3 or 4 per face), list of face areas [m2]
     """
-    timeseries = [0.0] * 8760
+    faces = mshin.Faces
+    face_vertices = []
+    for i in range(faces.Count):
+        face = faces[i]
+        face_vertices.append((face.A, face.B, face.C, face.D) if face.IsQuad else (face.A, face.B, face.C))
+    face_areas = [ghs.CMisc.getMeshFaceArea(i, mshin) for i in range(faces.Count)]
+    return face_vertices, face_areas
 
-    valin = []
-    for i in range(0, ghsolar_results.I_hourly.RowCount):
-        val_t = [0.0] * ghsolar_results.I_hourly.ColumnCount
-        for t in range(0, ghsolar_results.I_hourly.ColumnCount):
-            val_t[t] = ghsolar_results.I_hourly[i, t]
-        valin.append(val_t)
-
-    mshFaceAreas = [0.0] * mshin.Faces.Count
-
-    for t in range(0, ghsolar_results.I_hourly.ColumnCount):
-        totVal = 0
-        for i in range(0, mshin.Faces.Count):
-            mshFaceAreas[i] = ghs.CMisc.getMeshFaceArea(i, mshin)
-            FaceVal = 0.0
-            valVertex1 = valin[mshin.Faces[i].A][t]
-            valVertex2 = valin[mshin.Faces[i].B][t]
-            valVertex3 = valin[mshin.Faces[i].C][t]
-            if mshin.Faces[i].IsQuad:
-                valVertex4 = valin[mshin.Faces[i].D][t]
-                FaceVal = ((valVertex1 + valVertex2 + valVertex3 + valVertex4) / 4) * ghs.CMisc.getMeshFaceArea(i,
-                                                                                                                mshin)
-            else:
-                FaceVal = ((valVertex1 + valVertex2 + valVertex3) / 3) * ghs.CMisc.getMeshFaceArea(i, mshin)
-            totVal = totVal + FaceVal
-        timeseries[t] = totVal
-
-    return timeseries
+
+def vertex_weights(face_vertices, face_areas):
+    """
+    Sparse faces x vertices matrix of the face integration, summed over the faces: every face spreads its area
+    equally onto its vertices, so the total irradiance is sum(weight[v] * I[v]) over the vertices
+    :param face_vertices: vertex indices per face, see mesh_faces
+    :param face_areas: area per face [m2]
+    :return: dict of vertex index: weight [m2], only vertices used by a face
+    """
+    weights = {}
+    for vertices, area in zip(face_vertices, face_areas):
+        share = area / len(vertices)
+        for v in vertices:
+            weights[v] = weights.get(v, 0.0) + share
+    return weights
+
+
+def integrate_faces(vertex_values, face_vertices, face_areas, per_face=False):
+    """
+    Total and face averaged values of per vertex time series
+    :param vertex_values: dict or list, vertex index: time series, e.g. irradiance [W/m2]
+    :param face_vertices: vertex indices per face, see mesh_faces
+    :param face_areas: area per face [m2]
+    :param per_face: True to also average the series of every face
+    :return: area weighted total per timestep (e.g. [W]); list of face averaged time series per face (e.g. [W/m2]),
+    None if per_face is False
+    """
+    total = None
+    for v, weight in vertex_weights(face_vertices, face_areas).items():
+        if total is None:
+            total = [weight * value for value in vertex_values[v]]
+        else:
+            total = [t + weight * value for t, value in zip(total, vertex_values[v])]
+    if not per_face:
+        return total or [], None
+
+    faces = []
+    for vertices in face_vertices:
+        rows = [vertex_values[v] for v in vertices]
+        if len(rows) == 4:
+            faces.append([(a + b + c + d) / 4.0 for a, b, c, d in zip(*rows)])
+        else:
+            faces.append([(a + b + c) / 3.0 for a, b, c in zip(*rows)])
+    return total or [], faces
+
+
+def matrix_rows(matrix, rows):
+    """
+    Rows of a GHSolar result matrix, each read at once through the row accessor of the matrix (MathNet.Numerics
+    Matrix.Row), element by element only for matrix types without one
+    :param matrix: e.g. GHSolar.CResults.I_hourly, vertices x hours
+    :param rows: row indices
+    :return: dict of row index: list of values
+    """
+    if hasattr(matrix, 'Row'):
+        return dict((i, list(matrix.Row(i).ToArray())) for i in rows)
+    columns = range(matrix.ColumnCount)
+    return dict((i, [matrix[i, t] for t in columns]) for i in rows)
+
+
+def read_results(ghsolar_results, mshin, per_face=False):
+    """
+    Returns the total irradiance of the entire mesh in [W], or [Wh] (same, since hourly resolution), and optionally
+    the irradiance of each face. Face areas and vertices are read once, every vertex row of the GHSolar result once
+    as a whole, and the hourly face integration is a sparse (faces x vertices) times (vertices x hours) product
+    :param ghsolar_results: GHSolar.CResults
+    :param mshin: Rhino.Geometry.Mesh
+    :param per_face: True to also return the series of every face
+    :return: total irradiance [W], 8760 values; face averaged irradiance [W/m2] per face, 8760 values each (e.g.
+    for conversion.pv_surfaces, with the areas from mesh_faces), or None if per_face is False
+    """
+    face_vertices, face_areas = mesh_faces(mshin)
+    used = set(v for vertices in face_vertices for v in vertices)
+    vertex_values = matrix_rows(ghsolar_results.I_hourly, sorted(used))
+    return integrate_faces(vertex_values, face_vertices, face_areas, per_face)
 
 
 def visualize_as_mesh(results, mshin, maxval, minval):
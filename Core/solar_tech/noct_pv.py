@@ -6,6 +6,8 @@ Calculating hourly electricity generation by PV system, given
     - PV system area
 """
 
+import conversion
+
 
 def main(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I):
     return pv_yield(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I)
@@ -23,17 +25,56 @@ def pv_efficiency(eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I):
     :param I: Irradiance on panel [W/m2]. 8760 time series
     :return: Time resolved PV efficiency [-], 8760 entries
     """
-    horizon = len(T_amb)
-    etapv = [0.0] * horizon
-    for i in range(0, horizon):
-        Tpv = T_amb[i] + ((NOCT - NOCT_ref) / NOCT_sol) * I[i]
-        etapv[i] = eta_PVref * (1 - beta * (Tpv - 25))
-    return etapv
+    return conversion.pv(1.0, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I)[1]
 
 
 def pv_yield(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I):
-    eta_pv = pv_efficiency(eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I)
-    pvyield = [0.0] * len(eta_pv)
-    for i in range(0, len(eta_pv)):
-        pvyield[i] = A * eta_pv[i] * I[i]
-    return pvyield, eta_pv
\ No newline at end of file
+    # see Core/conversion, also for screening many PV variants at once
+    return conversion.pv(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I)
+
+
+def pv_yield_surfaces(A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, T_amb, I, efficiency=True):
+    """
+    PV yield of many surfaces at once, e.g. all faces of a facade mesh, see conversion.pv_surfaces
+    :param A: area per surface [m2], list or number, empty for 1.0. Same for eta_PVref (empty for 0.15) and the other
+    module parameters. A single value (also a one-element list) is used for all surfaces, other lengths that do not
+    match the number of surfaces raise a ValueError
+    :param I: irradiance per surface [W/m2], one 8760 time series per surface (list of lists or a DataTree with one
+    branch per surface)
+    :param efficiency: False to skip the efficiencies of every surface and hour
+    :return: yield [Wh] and efficiency [-] per surface, S x 8760 (DataTrees inside Grasshopper, efficiency None if
+    not asked for), total yield of all surfaces [Wh], 8760 entries, and annual yield per surface [Wh]
+    """
+    A = 1.0 if A is None or A == [] else A
+    eta_PVref = 0.15 if eta_PVref is None or eta_PVref == [] else eta_PVref
+    results = conversion.pv_surfaces(_branches(I), T_amb, A, eta_PVref, beta, NOCT, NOCT_ref, NOCT_sol, efficiency)
+    effic = _to_tree(results['efficiency']) if efficiency else None
+    return _to_tree(results['yield']), effic, results['total'], results['annual']
+
+
+def _branches(tree):
+    # Grasshopper DataTree to a list per branch
+    if hasattr(tree, 'BranchCount'):
+        return [list(tree.Branch(b)) for b in range(tree.BranchCount)]
+    return tree
+
+
+def _to_tree(rows):
+    # one branch per surface inside Grasshopper, lists elsewhere
+    try:
+        from ghpythonlib.treehelpers import list_to_tree
+    except ImportError:
+        return rows
+    return list_to_tree(rows)
+
+
+if __name__ == '__main__':
+    # a single value on the list inputs A and eta_PVref is used for all surfaces
+    yields, effic, total, annual = pv_yield_surfaces([2.0], [0.18], 0.004, 45., 20., 800., [10.0] * 5, [[500.0] * 5] * 3)
+    single = sum(pv_yield(2.0, 0.18, 0.004, 45., 20., 800., [10.0] * 5, [500.0] * 5)[0])
+    assert len(yields) == 3 and all(abs(a - single) < 1e-9 for a in annual)
+    try:
+        pv_yield_surfaces([2.0, 3.0], [0.18], 0.004, 45., 20., 800., [10.0] * 5, [[500.0] * 5] * 3)
+        raise AssertionError('two areas for three surfaces')
+    except ValueError as e:
+        print(e)
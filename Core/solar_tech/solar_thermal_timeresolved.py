@@ -6,6 +6,8 @@ Eq. (A.11) from 10.1016/j.apenergy.2019.03.177
 found in: 10.1016/j.apenergy.2016.07.055
 """
 
+import conversion
+
 
 def main(inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance, surface_area):
     """
@@ -16,25 +18,9 @@ def main(inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance, surface_area):
     :param FRUL: Heat loss coefficient [W/m2K], constant
     :param irradiance: Irradiance on the collector [W/m2], time series
     :param surface_area: Surface area of the solar thermal collector [m2]
-    :returns: heating energy [kWh] time resolved, efficiency [-] time resolved
+    :returns: heating energy [kWh] time resolved, efficiency [-] time resolved (0 without irradiance)
     """
-
-    horizon = len(inlet_temp)
-    if horizon > len(ambient_temp):
-        horizon = len(ambient_temp)
-    if horizon > len(irradiance):
-        horizon = len(irradiance)
-
-    eta = [0.0] * horizon
-    heating = [0.0] * horizon
-
-    for i in range(horizon):
-        eta_temp = FRtaualpha - ((FRUL * (inlet_temp[i] - ambient_temp[i])) / irradiance[i])
-        eta[i] = max(0, eta_temp)
-        heating[i] = (irradiance[i] * eta[i] * surface_area) / 1000.0
-
-    return heating, eta
-
+    return conversion.solar_thermal(inlet_temp, ambient_temp, FRtaualpha, FRUL, irradiance, surface_area)
 
 if __name__ == '__main__':
     inlet_temp = [10.0, 4.0]
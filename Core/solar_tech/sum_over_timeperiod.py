@@ -5,6 +5,8 @@ Summarize electricity yield over specified time period
     - year
 """
 
+import timeseries
+
 
 def main(sum_mode, elec):
     pvyield = [0.0]
@@ -21,24 +23,11 @@ def main(sum_mode, elec):
 def monthly_sum(elec):
     # which year should be assumed for days per month?!
     # let's assume common year in Gregorian calendar
-    elecpermonth = [0.0] * 12
-    dayspermonth = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-    h = 0
-    for i in range(0, 12):
-        elecpermonth[i] = sum(elec[h:(h + dayspermonth[i]*24)])
-        h += dayspermonth[i]*24
-    return elecpermonth
+    return timeseries.aggregate(elec, 'month', 'sum')
 
 
 def daily_sum(elec):
-    elecperday = [0.0] * 365
-    u = 0
-    for i in range(0, len(elec)):
-        elecperday[u] += elec[i]
-        if (i+1) % 24 == 0:
-            u += 1
-    return elecperday
-
+    return timeseries.aggregate(elec, 'day', 'sum')
 
 if __name__ == '__main__':
     elec = [1.0] * 8760 # kWh
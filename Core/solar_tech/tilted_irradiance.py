@@ -0,0 +1,73 @@
+# coding=utf-8
+"""
+Irradiance on a tilted plane, e.g. a PV panel or solar thermal collector, from direct normal and diffuse horizontal
+irradiance, with the Perez 1990 diffuse model of perez.py (same model as WindowRadiation in the Hive components)
+
+usage:
+    I = main(dni, dhi, sun_alt, sun_az, 30.0, 180.0, 0.2)  # e.g. as irradiance input of NOCT PV or ST-tr
+"""
+
+from __future__ import division
+
+import math
+
+import perez
+
+
+def main(dni, dhi, sun_alt, sun_az, tilt, azimuth, albedo):
+    """
+    Calculates the irradiance on a tilted plane for a whole time series
+    :param dni: Direct normal irradiance [W/m2], time series
+    :param dhi: Diffuse horizontal irradiance [W/m2], time series
+    :param sun_alt: Sun altitude [deg], time series
+    :param sun_az: Sun azimuth [deg], time series, traditional convention (north 0, east 90)
+    :param tilt: Tilt of the plane from horizontal [deg], 0 horizontal, 90 vertical
+    :param azimuth: Azimuth of the plane normal [deg], same convention as sun_az, e.g. 180 south
+    :param albedo: Ground reflectance [-]
+    :return: total, direct, diffuse and ground reflected irradiance on the plane [W/m2], time series
+    """
+    horizon = min(len(dni), len(dhi), len(sun_alt), len(sun_az))
+    tilt_rad = math.radians(tilt)
+    sin_tilt, cos_tilt = math.sin(tilt_rad), math.cos(tilt_rad)
+    view_factor = (1 + cos_tilt) / 2
+
+    incidence = []
+    for alt, az in zip(sun_alt[:horizon], sun_az[:horizon]):
+        alt_rad = math.radians(alt)
+        relative_az_rad = math.radians(az - azimuth)
+        cos_incidence = math.sin(alt_rad) * cos_tilt + math.cos(alt_rad) * sin_tilt * math.cos(relative_az_rad)
+        incidence.append(math.acos(max(-1.0, min(1.0, cos_incidence))))
+    circum, horizon_brightening, isotropic = perez.perez_components(incidence, sun_alt[:horizon], dni[:horizon],
+                                                                    dhi[:horizon], tilt_rad, view_factor)
+
+    total, direct, diffuse, ground = [], [], [], []
+    for t in range(horizon):
+        cos_incidence = math.cos(incidence[t])
+        beam = dni[t] * cos_incidence if dni[t] > 0 and cos_incidence > 0 and sun_alt[t] > 0 else 0.0
+        # as WindowRadiation.calc_diffuse_irradiation: a dominant circumsolar part replaces the other two
+        iso = 0.0 if circum[t] > 2 * isotropic[t] else isotropic[t]
+        hor = 0.0 if circum[t] > 2 * horizon_brightening[t] else horizon_brightening[t]
+        diff = circum[t] + iso + hor
+        reflected = albedo * (dni[t] * max(0.0, math.sin(math.radians(sun_alt[t]))) + dhi[t]) * (1 - view_factor)
+        direct.append(beam)
+        diffuse.append(diff)
+        ground.append(reflected)
+        total.append(beam + diff + reflected)
+    return total, direct, diffuse, ground
+
+
+if __name__ == '__main__':
+    # a sunny and an overcast noon, and a night hour
+    dni = [800.0, 0.0, 0.0]
+    dhi = [100.0, 250.0, 0.0]
+    sun_alt = [40.0, 40.0, -20.0]
+    sun_az = [180.0, 180.0, 0.0]
+
+    flat = main(dni, dhi, sun_alt, sun_az, 0.0, 180.0, 0.2)
+    assert abs(flat[1][0] - 800.0 * math.sin(math.radians(40.0))) < 1e-9 and flat[3][0] == 0.0
+    assert flat[0][2] == 0.0
+    south = main(dni, dhi, sun_alt, sun_az, 50.0, 180.0, 0.2)
+    assert abs(south[1][0] - 800.0) < 1e-9
+    north = main(dni, dhi, sun_alt, sun_az, 50.0, 0.0, 0.2)
+    assert north[1][0] == 0.0 and north[0][1] > 0.0
+    print(south[0])
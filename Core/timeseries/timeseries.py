@@ -0,0 +1,196 @@
+# coding=utf-8
+"""
+Aggregation of hourly time series into days, weeks, months, years or custom periods.
+
+All hourly series of a simulation share the same calendar, so the bucket boundaries (in hours, relative to the
+first value of the series) are computed once per (period, start_HOY, length, leap year) and cached. Every
+reduction then only slices the series at these boundaries, i.e. like numpy.add.reduceat, and any number of series
+can be reduced in one call.
+
+Conventions:
+- start_HOY is the hour of the year of the first value, starting at 1 (as in HivePreparation.set_simulation_period)
+- weeks are blocks of 7 days starting on January 1st, the last week of the year has 1 (or 2) days only
+- series longer than a year continue into the next year(s), buckets never span across a year boundary
+
+usage:
+    ghi_monthly = aggregate(ghi, 'month', 'sum')
+    daily_min, daily_max = aggregate([t_out, t_air], 'day', 'min')
+    p90 = aggregate(t_air, 'month', 'percentile', q=90)
+"""
+
+from __future__ import division
+
+DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+HOURS_PER_DAY = 24
+PERIODS = ('day', 'week', 'month', 'year')
+REDUCTIONS = ('sum', 'mean', 'min', 'max', 'median', 'percentile')
+
+# bucket boundaries, keyed by (period, start_HOY, horizon, leap_year)
+_boundaries = {}
+
+
+def days_per_month(leap_year=False):
+    days = list(DAYS_PER_MONTH)
+    if leap_year:
+        days[1] = 29
+    return days
+
+
+def hours_per_year(leap_year=False):
+    return sum(days_per_month(leap_year)) * HOURS_PER_DAY
+
+
+def period_starts(period, leap_year=False):
+    """
+    Hours (0-based, from the start of the year) at which the buckets of a period start, within one year
+    :param period: 'day', 'week', 'month' or 'year', or a list of hours of the year (1-based) at which custom
+    buckets start, e.g. [1, 2161, 4345, 6553] for (roughly) seasons
+    :param leap_year: True if February has 29 days
+    :return: list of bucket start hours, first one is always 0
+    """
+    if period == 'day':
+        return list(range(0, hours_per_year(leap_year), HOURS_PER_DAY))
+    elif period == 'week':
+        return list(range(0, hours_per_year(leap_year), 7 * HOURS_PER_DAY))
+    elif period == 'month':
+        starts = [0]
+        for days in days_per_month(leap_year)[:-1]:
+            starts.append(starts[-1] + days * HOURS_PER_DAY)
+        return starts
+    elif period == 'year':
+        return [0]
+    elif isinstance(period, (list, tuple)):
+        starts = sorted(set([0] + [int(hoy) - 1 for hoy in period]))
+        if starts[-1] >= hours_per_year(leap_year):
+            raise ValueError('Custom period starts must be within the year: %s' % (period,))
+        return starts
+    raise ValueError("Unknown period '%s'. Valid periods: %s, or a list of HOYs" % (period, ', '.join(PERIODS)))
+
+
+def boundaries(period, start_HOY, horizon, leap_year=False):
+    """
+    Indices into a series at which its buckets start, plus the length of the series at the end. Consecutive
+    entries delimit a bucket, i.e. bucket i is series[bounds[i]:bounds[i + 1]]
+    :param period: see period_starts
+    :param start_HOY: hour of the year of the first value of the series, starting at 1
+    :param horizon: length of the series
+    :param leap_year: True if February has 29 days
+    :return: list of indices, len(bounds) - 1 buckets
+    """
+    key = (tuple(period) if isinstance(period, list) else period, start_HOY, horizon, leap_year)
+    if key in _boundaries:
+        return _boundaries[key]
+
+    year_hours = hours_per_year(leap_year)
+    starts = period_starts(period, leap_year)
+    offset = start_HOY - 1
+    bounds = [0]
+    year = 0
+    while year * year_hours < offset + horizon:
+        for hour in starts:
+            index = year * year_hours + hour - offset
+            if 0 < index < horizon:
+                bounds.append(index)
+        year += 1
+    bounds.append(horizon)
+    _boundaries[key] = bounds
+    return bounds
+
+
+def bucket_labels(period, start_HOY, horizon, leap_year=False):
+    """
+    Label of each bucket, i.e. the index of the day/week/month/custom period within its year (0-based)
+    :return: list of int, one per bucket, same order as the values returned by aggregate
+    """
+    year_hours = hours_per_year(leap_year)
+    starts = period_starts(period, leap_year)
+    labels = []
+    for index in boundaries(period, start_HOY, horizon, leap_year)[:-1]:
+        hour = (start_HOY - 1 + index) % year_hours
+        label = 0
+        while label + 1 < len(starts) and starts[label + 1] <= hour:
+            label += 1
+        labels.append(label)
+    return labels
+
+
+def percentile(values, q):
+    """
+    q-th percentile of values, linear interpolation between closest ranks (as numpy.percentile)
+    :param q: percentile in [0, 100]
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _reducer(how, q):
+    if how == 'sum':
+        return sum
+    elif how == 'mean':
+        return lambda values: sum(values) / len(values)
+    elif how == 'min':
+        return min
+    elif how == 'max':
+        return max
+    elif how == 'median':
+        return lambda values: percentile(values, 50)
+    elif how == 'percentile':
+        return lambda values: percentile(values, q)
+    raise ValueError("Unknown reduction '%s'. Valid reductions: %s" % (how, ', '.join(REDUCTIONS)))
+
+
+def aggregate(series, period='month', how='sum', start_HOY=1, leap_year=False, q=50):
+    """
+    Reduces hourly series per day, week, month, year or custom period
+    :param series: one hourly series (list of floats) or a list of hourly series of the same length
+    :param period: 'day', 'week', 'month', 'year', or a list of HOYs at which custom buckets start
+    :param how: 'sum', 'mean', 'min', 'max', 'median' or 'percentile'
+    :param start_HOY: hour of the year of the first value, starting at 1
+    :param leap_year: True if February has 29 days
+    :param q: percentile in [0, 100], only used if how is 'percentile'
+    :return: list with one value per bucket, or a list of such lists if series was a list of series
+    """
+    if len(series) == 0:
+        return []
+    many = hasattr(series[0], '__len__')
+    all_series = series if many else [series]
+    reduce_bucket = _reducer(how, q)
+
+    horizon = len(all_series[0])
+    for s in all_series:
+        if len(s) != horizon:
+            raise ValueError('All series must have the same length, got %i and %i' % (horizon, len(s)))
+    bounds = boundaries(period, start_HOY, horizon, leap_year)
+    buckets = list(zip(bounds[:-1], bounds[1:]))
+
+    results = [[reduce_bucket(s[a:b]) for a, b in buckets] for s in all_series]
+    return results if many else results[0]
+
+
+if __name__ == '__main__':
+    def test():
+        hourly = [1.0] * 8760
+        assert aggregate(hourly, 'year') == [8760.0]
+        assert aggregate(hourly, 'month') == [d * 24.0 for d in DAYS_PER_MONTH]
+        assert aggregate(hourly, 'day') == [24.0] * 365
+        assert aggregate(hourly, 'week') == [168.0] * 52 + [24.0]
+        assert aggregate([1.0] * 8784, 'month', leap_year=True)[1] == 29 * 24.0
+
+        # series starting at noon of january 31st, running for 2 days
+        assert aggregate([1.0] * 48, 'month', start_HOY=24 * 30 + 13) == [12.0, 36.0]
+        assert bucket_labels('month', 24 * 30 + 13, 48) == [0, 1]
+        # one and a half years, january is split across two buckets
+        assert len(aggregate([1.0] * (8760 + 4380), 'month')) == 12 + 7
+
+        ramp = [float(h % 24) for h in range(8760)]
+        daily_min, daily_max = aggregate([ramp, ramp], 'day', 'min')[0], aggregate([ramp, ramp], 'day', 'max')[1]
+        assert daily_min == [0.0] * 365 and daily_max == [23.0] * 365
+        assert aggregate(ramp, 'day', 'mean')[0] == 11.5
+        assert aggregate(ramp, 'day', 'percentile', q=100)[0] == 23.0
+        assert aggregate(ramp, [1, 4345])[0] == sum(ramp[:4344])
+
+
+    test()